@@ -0,0 +1,317 @@
+"""
+Throughput benchmarks of the load generator's own hot paths, compared with stored baselines.
+
+Every case runs offline at 1k, 100k and 1M items: the matchmaker is never called, and the
+notification lambda and -result run against in-process DynamoDB stubs. A case reports items
+per second (players, tickets, events...), the best of a few repeats, and fails when it drops
+more than the threshold below its baseline in baselines.json. Throughputs only compare on
+the same hardware, so baselines.json keeps one set per host, keyed by CPU model, core count
+and Python version (the hostname changes with every container): on a new machine, record its
+baselines with --update first, until then its results are only reported.
+Run it from the root of the repository, like main.py:
+
+    python Multi-pools/benchmarks/hotpaths.py [--scales 1k,100k] [--cases mockPlayers,...]
+                                              [--threshold 0.3] [--update] [--host name]
+"""
+
+import argparse, contextlib, gc, io, json, os, platform, random, sys, tempfile, time, types
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+BASELINES_VERSION = 2
+SCALES = {'1k': 1000, '100k': 100000, '1m': 1000000}
+DEFAULT_THRESHOLD = 0.3
+# Repeats of a case, fewer at the largest scale
+REPEATS = {'1k': 5, '100k': 3, '1m': 1}
+MIN_SAMPLE_SECONDS = 0.2
+TICKETS_PER_EVENT = 4
+SHARDS = 8
+PAGE_ITEMS = 1000
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+def _iso(seconds):
+  return (START + timedelta(seconds=seconds)).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+def _config():
+  with open('Multi-pools/Configs/config.json') as config:
+    return json.load(config)
+
+def _realticket(config):
+  from ticket.real_ticket import RealTicket
+  realticket = RealTicket('Radiant-Dire-Classic-1')
+  realticket._parseBenchmarkConfig(config['sample'], config['benchmark'])
+  return realticket
+
+# Each case builds its input outside the timing and returns (run, unit); run() is timed
+
+def case_generate_scores(count, config):
+  from ticket.helpers import generate_scores, partition_parties, party_size_distribution
+  _, lengths = partition_parties(count, *party_size_distribution(config['benchmark'], 'Classic'))
+  return lambda: generate_scores(count, 1000, 200, lengths, 0.5), 'scores'
+
+def case_partition_parties(count, config):
+  # split_array before the offset arrays of partition_parties
+  from ticket.helpers import partition_parties, party_size_distribution
+  distribution = party_size_distribution(config['benchmark'], 'Classic')
+  return lambda: partition_parties(count, *distribution), 'players'
+
+def case_generate_random_string(count, config):
+  from ticket.helpers import generate_random_string
+  return lambda: [generate_random_string(10) for _ in range(count)], 'strings'
+
+def case_player_mock(count, config):
+  from ticket.helpers import generate_scores
+  from ticket.player import Player
+  attrs = {attr: generate_scores(count, value['median'], value['std_dev'])
+           for attr, value in config['sample']['playerData'].items() if 'median' in value}
+  return lambda: [Player().mock(attrs, index) for index in range(count)], 'players'
+
+def case_mock_players(count, config):
+  from ticket.helpers import partition_parties
+  realticket = _realticket(config)
+  _, lengths = partition_parties(count, *realticket.partySizeDistribution)
+  def run():
+    realticket.players = []
+    realticket.mockPlayers(count, lengths)
+  return run, 'players'
+
+def case_handle_ticket_status(count, config):
+  from ticket.registry import TicketRegistry
+  from ticket.counters import ShardedCounters
+  from ticket.stats import ElapsedTimes
+  realticket = _realticket(config)
+  players = [{'PlayerId': 'player-1', 'Team': 'red'}]
+  tickets = []
+  for index in range(count):
+    ticketId = f"bench-0000-{index:010d}"
+    tickets.append({'TicketId': ticketId, 'ConfigurationName': realticket.machmakingConfigurationName,
+                    'Status': 'COMPLETED', 'Players': players, 'StartTime': START,
+                    'EndTime': START + timedelta(seconds=30 + index % 60),
+                    'GameSessionConnectionInfo': {'GameSessionArn': f"arn:session/{index // 8}"}})
+  def run():
+    realticket.tickets = TicketRegistry()
+    realticket.counters = ShardedCounters()
+    realticket.completeTickets = ElapsedTimes()
+    for ticket in tickets:
+      realticket.tickets.add(ticket['TicketId'], 1, ('Classic',), 'QUEUED', 0)
+    # A SEARCHING transition, then the completion, as the monitor sees most tickets
+    for ticket in tickets:
+      realticket.handle_ticket_status(dict(ticket, Status='SEARCHING'), ticket['TicketId'])
+      realticket.handle_ticket_status(ticket, ticket['TicketId'])
+  return run, 'tickets'
+
+class _StubWriter():
+  """DynamoDB client of the lambda that accepts every write"""
+
+  def __init__(self):
+    self.items = 0
+
+  def batch_write_item(self, RequestItems):
+    for requests in RequestItems.values():
+      self.items += len(requests)
+    return {'UnprocessedItems': {}}
+
+def case_lambda_handler(count, config):
+  from local.dynamodb import load_lambda
+  lambda_function = load_lambda()
+  client = _StubWriter()
+  lambda_function.boto3 = types.SimpleNamespace(resource=lambda name: types.SimpleNamespace(meta=types.SimpleNamespace(client=client)))
+  events = []
+  for first in range(0, count, TICKETS_PER_EVENT):
+    tickets = [{'ticketId': f"bench-0000-{index:010d}", 'startTime': _iso(0), 'players': [{'playerId': f"player-{index}"}]}
+               for index in range(first, min(first + TICKETS_PER_EVENT, count))]
+    message = {'time': _iso(30 + first % 3600), 'detail': {'type': 'MatchmakingSucceeded', 'customEventData': f"bench#{SHARDS}", 'tickets': tickets}}
+    events.append({'Records': [{'Sns': {'Message': json.dumps(message)}}]})
+  def run():
+    # The lambda prints every event, to CloudWatch when deployed
+    with contextlib.redirect_stdout(io.StringIO()):
+      for event in events:
+        lambda_function.lambda_handler(event, None)
+  return run, 'tickets'
+
+class _StubReader():
+  """DynamoDB resource whose shards hold count events, pages are built as they are read"""
+
+  def __init__(self, count):
+    self.count = count
+    self.meta = types.SimpleNamespace(client=self)
+    self.tables = types.SimpleNamespace(all=lambda: [types.SimpleNamespace(name='bench')])
+
+  def query(self, ExpressionAttributeValues, ExclusiveStartKey=None, **kwargs):
+    shard = int(ExpressionAttributeValues[':pk'].rsplit('#', 1)[1])
+    indexes = range(shard, self.count, SHARDS)
+    start = ExclusiveStartKey['index'] if ExclusiveStartKey else 0
+    page = indexes[start:start + PAGE_ITEMS]
+    items = [{'ticket_id': f"bench-0001-{index:010d}", 'ticket_event': 'MatchmakingSucceeded' if index % 5 else 'MatchmakingTimedOut',
+              'sk': f"{_iso(index * 3600 / self.count)}#{index}", 'matchevent_time': _iso(index * 3600 / self.count),
+              'ticket_start_time': _iso(0), 'elapsed_time': 30, 'players': '[{"playerId": "p"}]'} for index in page]
+    response = {'Items': items}
+    if start + PAGE_ITEMS < len(indexes):
+      response['LastEvaluatedKey'] = {'index': start + PAGE_ITEMS}
+    return response
+
+def case_lambda_result(count, config):
+  from ticket import real_ticket
+  from ticket.result_cache import ResultCache
+  realticket = _realticket(config)
+  benchmark = dict(config['benchmark'], logs='bench.txt')
+  resource = _StubReader(count)
+  real_ticket.getTempDb = lambda section, key: {'table': 'bench', 'shards': str(SHARDS)}[key]
+  def run():
+    # A fresh cache, so every repeat aggregates all the events
+    path = os.path.join(os.getcwd(), 'resultcache.json')
+    if os.path.exists(path):
+      os.remove(path)
+    cache = ResultCache(path)
+    real_ticket.shared_result_cache = lambda: cache
+    with contextlib.redirect_stdout(io.StringIO()):
+      realticket.lambdaResult(1, resource, 'lambda', benchmark)
+  return run, 'events'
+
+CASES = {
+  'generate_scores': case_generate_scores,
+  'partition_parties': case_partition_parties,
+  'generate_random_string': case_generate_random_string,
+  'Player.mock': case_player_mock,
+  'mockPlayers': case_mock_players,
+  'handle_ticket_status': case_handle_ticket_status,
+  'lambda_handler': case_lambda_handler,
+  'lambdaResult': case_lambda_result,
+}
+
+def _sample(run, loops):
+  # Like timeit, the garbage collector does not run inside the measurement
+  gc.collect()
+  gc.disable()
+  try:
+    start = time.perf_counter()
+    for _ in range(loops):
+      run()
+    return time.perf_counter() - start
+  finally:
+    gc.enable()
+
+def measure(name, scale, config):
+  count = SCALES[scale]
+  random.seed(0)
+  run, unit = CASES[name](count, config)
+  # Small cases are looped until a sample lasts MIN_SAMPLE_SECONDS, timer and cache noise would dominate otherwise
+  loops = 1
+  elapsed = _sample(run, loops)
+  while elapsed < MIN_SAMPLE_SECONDS:
+    loops = max(loops * 2, int(loops * MIN_SAMPLE_SECONDS / max(elapsed, 1e-9)))
+    elapsed = _sample(run, loops)
+  best = elapsed
+  for _ in range(REPEATS[scale] - 1):
+    best = min(best, _sample(run, loops))
+  return {'throughput': count * loops / best, 'unit': f"{unit}/s", 'seconds': best / loops}
+
+def host_key():
+  """Baselines key of this machine"""
+  model = platform.processor() or platform.machine()
+  try:
+    with open('/proc/cpuinfo') as cpuinfo:
+      for line in cpuinfo:
+        if line.startswith('model name'):
+          model = line.split(':', 1)[1].strip()
+          break
+  except OSError:
+    pass
+  return f"{model} x{os.cpu_count()}, Python {platform.python_version()}"
+
+def _document():
+  if not os.path.exists(BASELINES_PATH):
+    return {'version': BASELINES_VERSION, 'hosts': {}}
+  with open(BASELINES_PATH) as baselines:
+    document = json.load(baselines)
+  # Version 1 kept a single set, of an unknown host
+  if document.get('version') != BASELINES_VERSION:
+    return {'version': BASELINES_VERSION, 'threshold': document.get('threshold'), 'hosts': {}}
+  return document
+
+def read_baselines(host):
+  return _document()['hosts'].get(host, {}).get('results', {})
+
+def write_baselines(host, results, threshold):
+  """Replace the baselines of host, the other hosts are kept"""
+  document = _document()
+  document['threshold'] = threshold
+  document['hosts'][host] = {
+    'recorded': datetime.now(timezone.utc).isoformat(),
+    'machine': {'python': platform.python_version(), 'platform': platform.platform(), 'processor': platform.machine()},
+    'results': results,
+  }
+  with open(BASELINES_PATH, 'w') as baselines:
+    json.dump(document, baselines, indent=2)
+
+def compare(results, baselines, threshold):
+  """Report lines and the keys that regressed"""
+  lines = [f"{'case':<32}{'baseline':>14}{'current':>14}{'change':>9}   unit"]
+  regressions = []
+  for key, result in results.items():
+    baseline = baselines.get(key)
+    if baseline is None:
+      lines.append(f"{key:<32}{'-':>14}{result['throughput']:>14,.0f}{'new':>9}   {result['unit']}")
+      continue
+    change = result['throughput'] / baseline['throughput'] - 1
+    status = ''
+    if change < -threshold:
+      regressions.append(key)
+      status = '   REGRESSION'
+    lines.append(f"{key:<32}{baseline['throughput']:>14,.0f}{result['throughput']:>14,.0f}{change * 100:>8.1f}%   {result['unit']}{status}")
+  return lines, regressions
+
+def main():
+  parser = argparse.ArgumentParser(description='Hot path throughput benchmarks')
+  parser.add_argument('--scales', default=','.join(SCALES), help='comma separated, of ' + ', '.join(SCALES))
+  parser.add_argument('--cases', default=','.join(CASES), help='comma separated, of ' + ', '.join(CASES))
+  parser.add_argument('--threshold', type=float, default=None, help='largest accepted drop, 0.3 is 30%%')
+  parser.add_argument('--update', action='store_true', help='store the results as the new baselines of this host')
+  parser.add_argument('--host', default=None, help='baselines key of this machine, CPU model, cores and Python version by default')
+  args = parser.parse_args()
+  if not os.path.exists('Multi-pools/main.py'):
+    print("Run the hot path benchmark from the root of the repository.")
+    return 2
+  host = args.host or host_key()
+  threshold = args.threshold
+  if threshold is None:
+    threshold = _document().get('threshold')
+  threshold = DEFAULT_THRESHOLD if threshold is None else threshold
+
+  config = _config()
+  # Imported from the root, so the modules' own paths (tempdb.ini, result cache) stay in the repository
+  import ticket.real_ticket
+  root = os.getcwd()
+  results = {}
+  # Result files, logs and the result cache of the cases are written to a scratch directory
+  with tempfile.TemporaryDirectory() as scratch:
+    os.chdir(scratch)
+    try:
+      for name in args.cases.split(','):
+        for scale in args.scales.split(','):
+          results[f"{name}/{scale}"] = measure(name, scale, config)
+          print(f"\t{name}/{scale}: {results[f'{name}/{scale}']['throughput']:,.0f} {results[f'{name}/{scale}']['unit']}", file=sys.stderr)
+    finally:
+      os.chdir(root)
+
+  if args.update:
+    merged = dict(read_baselines(host), **results)
+    write_baselines(host, merged, threshold)
+    print(f"Baselines of {len(results)} cases for {host} written to {BASELINES_PATH}")
+    return 0
+  baselines = read_baselines(host)
+  lines, regressions = compare(results, baselines, threshold)
+  print('\n'.join(lines))
+  if not baselines:
+    print(f"\nNo baselines for {host} yet, record them with --update")
+    return 0
+  if regressions:
+    print(f"\n{len(regressions)} case(s) slower than their baseline by more than {threshold * 100:.0f}%: {', '.join(regressions)}")
+    return 1
+  print(f"\nNo case slower than its baseline by more than {threshold * 100:.0f}%")
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,52 @@
+"""
+Startup time benchmark of the CLI.
+
+Runs each command in a fresh interpreter several times and reports the median and best wall
+time, plus the heaviest imports of one run (python -X importtime). Run it from the root of
+the repository, like main.py:
+
+    python Multi-pools/benchmarks/startup.py [runs]
+"""
+
+import os, statistics, subprocess, sys, time
+
+COMMANDS = [
+  ['-help'],
+  ['-print'],
+  ['-sample'],
+]
+DEFAULT_RUNS = 10
+TOP_IMPORTS = 5
+
+def time_command(args, runs):
+  times = []
+  for _ in range(runs):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, 'Multi-pools/main.py'] + args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    times.append(time.perf_counter() - start)
+  return statistics.median(times), min(times)
+
+def heaviest_imports(args):
+  """Top-level imports of one run sorted by cumulative time, in microseconds"""
+  result = subprocess.run([sys.executable, '-X', 'importtime', 'Multi-pools/main.py'] + args,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=False)
+  imports = []
+  for line in result.stderr.splitlines():
+    fields = line.split('|')
+    if len(fields) == 3 and fields[1].strip().isdigit() and not fields[2].startswith('  '):
+      imports.append((int(fields[1]), fields[2].strip()))
+  return sorted(imports, reverse=True)[:TOP_IMPORTS]
+
+def main():
+  if not os.path.exists('Multi-pools/main.py'):
+    print("Run the startup benchmark from the root of the repository.")
+    return
+  runs = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RUNS
+  print(f"{'command':<12}{'median':>10}{'best':>10}   heaviest imports")
+  for args in COMMANDS:
+    median, best = time_command(args, runs)
+    imports = ', '.join(f"{name} {micros / 1000:.0f}ms" for micros, name in heaviest_imports(args))
+    print(f"{' '.join(args):<12}{median * 1000:>8.0f}ms{best * 1000:>8.0f}ms   {imports}")
+
+if __name__ == '__main__':
+  main()
@@ -14,20 +14,38 @@ Functions:
         function that manages GameLift FlexMatch configurations and matchmaking based on the provided event and context.
 """
 
-import json, os, time, random
-import boto3, sys
-
-from ticket import main_ticket
-from ticket.helpers import read_json_file
-from infra import Infra
+import random
+
+from services import Services
+
+# Clients are created on first use and kept across calls, see services.py
+_services = {}
+
+def get_services(region):
+    if region not in _services:
+        _services[region] = Services(region)
+    return _services[region]
+
+def simulation_clients(context, gamelift, notify):
+    """With benchmark.simulation, the offline matchmaker on a virtual clock replaces GameLift"""
+    simulation = context['benchmark'].get('simulation', {})
+    if not simulation.get('enabled'):
+        return gamelift, notify, None
+    from ticket.clock import Simulation
+    from local.gamelift import LocalGameLift
+    clock = Simulation(simulation.get('seed', 0))
+    if notify != 'polling':
+        print("Simulation runs poll the offline matchmaker, notify is set to 'polling'")
+    return LocalGameLift(clock, context['flexmatch'], simulation), 'polling', clock
 
 def cmd_parser(option, value, context):
 
-    gamelift = boto3.client('gamelift', region_name=context['aws']['region'])
-    sns = boto3.client('sns', region_name=context['aws']['region'])
-    iam = boto3.client('iam', region_name=context['aws']['region'])
-    lambda_client = boto3.client('lambda', region_name=context['aws']['region'])
-    dynamodb = boto3.resource('dynamodb', region_name=context['aws']['region'])
+    services = get_services(context['aws']['region'])
+    gamelift = services.gamelift
+    sns = services.sns
+    iam = services.iam
+    lambda_client = services.lambda_client
+    dynamodb = services.dynamodb
 
     notify = context['notify'] # polling | notification
 
@@ -39,15 +57,19 @@ def cmd_parser(option, value, context):
             print("Missing required flexmatch configurations in context")
             raise ValueError("Invalid context structure")
           
+        from infra import Infra
+        from ruleset_analyzer import RulesetAnalyzer
+        analyzer = RulesetAnalyzer(context)
         surfix = random.randint(1,1000)
         for config in context['flexmatch']['configurations']:
           if config['active']:
             print(f"======= Processing flexmatch: {config['name']} =======")
-            _infra = Infra(config, value, gamelift, sns, lambda_client, dynamodb, iam)
-            _infra.matchmaking_configurations(notify, surfix)
+            _infra = Infra(config, value, gamelift, sns, lambda_client, dynamodb, iam, context['benchmark'])
+            _infra.matchmaking_configurations(notify, surfix, analyzer)
         pass
 
     elif option == 'destroy':
+        from infra import Infra
         for config in context['flexmatch']['configurations']:
           if config['active']:
              print(f"======= Processing destroy: {config['name']} =======")
@@ -56,6 +78,7 @@ def cmd_parser(option, value, context):
         pass
 
     elif option == 'sample':
+        from ticket import main_ticket
         for config in context['flexmatch']['configurations']:
            if config['active']:
             main_ticket.loadMatchMaking(config['name'])
@@ -63,19 +86,41 @@ def cmd_parser(option, value, context):
         pass
 
     elif option == 'benchmark':
+        from ticket import main_ticket
+        for config in context['flexmatch']['configurations']:
+           if config['active']:
+            main_ticket.loadMatchMaking(config['name'])
+        gamelift, notify, clock = simulation_clients(context, gamelift, notify)
+        main_ticket.startMatchmaking(value, gamelift, dynamodb, notify, context['sample'], context['benchmark'], clock=clock)
+        pass
+
+    elif option == 'resume':
+        from ticket import main_ticket
         for config in context['flexmatch']['configurations']:
            if config['active']:
             main_ticket.loadMatchMaking(config['name'])
-        main_ticket.startMatchmaking(value, gamelift, dynamodb, notify, context['sample'], context['benchmark'])
+        main_ticket.startMatchmaking(None, gamelift, dynamodb, notify, context['sample'], context['benchmark'], resume=True)
         pass
     
     elif option == 'result':
+        from ticket import main_ticket
         for config in context['flexmatch']['configurations']:
            if config['active']:
             main_ticket.loadMatchMaking(config['name'])
         main_ticket.getMatchmakingResult(value, dynamodb, notify, context['benchmark'])
         pass
 
+    elif option == 'analytics':
+        from ticket import main_ticket
+        for config in context['flexmatch']['configurations']:
+           if config['active']:
+            main_ticket.loadMatchMaking(config['name'])
+        # Simulated benchmarks never reach the result table
+        if context['benchmark'].get('simulation', {}).get('enabled'):
+            notify = 'polling'
+        main_ticket.getMatchQuality(value, dynamodb, notify, context['benchmark'])
+        pass
+
     else:
        print('nothing!!!')
        pass
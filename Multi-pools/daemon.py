@@ -0,0 +1,261 @@
+"""
+This module provides the benchmark daemon and its thin client.
+
+`main.py -daemon` starts a long-lived process that imports the simulator once, keeps the
+parsed config.json, the AWS clients (with their open connections) and the result cache warm,
+and accepts jobs on the Unix socket DAEMON_SOCKET. `main.py -remote <options>` sends the
+options to the daemon as one job. Jobs run one at a time in arrival order, exactly like the
+same options on the command line, and their output is streamed back to the client while they
+run. Closing the client (Ctrl-C) interrupts the running job, which is checkpointed as usual.
+
+Protocol: the client writes one JSON line, {"command": "run", "args": [...]} or
+{"command": "status"} or {"command": "stop"}; the daemon answers with JSON lines
+{"output": text} and a final {"done": true, "status": ...}.
+"""
+
+import copy, json, os, queue, socket, socketserver, sys, threading, time
+from pprint import pprint
+
+DAEMON_SOCKET = f'{os.getcwd()}/Multi-pools/daemon.sock'
+CONFIG_PATH = f'{os.getcwd()}/Multi-pools/Configs/config.json'
+JOB_OPTIONS = ['test', 'flexmatch', 'sample', 'benchmark', 'resume', 'result', 'analytics', 'destroy', 'print']
+
+def parse_option(arg):
+  """Same parsing as main.py: -option or -option=value"""
+  option_arr = arg[1:].split("=", maxsplit=1)
+  return option_arr[0], None if len(option_arr) == 1 else option_arr[1]
+
+class Job():
+
+  def __init__(self, args):
+    self.args = args
+    self.output = queue.Queue()
+    self.cancelled = threading.Event()
+    self.submitTime = time.time()
+
+  def cancel(self):
+    """The client went away: stop the run, it is checkpointed and can be resumed"""
+    if self.cancelled.is_set():
+      return
+    self.cancelled.set()
+    main_ticket = sys.modules.get('ticket.main_ticket')
+    if main_ticket is not None:
+      main_ticket.main_ticket.interrupt()
+
+class _JobOutput():
+  """Installed as sys.stdout, sends what the running job prints to its client"""
+
+  def __init__(self, daemon, stdout):
+    self.daemon = daemon
+    self.stdout = stdout
+
+  def write(self, text):
+    job = self.daemon.current
+    if job is None:
+      return self.stdout.write(text)
+    job.output.put({'output': text})
+    return len(text)
+
+  def flush(self):
+    self.stdout.flush()
+
+  def isatty(self):
+    return False
+
+class _Handler(socketserver.StreamRequestHandler):
+
+  def handle(self):
+    daemon = self.server.benchmarkDaemon
+    try:
+      request = json.loads(self.rfile.readline())
+    except ValueError:
+      return self.send({'done': True, 'status': 'error', 'message': 'invalid request'})
+
+    if request.get('command') == 'status':
+      return self.send(dict(daemon.status(), done=True, status='ok'))
+    if request.get('command') == 'stop':
+      self.send({'done': True, 'status': 'ok', 'message': 'daemon stopping'})
+      return threading.Thread(target=self.server.shutdown).start()
+
+    job = daemon.submit(request.get('args', []))
+    try:
+      while True:
+        try:
+          message = job.output.get(timeout=1)
+        except queue.Empty:
+          if self.closed():
+            raise ConnectionResetError()
+          continue
+        self.send(message)
+        if message.get('done'):
+          break
+    except OSError:
+      job.cancel()
+
+  def closed(self):
+    """True once the client hung up, checked while the job is quiet"""
+    try:
+      return self.connection.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b''
+    except BlockingIOError:
+      return False
+
+  def send(self, message):
+    self.wfile.write((json.dumps(message) + '\n').encode('utf-8'))
+    self.wfile.flush()
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+  daemon_threads = True
+
+class BenchmarkDaemon():
+
+  def __init__(self, path=DAEMON_SOCKET):
+    self.path = path
+    self.jobs = queue.Queue()
+    self.current = None
+    self.completedJobs = 0
+    self.startTime = time.time()
+    self._config = None
+    self._configTime = None
+
+  def config(self):
+    """config.json parsed once, parsed again only when the file changed, copied per job"""
+    from ticket.helpers import read_json_file
+    mtime = os.path.getmtime(CONFIG_PATH) if os.path.exists(CONFIG_PATH) else None
+    if self._config is None or mtime != self._configTime:
+      self._config = read_json_file(CONFIG_PATH)
+      self._configTime = mtime
+    return copy.deepcopy(self._config)
+
+  def warm(self):
+    """Import the simulator and create the clients of the benchmark and result commands"""
+    import cmd_parser
+    from ticket import main_ticket
+    import ticket.PartiQLWrapper
+    from ticket.result_cache import shared_result_cache
+    config = self.config()
+    services = cmd_parser.get_services(config['aws']['region'])
+    services.get('gamelift')
+    services.get('dynamodb', 'resource')
+    shared_result_cache()
+
+  def submit(self, args):
+    job = Job(args)
+    if self.current is not None or not self.jobs.empty():
+      job.output.put({'output': f"Queued behind {self.jobs.qsize() + (self.current is not None)} job(s)\n"})
+    self.jobs.put(job)
+    return job
+
+  def status(self):
+    import cmd_parser
+    return {
+      'pid': os.getpid(),
+      'uptime': round(time.time() - self.startTime),
+      'running': None if self.current is None else self.current.args,
+      'queued': self.jobs.qsize(),
+      'completed': self.completedJobs,
+      'clients': cmd_parser.get_services(self.config()['aws']['region']).created(),
+    }
+
+  def runJob(self, job):
+    from cmd_parser import cmd_parser
+    from ticket import main_ticket
+    config = self.config()
+    # Every job starts from fresh matchmakers, like a new process would
+    main_ticket.realtickets = []
+    for arg in job.args:
+      if job.cancelled.is_set():
+        break
+      if not arg.startswith("-"):
+        print(f"Invalid Argument: {arg}")
+        continue
+      option, value = parse_option(arg)
+      if option == 'print':
+        pprint(config)
+      elif option in JOB_OPTIONS:
+        cmd_parser(option, value, config)
+      else:
+        print(f"Unknown option for the daemon: {arg}")
+
+  def _work(self):
+    while True:
+      job = self.jobs.get()
+      if job.cancelled.is_set():
+        continue
+      self.current = job
+      status, message = 'ok', None
+      try:
+        self.runJob(job)
+      except Exception as e:
+        status, message = 'error', f"{type(e).__name__}: {e}"
+      finally:
+        self.current = None
+        self.completedJobs += 1
+      job.output.put({'done': True, 'status': 'cancelled' if job.cancelled.is_set() else status, 'message': message})
+
+  def serve(self):
+    if os.path.exists(self.path):
+      if request(self.path, {'command': 'status'}, quiet=True) is not None:
+        print(f"A daemon is already listening on {self.path}")
+        return
+      os.remove(self.path)
+    self.warm()
+    stdout = sys.stdout
+    sys.stdout = _JobOutput(self, stdout)
+    server = _Server(self.path, _Handler)
+    server.benchmarkDaemon = self
+    threading.Thread(target=self._work, daemon=True).start()
+    print(f"Benchmark daemon listening on {self.path} (pid {os.getpid()})", file=stdout)
+    try:
+      server.serve_forever()
+    except KeyboardInterrupt:
+      pass
+    finally:
+      server.server_close()
+      sys.stdout = stdout
+      if os.path.exists(self.path):
+        os.remove(self.path)
+      print("Benchmark daemon stopped")
+
+def request(path, message, quiet=False):
+  """Send one request and print the streamed output, returns the final message or None"""
+  client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+  try:
+    client.connect(path)
+  except OSError:
+    if not quiet:
+      print(f"No daemon listening on {path}, start one with: python Multi-pools/main.py -daemon")
+    return None
+  with client:
+    client.sendall((json.dumps(message) + '\n').encode('utf-8'))
+    for line in client.makefile('r', encoding='utf-8'):
+      reply = json.loads(line)
+      if 'output' in reply and not quiet:
+        sys.stdout.write(reply['output'])
+        sys.stdout.flush()
+      if reply.get('done'):
+        return reply
+  return None
+
+def remote(args):
+  """Thin client: run the options as one daemon job, returns the process exit code"""
+  try:
+    reply = request(DAEMON_SOCKET, {'command': 'run', 'args': args})
+  except KeyboardInterrupt:
+    print("\nDisconnected, the daemon interrupts the job")
+    return 130
+  if reply is None:
+    return 1
+  if reply['status'] != 'ok':
+    print(f"Job {reply['status']}{': ' + reply['message'] if reply.get('message') else ''}")
+  return 0 if reply['status'] == 'ok' else 1
+
+def daemon_command(value):
+  """-daemon starts the daemon, -daemon=status and -daemon=stop talk to a running one"""
+  if value in (None, 'start'):
+    BenchmarkDaemon().serve()
+  elif value in ('status', 'stop'):
+    reply = request(DAEMON_SOCKET, {'command': value})
+    if reply is not None:
+      pprint({key: item for key, item in reply.items() if key not in ('done', 'status')})
+  else:
+    print(f"Invalid daemon command: {value}")
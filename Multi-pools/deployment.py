@@ -0,0 +1,59 @@
+"""
+This module provides the deployment cache of -flexmatch.
+
+Every deployed configuration leaves an entry in the [deployment] section of tempdb.ini with
+content hashes of what was deployed and the names and ARNs it was deployed to:
+- ruleset: the ruleset body uploaded to GameLift
+- configuration: the matchmaking configuration parameters and the notify type
+- table: the capacity plan of the result table (lambda notify)
+- lambda: the files of the notification lambda package (names and CRCs, so rebuilding the zip
+  with the same code does not count as a change)
+On the next -flexmatch, Infra compares the hashes and only applies what changed: a new ruleset
+is created only when its body changed, the lambda code is only uploaded when the package
+changed, and the SNS topic and subscriptions are only rebuilt when the configuration changed.
+An unchanged configuration costs one DescribeMatchmakingConfigurations call, which also
+checks that the configuration still points at the cached ruleset and topic; if it does not
+(resources changed outside the simulator), the entry is ignored and everything is deployed
+again. -destroy drops the entries of the configurations it deletes.
+"""
+
+import hashlib, json, zipfile
+from ticket.helpers import TempDbParser, TempDbFilePath, flushTempDb
+
+SECTION = 'deployment'
+
+def content_hash(value):
+  """Short SHA-256 of a JSON value, independent of key order"""
+  body = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+  return hashlib.sha256(body.encode()).hexdigest()[:16]
+
+def package_hash(path):
+  """Hash of the files of a zip package, their timestamps left out"""
+  with zipfile.ZipFile(path) as package:
+    return content_hash(sorted((info.filename, info.CRC, info.file_size) for info in package.infolist()))
+
+def load_deployment(configurationName):
+  """Cached entry of a configuration, {} when it was never deployed"""
+  TempDbParser.read(TempDbFilePath)
+  if not TempDbParser.has_option(SECTION, configurationName):
+    return {}
+  try:
+    return json.loads(TempDbParser.get(SECTION, configurationName))
+  except json.JSONDecodeError:
+    return {}
+
+def save_deployment(configurationName, entry):
+  TempDbParser.read(TempDbFilePath)
+  if not TempDbParser.has_section(SECTION):
+    TempDbParser.add_section(SECTION)
+  TempDbParser.set(SECTION, configurationName, json.dumps(entry))
+  flushTempDb()
+
+def drop_deployment(configurationName):
+  TempDbParser.read(TempDbFilePath)
+  if TempDbParser.has_section(SECTION) and TempDbParser.remove_option(SECTION, configurationName):
+    flushTempDb()
+
+def changed_parts(hashes, cached):
+  """Parts whose hash differs from the cached deployment, every part when nothing is cached"""
+  return [part for part, value in hashes.items() if value is not None and value != cached.get(part)]
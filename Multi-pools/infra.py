@@ -15,6 +15,11 @@ import boto3, sys
 
 from ticket import main_ticket
 from ticket.helpers import read_json_file, getTempDb, wrtieTempDb
+from ticket.result_table import plan_result_table, describe_plan
+from ticket.poller import REQUEST_TIMEOUT
+from deployment import content_hash, package_hash, load_deployment, save_deployment, drop_deployment, changed_parts
+
+LAMBDA_PACKAGE = f"{os.getcwd()}/Multi-pools/lambda/lambda_function.zip"
 
 policy_document = {
     "Version": "2012-10-17",
@@ -40,8 +45,9 @@ append_policy = {
 
 class Infra():
 
-  def __init__(self, config, value, gamelift, sns, lambda_client, dynamodb, iam):
+  def __init__(self, config, value, gamelift, sns, lambda_client, dynamodb, iam, benchmark=None):
     self.config = config
+    self.benchmark = benchmark or {}
     self.value = value
     if not self.value is None and self.value not in ['lambda', 'polling']:
        raise ValueError(f"Invalid value: {self.value}")
@@ -113,6 +119,7 @@ class Infra():
           pass
       except Exception as e:
         print(f"Error deleting function: {e}")
+    drop_deployment(self.config['name'])
     pass
 
   def store_resources(self):
@@ -120,46 +127,67 @@ class Infra():
     wrtieTempDb('resources', 'arns', arns_str)
     pass
 
-  def matchmaking_configurations(self, notify, surffix):
+  def matchmaking_configurations(self, notify, surffix, analyzer=None):
     if not self.value is None:
        notify = str(self.value)
     # Check if configuration already exists
     if not self.config.get('ruleset') or not self.config.get('name'):
         print(f"\tMissing required parameters in config: {self.config}")
 
+    # Catch unmeetable rules and expensive searches before the ruleset is created
+    if analyzer is not None and not analyzer.check(self.config):
+        print(f"\tSkipped {self.config['name']}: ruleset rejected by the analyzer (flexmatch.analyzer.strict)")
+        return
+
     self.surffix = surffix
-    rulesetName = f"{self.config['ruleset']}-{self.surffix}"
-    current_ruleset = ""
-    response = {}
-    configure_arn = ""
+    lambdaNotify = notify == "lambda"
     AcceptanceRequired = True if self.config['acceptance'] > 0 else False
-    _customEventData = f'{self.config["name"]}-ddb-{self.surffix}' if notify == "lambda" else ''
-    print(_customEventData)
     AcceptanceTimeoutSeconds = self.config['acceptance']  if self.config['acceptance'] > 0 else 1
-    try:
-        self.create_matchmaking_rule_set(rulesetName)
- 
-        response = self.gamelift.describe_matchmaking_configurations(Names=[self.config['name']])
-        current_ruleset = response['Configurations'][0]['RuleSetName']
-        configure_arn = response['Configurations'][0]['ConfigurationArn']
-        print(f"\tCurrent ruleset for {self.config['name']}: {current_ruleset}")
-
-        if len(response['Configurations']) > 0:
-            print(f"\tConfiguration {self.config['name']} already exists")
-
-        response = self.gamelift.update_matchmaking_configuration(
-            Name=self.config['name'],
-            FlexMatchMode='STANDALONE',
-            AcceptanceRequired=AcceptanceRequired,
-            AcceptanceTimeoutSeconds=AcceptanceTimeoutSeconds,
-            RuleSetName=rulesetName,
-            CustomEventData=_customEventData
-        )
-        configure_arn = response['Configuration']['ConfigurationArn']
-        print(f"\tUpdated matchmaking configuration: {self.config['name']} with new ruleset: {rulesetName}")
+    rulesetJson = read_json_file(os.getcwd()+f"/Multi-pools/Configs/{self.config['ruleset']}.json")
+    self.tablePlan = plan_result_table(self.benchmark, self.config)
+
+    # Only the parts whose content changed since the last -flexmatch are deployed, see deployment.py
+    hashes = {
+      'ruleset': content_hash(rulesetJson),
+      'configuration': content_hash({
+        'notify': notify,
+        'acceptanceRequired': AcceptanceRequired,
+        'acceptanceTimeoutSeconds': AcceptanceTimeoutSeconds,
+        'requestTimeoutSeconds': REQUEST_TIMEOUT,
+      }),
+      'table': content_hash(self.tablePlan) if lambdaNotify else None,
+      'lambda': package_hash(LAMBDA_PACKAGE) if lambdaNotify else None,
+    }
+    current = self.describe_configuration()
+    cached = previous = load_deployment(self.config['name'])
+    if cached and not self.matches_deployment(current, cached):
+        print(f"\t{self.config['name']} changed outside the simulator since its last deployment, deploying everything")
+        cached = {}
+    changed = changed_parts(hashes, cached)
+    if not changed:
+        print(f"\tUnchanged since the last deployment: ruleset {cached['rulesetName']}" + (f", table {cached['tableName']}" if lambdaNotify else ''))
+        self.arns = cached['arns']
+        self.store_resources()
+        if lambdaNotify:
+          wrtieTempDb('dynamodb', 'table', cached['tableName'])
+          wrtieTempDb('dynamodb', 'shards', str(self.tablePlan['shards']))
+        return
+    print(f"\tChanged since the last deployment: {', '.join(changed)}")
+
+    rulesetName = cached.get('rulesetName')
+    if 'ruleset' in changed:
+        rulesetName = f"{self.config['ruleset']}-{self.surffix}"
+        if not self.create_matchmaking_rule_set(rulesetName, rulesetJson):
+          return
+    # The lambda reads the result table and its shard count from the custom event data
+    self.tableName = None
+    if lambdaNotify:
+        self.tableName = f'{self.config["name"]}-ddb-{self.surffix}' if 'table' in changed else cached['tableName']
+    _customEventData = f'{self.tableName}#{self.tablePlan["shards"]}' if lambdaNotify else ''
+    print(_customEventData)
 
-    except Exception as e:
-        #print(f"Error during monitoring: {e}")
+    configure_arn = ""
+    if current is None:
         print(f"\tConfiguration {self.config['name']} not exists")
         # create matchmaking configurations
         response = self.gamelift.create_matchmaking_configuration(
@@ -167,23 +195,80 @@ class Infra():
           FlexMatchMode='STANDALONE',
           AcceptanceRequired=AcceptanceRequired,
           AcceptanceTimeoutSeconds=AcceptanceTimeoutSeconds,
-          RequestTimeoutSeconds=120,
+          RequestTimeoutSeconds=REQUEST_TIMEOUT,
           RuleSetName=rulesetName,
           CustomEventData=_customEventData,
           Tags = self.tags
         )
         print(f"\tCreated matchmaking configuration: {self.config['name']}")
         configure_arn = response['Configuration']['ConfigurationArn']
-
-    finally:
-        if current_ruleset != "":
-            self.gamelift.delete_matchmaking_rule_set(Name=current_ruleset)
-            print(f"\tDeleted old ruleset: {current_ruleset}")
-        if configure_arn != "" and notify == "lambda":
-            self.sns_create_pipeline(configure_arn)
-        self.arns.append(configure_arn)
-        self.store_resources()
-        pass
+    else:
+        print(f"\tConfiguration {self.config['name']} already exists")
+        print(f"\tCurrent ruleset for {self.config['name']}: {current['RuleSetName']}")
+        configure_arn = current['ConfigurationArn']
+        if {'ruleset', 'configuration', 'table'} & set(changed):
+          response = self.gamelift.update_matchmaking_configuration(
+              Name=self.config['name'],
+              FlexMatchMode='STANDALONE',
+              AcceptanceRequired=AcceptanceRequired,
+              AcceptanceTimeoutSeconds=AcceptanceTimeoutSeconds,
+              RuleSetName=rulesetName,
+              CustomEventData=_customEventData
+          )
+          configure_arn = response['Configuration']['ConfigurationArn']
+          print(f"\tUpdated matchmaking configuration: {self.config['name']} with ruleset: {rulesetName}")
+        if 'ruleset' in changed:
+          self.gamelift.delete_matchmaking_rule_set(Name=current['RuleSetName'])
+          print(f"\tDeleted old ruleset: {current['RuleSetName']}")
+
+    self.topicArn = None
+    if lambdaNotify and ('configuration' in changed or not cached.get('topic')):
+        self.sns_create_pipeline(configure_arn, previous.get('tableName'))
+    elif lambdaNotify:
+        # Same topic and subscription, only the lambda code or the table are replaced
+        self.topicArn = cached['topic']
+        if 'lambda' in changed:
+          self.create_lambda_function(self.topicArn)
+        if 'table' in changed:
+          self.create_result_table(previous['tableName'])
+        else:
+          wrtieTempDb('dynamodb', 'table', self.tableName)
+          wrtieTempDb('dynamodb', 'shards', str(self.tablePlan['shards']))
+    self.arns.append(configure_arn)
+
+    # ARNs of the previous deployment that were not replaced are still in use
+    replaced = []
+    if 'ruleset' in changed and cached.get('rulesetName'):
+        replaced.append(f"matchmakingruleset/{cached['rulesetName']}")
+    if 'table' in changed and cached.get('tableName'):
+        replaced.append(f"table/{cached['tableName']}")
+    kept = [arn for arn in cached.get('arns', []) if not any(arn.endswith(suffix) for suffix in replaced)]
+    self.arns = list(dict.fromkeys(kept + self.arns))
+    self.store_resources()
+    save_deployment(self.config['name'], dict(hashes,
+      rulesetName=rulesetName,
+      tableName=self.tableName,
+      topic=self.topicArn,
+      customEventData=_customEventData,
+      arns=self.arns,
+    ))
+
+  def describe_configuration(self):
+    """The deployed matchmaking configuration, None if it does not exist"""
+    try:
+      configurations = self.gamelift.describe_matchmaking_configurations(Names=[self.config['name']])['Configurations']
+    except Exception as e:
+      print(f"\tError describing configuration {self.config['name']}: {e}")
+      return None
+    return configurations[0] if configurations else None
+
+  def matches_deployment(self, current, cached):
+    """The configuration still uses the cached ruleset, notification target and custom event data"""
+    if current is None or current['RuleSetName'] != cached.get('rulesetName'):
+      return False
+    if current.get('CustomEventData', '') != cached.get('customEventData', ''):
+      return False
+    return not cached.get('topic') or current.get('NotificationTarget') == cached['topic']
   
   def lambda_function_exists(self, function_name):
     try:
@@ -230,7 +315,7 @@ class Infra():
       response = {}
       try:
         print()
-        with open(f"{os.getcwd()}/Multi-pools/lambda/lambda_function.zip", 'rb') as f:
+        with open(LAMBDA_PACKAGE, 'rb') as f:
           lambda_code = f.read()
         if not self.lambda_function_exists(lambda_function_name):
           print(f"\tLambda function {lambda_function_name} not exists ")
@@ -264,10 +349,8 @@ class Infra():
       self.arns.append(lambda_arn)
       return lambda_arn
   
-  def create_matchmaking_rule_set(self, rulesetName):
+  def create_matchmaking_rule_set(self, rulesetName, rulesetJson):
     try:
-        rulesetJson = read_json_file(os.getcwd()+f"/Multi-pools/Configs/{self.config['ruleset']}.json")
-
         response = self.gamelift.create_matchmaking_rule_set(
           Name=rulesetName,
           RuleSetBody=json.dumps(rulesetJson),
@@ -276,6 +359,7 @@ class Infra():
         ruleset_arn = response['RuleSet']['RuleSetArn']
         print(f"\tCreated new ruleset: {rulesetName} arn: {ruleset_arn}")
         self.arns.append(ruleset_arn)
+        return ruleset_arn
     except Exception as e:
         print(f"Error during monitoring: {e}")
         return ""
@@ -320,7 +404,7 @@ class Infra():
         print(f'\tDeleting subscription: {subscription_arn}')
         self.sns.unsubscribe(SubscriptionArn=subscription_arn)
 
-  def sns_create_pipeline(self, configure_arn):
+  def sns_create_pipeline(self, configure_arn, previous_table=None):
     topic_arn = None
     try:
         name = f"{self.config['name']}-sns"
@@ -347,12 +431,11 @@ class Infra():
 
     finally:
         if topic_arn:
+          self.topicArn = topic_arn
           self.arns.append(topic_arn)
           self.sns_update_policy(topic_arn, configure_arn)
 
-          table_name = self.create_dynamodb_table(f'{self.config["name"]}-ddb-{self.surffix}', 'ticket_id', 'ticket_event')
-
-          wrtieTempDb('dynamodb', 'table', table_name)
+          self.create_result_table(previous_table)
 
           self.gamelift.update_matchmaking_configuration(
               Name = self.config['name'],
@@ -361,14 +444,31 @@ class Infra():
           print(f"\n\tUpdated matchmaking configuration: {self.config['name']} with notification: {topic_arn}")
     pass
 
-  def create_dynamodb_table(self, table_name, partition_key, sort_key=None):
-    ddb_talbe = getTempDb('dynamodb', 'table')
+  def create_result_table(self, previous_table=None):
+    """Create the result table of this deployment and point the benchmark at it"""
+    table_name = self.create_dynamodb_table(self.tableName, 'pk', 'sk', previous_table)
+    wrtieTempDb('dynamodb', 'table', table_name)
+    wrtieTempDb('dynamodb', 'shards', str(self.tablePlan['shards']))
+
+  def create_dynamodb_table(self, table_name, partition_key, sort_key=None, previous_table=None):
+    # The table this one replaces, without a deployment cache the last one created if it is ours
+    ddb_talbe = previous_table or getTempDb('dynamodb', 'table')
+    if not ddb_talbe.startswith(f"{self.config['name']}-ddb-"):
+      ddb_talbe = None
 
     existing_tables = self.dynamodb.tables.all()
     existing_table_names = [table.name for table in existing_tables]
     if table_name in existing_table_names:
       print(f"\tTable '{table_name}' already exists.")
-      return
+      return table_name
+    plan = self.tablePlan
+    print(f"\tResult table plan: {describe_plan(plan)}")
+    if self.benchmark.get('resultTable', {}).get('validate', True):
+      from local.dynamodb import validate_ingestion, describe_validation
+      result = validate_ingestion(plan)
+      print(f"\tLocal ingestion check: {describe_validation(result)}")
+      if result['failed']:
+        print(f"\tWarning: {result['failed']} events would be lost at the planned rate, raise benchmark.resultTable headroom or maxShards")
     attribute_definitions = [
       {
         'AttributeName': partition_key,
@@ -390,16 +490,21 @@ class Infra():
         'AttributeName': sort_key,
         'KeyType': 'RANGE'  
       })
+    capacity = {'BillingMode': plan['billingMode']}
+    if plan['billingMode'] == 'PROVISIONED':
+      capacity['ProvisionedThroughput'] = {
+        'ReadCapacityUnits': plan['readUnits'],
+        'WriteCapacityUnits': plan['writeUnits']
+      }
+    elif plan['warmWriteUnits']:
+      capacity['WarmThroughput'] = {'WriteUnitsPerSecond': plan['warmWriteUnits']}
     try:
       table = self.dynamodb.create_table(
         TableName=table_name,
         AttributeDefinitions=attribute_definitions,
         KeySchema=key_schema,
-        ProvisionedThroughput={
-          'ReadCapacityUnits': 5,  
-          'WriteCapacityUnits': 5  
-        },
-        Tags = self.tags
+        Tags = self.tags,
+        **capacity
       )
       table.meta.client.get_waiter('table_exists').wait(TableName=table_name)   
       table_arn = table.table_arn
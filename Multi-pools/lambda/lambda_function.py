@@ -1,10 +1,19 @@
 #!/usr/bin/env python3
 import boto3
 import json
+import random
 import time
+import zlib
+from botocore.exceptions import ClientError
 from datetime import datetime
 from decimal import Decimal
 
+BATCH_SIZE = 25
+MAX_ATTEMPTS = 8
+BASE_BACKOFF = 0.05
+MAX_BACKOFF = 2
+RETRYABLE_ERRORS = ('ProvisionedThroughputExceededException', 'ThrottlingException', 'RequestLimitExceeded', 'InternalServerError')
+
 def calculate_elapsed_time(start_time, end_time):
   # Convert to datetime if they're strings
   if isinstance(start_time, str):
@@ -16,53 +25,66 @@ def calculate_elapsed_time(start_time, end_time):
   # Get elapsed time in different units
   return elapsed.total_seconds()
 
-def put_data_dynamodb(customEventData, ticket_id, matchevent_status, matchevent_time, ticket_start_time, elapsed_time):
-  print(f"{matchevent_status} - {ticket_id} - elapsed_time: {elapsed_time} - table: {customEventData}")
-  dynamodb = boto3.resource('dynamodb')
-  try:
-    ddbtalbe = dynamodb.Table(customEventData)
+def shard_key(ticket_id, shards):
+  """Partition key of a ticket: the ticket id up to its random part, and a shard from a CRC32 of the id"""
+  return f"{ticket_id.rsplit('-', 1)[0]}#{zlib.crc32(ticket_id.encode()) % shards}"
+
+def result_items(tickets, matchevent_time, matchevent_status, shards, match_id=None):
+  """One item per ticket, the sort key keeps every shard ordered on the event time"""
+  items = []
+  for ticket in tickets:
+    ticket_id = ticket['ticketId']
+    ticket_start_time = ticket['startTime']
     item = {
-      'ticket-id': ticket_id,
-      'ticket-event': matchevent_status,
-      'elapsed_time': elapsed_time,
+      'pk': shard_key(ticket_id, shards),
+      'sk': f"{matchevent_time}#{ticket_id}#{matchevent_status}",
+      'ticket_id': ticket_id,
+      'ticket_event': matchevent_status,
       'matchevent_time': matchevent_time,
-      'ticket_start_time': ticket_start_time
+      'ticket_start_time': ticket_start_time,
+      'elapsed_time': calculate_elapsed_time(ticket_start_time, matchevent_time),
+      'players': json.dumps(ticket['players'])
     }
-    ddb_item = json.loads(json.dumps(item), parse_float=Decimal)
-
-    response = ddbtalbe.put_item(Item=ddb_item)
-    if response['ResponseMetadata']['HTTPStatusCode'] == 200:
-      print("Item added successfully!")
-    else:
-      print("Error adding item.")
-  except Exception as e: 
-    print(f"Error: {e}")
-    pass
+    if match_id:
+      # Groups the tickets of one match for the match quality analytics
+      item['match_id'] = match_id
+    items.append(json.loads(json.dumps(item), parse_float=Decimal))
+  return items
 
-def batch_put_item(customEventData, tickets, matchevent_time, matchevent_status):
-  dynamodb = boto3.resource('dynamodb')
-  try:
-    ddbtalbe = dynamodb.Table(customEventData)
-    with ddbtalbe.batch_writer() as batch:
-        for ticket in tickets:
-          ticket_id = ticket['ticketId']
-          ticket_start_time = ticket['startTime']
-          elapsed_time = calculate_elapsed_time(ticket_start_time, matchevent_time)
+def write_items(client, table_name, items, sleep=time.sleep):
+  """
+  BatchWriteItem in batches of 25. Throttled and unprocessed items are retried with an
+  exponential backoff and full jitter; items still unwritten after MAX_ATTEMPTS raise, so the
+  invocation fails and is retried instead of losing the events. Returns the number of retries.
+  """
+  pending = [{'PutRequest': {'Item': item}} for item in items]
+  retries, attempt = 0, 0
+  while pending:
+    batch, pending = pending[:BATCH_SIZE], pending[BATCH_SIZE:]
+    try:
+      response = client.batch_write_item(RequestItems={table_name: batch})
+      unprocessed = response.get('UnprocessedItems', {}).get(table_name, [])
+    except ClientError as e:
+      if e.response['Error']['Code'] not in RETRYABLE_ERRORS:
+        raise
+      unprocessed = batch
+    if not unprocessed:
+      attempt = 0
+      continue
+    attempt += 1
+    retries += 1
+    if attempt >= MAX_ATTEMPTS:
+      raise RuntimeError(f"{len(unprocessed) + len(pending)} items not written to {table_name} after {attempt} attempts")
+    pending = unprocessed + pending
+    sleep(random.uniform(0, min(MAX_BACKOFF, BASE_BACKOFF * 2 ** attempt)))
+  return retries
 
-          item = {
-            'ticket_id': ticket_id,
-            'ticket_event': matchevent_status,
-            'matchevent_time': matchevent_time,
-            'ticket_start_time': ticket_start_time,
-            'elapsed_time': elapsed_time,
-            'players': json.dumps(ticket['players'])
-          }
-          ddb_item = json.loads(json.dumps(item), parse_float=Decimal)
-          batch.put_item(Item=ddb_item)
-          
-  except Exception as e: 
-    print(f"Error: {e}")
-    pass
+def batch_put_item(customEventData, tickets, matchevent_time, matchevent_status, match_id=None):
+  # customEventData is "<table>#<shards>", set by the flexmatch command
+  table_name, _, shards = customEventData.partition('#')
+  items = result_items(tickets, matchevent_time, matchevent_status, int(shards or 1), match_id)
+  retries = write_items(boto3.resource('dynamodb').meta.client, table_name, items)
+  print(f"{len(items)} items written to {table_name}, {retries} retries")
 
 def lambda_handler(event, context):
 
@@ -80,7 +102,7 @@ def lambda_handler(event, context):
     print(matchevent_status, customEventData, matchevent_time)
 
     if matchevent_status in ['MatchmakingSucceeded', 'AcceptMatchCompleted', 'MatchmakingFailed', 'MatchmakingCancelled', 'MatchmakingTimedOut']:
-      batch_put_item(customEventData, sns_message['detail']['tickets'], matchevent_time, matchevent_status)
+      batch_put_item(customEventData, sns_message['detail']['tickets'], matchevent_time, matchevent_status, sns_message['detail'].get('matchId'))
       pass
     else:
 
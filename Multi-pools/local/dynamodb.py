@@ -0,0 +1,142 @@
+"""
+This module provides LocalDynamoDB, an in-memory stand-in for the DynamoDB client calls of the
+notification pipeline, and validate_ingestion, which replays a planned event rate through the
+lambda's own writer and the sharded reader against it.
+
+The stand-in meters write units per second on a virtual clock, the way DynamoDB throttles:
+- a provisioned table takes its write units per second, plus up to BURST_SECONDS of them
+  from its burst capacity (full at the start, not refilled during a validation)
+- an on-demand table takes ON_DEMAND_WRITE_UNITS per second, or its warm throughput
+- one partition key never takes more than PARTITION_WRITE_UNITS per second
+Items over the limits come back as UnprocessedItems. The lambda retries them with its backoff,
+whose sleeps advance the invocation's virtual time, and an invocation that gives up counts its
+events as failed: the events GameLift would have to deliver again.
+
+query understands the key condition and event filter built by ticket.result_table.read_shard.
+"""
+
+import importlib.util, json, math, os, random
+from datetime import datetime, timedelta, timezone
+from ticket.result_table import PARTITION_WRITE_UNITS, ON_DEMAND_WRITE_UNITS
+
+BURST_SECONDS = 300
+VALIDATION_SECONDS = 60
+# Validations replay at most this many events, shorter than VALIDATION_SECONDS at high rates
+VALIDATION_EVENTS = 20000
+# Tickets per notification: one match of two teams of small parties
+TICKETS_PER_EVENT = 4
+PAGE_ITEMS = 1000
+
+def load_lambda():
+  """The notification lambda, as deployed from Multi-pools/lambda"""
+  spec = importlib.util.spec_from_file_location('lambda_function', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'lambda_function.py'))
+  module = importlib.util.module_from_spec(spec)
+  spec.loader.exec_module(module)
+  return module
+
+class LocalDynamoDB():
+
+  def __init__(self, tableName, plan):
+    self.tableName = tableName
+    if plan['billingMode'] == 'PAY_PER_REQUEST':
+      self.tableUnits, self.burst = max(ON_DEMAND_WRITE_UNITS, plan['warmWriteUnits'] or 0), 0
+    else:
+      self.tableUnits, self.burst = plan['writeUnits'], plan['writeUnits'] * BURST_SECONDS
+    self.now = 0.0
+    self.partitions = {}
+    self.consumed = {}
+    self.throttled = 0
+
+  def sleep(self, seconds):
+    self.now += seconds
+
+  def _used(self, key):
+    return self.consumed.get((key, int(self.now)), 0)
+
+  def _consume(self, key, units):
+    self.consumed[(key, int(self.now))] = self._used(key) + units
+
+  def batch_write_item(self, RequestItems):
+    unprocessed = []
+    for request in RequestItems[self.tableName]:
+      item = request['PutRequest']['Item']
+      units = math.ceil(len(json.dumps(item, default=str)) / 1024)
+      inTable = self._used(None) + units <= self.tableUnits
+      if self._used(item['pk']) + units > PARTITION_WRITE_UNITS or not (inTable or self.burst >= units):
+        unprocessed.append(request)
+        self.throttled += 1
+        continue
+      self._consume(item['pk'], units)
+      if inTable:
+        self._consume(None, units)
+      else:
+        self.burst -= units
+      self.partitions.setdefault(item['pk'], {})[item['sk']] = item
+    return {'UnprocessedItems': {self.tableName: unprocessed} if unprocessed else {}}
+
+  def query(self, TableName, KeyConditionExpression, ExpressionAttributeValues, FilterExpression=None,
+            ExpressionAttributeNames=None, ExclusiveStartKey=None):
+    values = ExpressionAttributeValues
+    events = {value for name, value in values.items() if name.startswith(':e')}
+    partition = self.partitions.get(values[':pk'], {})
+    keys = sorted(key for key in partition if key >= values.get(':mark', ''))
+    if ExclusiveStartKey is not None:
+      keys = [key for key in keys if key > ExclusiveStartKey['sk']]
+    page = keys[:PAGE_ITEMS]
+    response = {'Items': [partition[key] for key in page if not events or partition[key]['ticket_event'] in events]}
+    if len(keys) > PAGE_ITEMS:
+      response['LastEvaluatedKey'] = {'pk': values[':pk'], 'sk': page[-1]}
+    return response
+
+  def peak_partition_units(self):
+    return max((units for (key, _), units in self.consumed.items() if key is not None), default=0)
+
+def _tickets(prefix, count, startTime):
+  return [{'ticketId': f"{prefix}-{random.getrandbits(48):012x}", 'startTime': startTime,
+           'players': [{'playerId': f"player-{random.getrandbits(32)}"}]} for _ in range(count)]
+
+def validate_ingestion(plan, group='benchmark-0000', seconds=VALIDATION_SECONDS, seed=0):
+  """
+  Replay seconds of notifications at the planned peak rate (ticket rate x headroom)
+  through the lambda writer into the stand-in, then read them back through the sharded reader.
+  """
+  from ticket.result_table import read_shards
+  lambda_function = load_lambda()
+  random.seed(seed)
+  tableName = 'local-results'
+  table = LocalDynamoDB(tableName, plan)
+  # Notifications of matches arrive as a Poisson process at the peak rate
+  start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+  startTime = start.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+  perSecond = plan['ticketsPerSecond'] * plan['headroom'] * plan['eventsPerTicket'] / TICKETS_PER_EVENT
+  seconds = min(seconds, VALIDATION_EVENTS / TICKETS_PER_EVENT / perSecond)
+  arrival, written, retries, failed = 0.0, 0, 0, 0
+  while True:
+    arrival += random.expovariate(perSecond)
+    if arrival >= seconds:
+      break
+    table.now = arrival
+    eventTime = (start + timedelta(seconds=arrival)).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+    items = lambda_function.result_items(_tickets(group, TICKETS_PER_EVENT, startTime), eventTime, 'MatchmakingSucceeded', plan['shards'])
+    try:
+      retries += lambda_function.write_items(table, tableName, items, sleep=table.sleep)
+      written += len(items)
+    except RuntimeError:
+      failed += len(items)
+  read = sum(1 for _ in read_shards(table, tableName, group, plan['shards'], '', ('MatchmakingSucceeded',)))
+  return {
+    'seconds': seconds,
+    'events': written + failed,
+    'written': written,
+    'failed': failed,
+    'read': read,
+    'retries': retries,
+    'throttledItems': table.throttled,
+    'peakPartitionUnits': table.peak_partition_units(),
+    'eventsPerSecond': (written + failed) / seconds,
+  }
+
+def describe_validation(result):
+  return (f"{result['events']} events in {result['seconds']}s ({result['eventsPerSecond']:.1f}/s), "
+          f"{result['throttledItems']} throttled, {result['retries']} retries, {result['failed']} failed, "
+          f"{result['read']} read back, peak partition {result['peakPartitionUnits']} WCU/s")
@@ -0,0 +1,486 @@
+"""
+This module provides LocalGameLift, an offline stand-in for the GameLift FlexMatch client.
+
+It implements the calls the benchmark makes (start_matchmaking, start_match_backfill,
+describe_matchmaking, accept_match, stop_matchmaking) on top of the virtual clock of a
+Simulation, and matches tickets itself using the rulesets of config.json:
+- Every batchInterval virtual seconds while tickets are searching, a matchmaking pass sorts
+  the pool (batchingPreference sorted, on sortByAttributes) and, for each ticket, tries the
+  largest group of its neighbours that fills the teams and passes the rules.
+- Supported rules: team sizes, count comparisons (equal team sizes), collection intersection
+  and contains, distance between team and match averages, latency, and compound statements
+  over them. Expansions relax maxDistance/maxLatency with the age of the oldest ticket.
+- Matched tickets require acceptance when the configuration has an acceptance timeout, then
+  are placed after placementTime seconds. Searching tickets time out after requestTimeout.
+- Backfill tickets carry the players left in a match with their teams. A pass fills
+  their open slots with the nearest searching tickets, before the new matches when the
+  ruleset's backfillPriority is high and after them otherwise, so backfill competes with new
+  tickets for the same players. Only the new players accept the backfill match.
+- Like the STANDALONE configurations -flexmatch deploys, completed tickets carry their
+  matched players but no game session ARN, and backfill requests are sent without one.
+
+Rulesets are parsed once per configuration and tickets are reduced to the sums and sets the
+rules need when they are submitted; an anchor whose neighbourhood and expansion stages did not
+change since the last pass is not searched again.
+
+Status changes are computed when they happen in virtual time, not when they are polled, so
+results do not depend on the polling cadence. The matcher draws from its own seeded generator.
+"""
+
+import bisect, os, random, re
+from datetime import datetime, timezone
+from ticket.helpers import read_json_file
+from ruleset_analyzer import parse_statement, statement_leaves
+
+DEFAULT_BATCH_INTERVAL = 2
+DEFAULT_REQUEST_TIMEOUT = 120
+DEFAULT_PLACEMENT_TIME = {'min': 1, 'max': 5}
+# Neighbours considered for one match, in tickets per team
+SEARCH_WINDOW = 4
+TERMINAL = ('COMPLETED', 'FAILED', 'CANCELLED', 'TIMED_OUT')
+TEAM_COUNT = re.compile(r'^count\(teams\[(.+)\]\.players\)$')
+ATTRIBUTE = re.compile(r'attributes\[(\w+)\]')
+
+class LocalGameLift():
+
+  def __init__(self, simulation, flexmatch, settings=None):
+    settings = settings or {}
+    self.simulation = simulation
+    self.batchInterval = settings.get('batchInterval', DEFAULT_BATCH_INTERVAL)
+    self.requestTimeout = settings.get('requestTimeout', DEFAULT_REQUEST_TIMEOUT)
+    self.placementTime = settings.get('placementTime', DEFAULT_PLACEMENT_TIME)
+    self.random = random.Random(simulation.seed + 1)
+    self.configurations = {}
+    for config in flexmatch['configurations']:
+      ruleset = read_json_file(os.getcwd()+f"/Multi-pools/Configs/{config['ruleset']}.json")
+      self.configurations[config['name']] = {
+        'ruleset': ruleset,
+        'compiled': self._compile(ruleset),
+        'acceptance': config.get('acceptance', 0),
+        'rejected': {},
+      }
+    self.tickets = {}
+    self.searching = {}
+    self.pending = set()
+    self.matchCount = 0
+    self.calls = 0
+
+  # GameLift API
+
+  def start_matchmaking(self, TicketId, ConfigurationName, Players):
+    self.calls += 1
+    if ConfigurationName not in self.configurations:
+      raise ValueError(f"Matchmaking configuration {ConfigurationName} not found")
+    now = self.simulation.time()
+    ticket = {
+      'TicketId': TicketId,
+      'ConfigurationName': ConfigurationName,
+      'Status': 'SEARCHING',
+      'StartTime': now,
+      'EndTime': None,
+      'Players': Players,
+      'features': self._features(Players),
+      'match': None,
+    }
+    self.tickets[TicketId] = ticket
+    self.searching.setdefault(ConfigurationName, {})[TicketId] = ticket
+    self._schedule_pass(ConfigurationName)
+    return {'MatchmakingTicket': self._describe(ticket, 'QUEUED')}
+
+  def start_match_backfill(self, TicketId, ConfigurationName, Players, GameSessionArn=None):
+    self.calls += 1
+    if ConfigurationName not in self.configurations:
+      raise ValueError(f"Matchmaking configuration {ConfigurationName} not found")
+    teams = {}
+    for player in Players:
+      teams.setdefault(player['Team'], []).append(player)
+    now = self.simulation.time()
+    ticket = {
+      'TicketId': TicketId,
+      'ConfigurationName': ConfigurationName,
+      'Status': 'SEARCHING',
+      'StartTime': now,
+      'EndTime': None,
+      'Players': Players,
+      'features': self._features(Players),
+      'match': None,
+      'backfill': {
+        'teams': {team: (self._features(players), {player['PlayerId']: team for player in players}) for team, players in teams.items()},
+      },
+    }
+    self.tickets[TicketId] = ticket
+    self.searching.setdefault(ConfigurationName, {})[TicketId] = ticket
+    self._schedule_pass(ConfigurationName)
+    return {'MatchmakingTicket': self._describe(ticket, 'QUEUED')}
+
+  def describe_matchmaking(self, TicketIds):
+    self.calls += 1
+    ticketList = []
+    for ticketId in TicketIds:
+      ticket = self.tickets.get(ticketId)
+      if ticket is None:
+        continue
+      self._timeout(ticket, self.simulation.time())
+      ticketList.append(self._describe(ticket))
+      if ticket['Status'] in TERMINAL:
+        # Reported once as terminal, the benchmark stops polling it
+        del self.tickets[ticketId]
+    return {'TicketList': ticketList}
+
+  def accept_match(self, TicketId, PlayerIds, AcceptanceType):
+    self.calls += 1
+    ticket = self.tickets.get(TicketId)
+    if ticket is None or ticket['Status'] != 'REQUIRES_ACCEPTANCE':
+      return {}
+    match = ticket['match']
+    if AcceptanceType == 'REJECT':
+      match['rejected'].add(TicketId)
+    else:
+      match['accepted'].update(PlayerIds)
+    if match['rejected'] or len(match['accepted']) == match['players']:
+      self._resolve_acceptance(match)
+    return {}
+
+  def stop_matchmaking(self, TicketId):
+    self.calls += 1
+    ticket = self.tickets.get(TicketId)
+    if ticket is not None and ticket['Status'] not in TERMINAL + ('PLACING',):
+      if ticket['match'] is not None:
+        ticket['match']['rejected'].add(TicketId)
+        self._resolve_acceptance(ticket['match'], cancelled=TicketId)
+      else:
+        self._finish(ticket, 'CANCELLED', self.simulation.time())
+    return {}
+
+  # Ticket life cycle
+
+  def _describe(self, ticket, status=None):
+    description = {
+      'TicketId': ticket['TicketId'],
+      'ConfigurationName': ticket['ConfigurationName'],
+      'Status': status or ticket['Status'],
+      'StartTime': datetime.fromtimestamp(ticket['StartTime'], timezone.utc),
+      'Players': ticket['Players'],
+    }
+    if ticket['match'] is not None and ticket['Status'] in ('PLACING', 'COMPLETED'):
+      teams = ticket['match']['teams']
+      description['Players'] = [dict(player, Team=teams[player['PlayerId']]) for player in ticket['Players']]
+    if ticket['EndTime'] is not None:
+      description['EndTime'] = datetime.fromtimestamp(ticket['EndTime'], timezone.utc)
+    if ticket['Status'] == 'COMPLETED':
+      match = ticket['match']
+      description['GameSessionConnectionInfo'] = {
+        'MatchedPlayerSessions': [{'PlayerId': playerId} for playerId in match['playerIds']],
+      }
+    return description
+
+  def _finish(self, ticket, status, when):
+    ticket['Status'] = status
+    ticket['EndTime'] = when
+    self.searching.get(ticket['ConfigurationName'], {}).pop(ticket['TicketId'], None)
+
+  def _timeout(self, ticket, now):
+    if ticket['Status'] == 'SEARCHING' and now - ticket['StartTime'] >= self.requestTimeout:
+      self._finish(ticket, 'TIMED_OUT', ticket['StartTime'] + self.requestTimeout)
+
+  def _schedule_pass(self, name):
+    if name not in self.pending:
+      self.pending.add(name)
+      self.simulation.schedule(self.batchInterval, self._pass, name)
+
+  def _resolve_acceptance(self, match, cancelled=None):
+    """All accepted: place the match. Otherwise fail the tickets that did not accept, the others search again"""
+    if match['resolved']:
+      return
+    match['resolved'] = True
+    now = self.simulation.time()
+    if not match['rejected'] and len(match['accepted']) == match['players']:
+      self._place(match, now)
+      return
+    for ticket in match['tickets']:
+      playerIds = {player['PlayerId'] for player in ticket['Players']}
+      ticket['match'] = None
+      if ticket['TicketId'] == cancelled:
+        self._finish(ticket, 'CANCELLED', now)
+      elif ticket.get('backfill') is None and (ticket['TicketId'] in match['rejected'] or not playerIds <= match['accepted']):
+        self._finish(ticket, 'FAILED', now)
+      else:
+        ticket['Status'] = 'SEARCHING'
+        self.searching.setdefault(ticket['ConfigurationName'], {})[ticket['TicketId']] = ticket
+        self._schedule_pass(ticket['ConfigurationName'])
+
+  def _acceptance_timeout(self, match):
+    self._resolve_acceptance(match)
+
+  def _place(self, match, now):
+    for ticket in match['tickets']:
+      ticket['Status'] = 'PLACING'
+    self.simulation.schedule(self.random.uniform(self.placementTime['min'], self.placementTime['max']), self._complete, match)
+
+  def _complete(self, match):
+    now = self.simulation.time()
+    for ticket in match['tickets']:
+      if ticket['Status'] == 'PLACING':
+        ticket['Status'] = 'COMPLETED'
+        ticket['EndTime'] = now
+
+  # Matchmaking
+
+  def _compile(self, ruleset):
+    """Rules, compound statements and expansions of a ruleset, parsed once per configuration"""
+    algorithm = ruleset.get('algorithm', {})
+    rules = {rule['name']: rule for rule in ruleset.get('rules', [])}
+    statements = {name: parse_statement(rule['statement']) for name, rule in rules.items() if rule['type'] == 'compound'}
+    nested = {leaf for tree in statements.values() for leaf in statement_leaves(tree)}
+    compiled = {}
+    for name, rule in rules.items():
+      measurements = rule.get('measurements', [])
+      measurements = ''.join(measurements) if isinstance(measurements, list) else measurements
+      attribute = ATTRIBUTE.search(measurements)
+      compiled[name] = dict(rule, attribute=attribute.group(1) if attribute else None,
+                            left=TEAM_COUNT.match(measurements), right=TEAM_COUNT.match(str(rule.get('referenceValue', ''))))
+    sortAttributes = algorithm.get('sortByAttributes', [])
+    return {
+      'teams': ruleset['teams'],
+      'minPlayers': sum(team.get('minPlayers', 1) for team in ruleset['teams']),
+      'maxPlayers': sum(team['maxPlayers'] for team in ruleset['teams']),
+      'rules': compiled,
+      'statements': statements,
+      'top': [name for name in rules if name not in nested],
+      'sortAttribute': sortAttributes[0] if sortAttributes and algorithm.get('batchingPreference') in ('sorted', 'balanced') else None,
+      'oldest': algorithm.get('expansionAgeSelection', 'oldest') == 'oldest',
+      'backfillPriority': algorithm.get('backfillPriority', 'normal'),
+      'expansions': {expansion['target']: expansion['steps'] for expansion in ruleset.get('expansions', [])},
+      'thresholds': sorted({step['waitTimeSeconds'] for expansion in ruleset.get('expansions', []) for step in expansion['steps']}),
+    }
+
+  def _features(self, Players):
+    """What the rules need of a ticket, aggregated over its players once when it is submitted"""
+    numbers, sets, counts, latency = {}, {}, {}, None
+    attributes = {attribute for player in Players for attribute in player['PlayerAttributes']}
+    for attribute in attributes:
+      values = [player['PlayerAttributes'].get(attribute, {}) for player in Players]
+      numbers[attribute] = sum(value.get('N', 0) for value in values)
+      lists = [set(value.get('SL', [])) for value in values]
+      sets[attribute] = set.intersection(*lists)
+      counts[attribute] = {}
+      for items in lists:
+        for item in items:
+          counts[attribute][item] = counts[attribute].get(item, 0) + 1
+    if any(player.get('LatencyInMs') for player in Players):
+      regions = set.intersection(*[set(player.get('LatencyInMs', {})) for player in Players])
+      latency = {region: max(player['LatencyInMs'][region] for player in Players) for region in regions}
+    return {'size': len(Players), 'numbers': numbers, 'sets': sets, 'counts': counts, 'latency': latency}
+
+  def _pass(self, name):
+    """One matchmaking pass over the searching tickets of a configuration"""
+    self.pending.discard(name)
+    now = self.simulation.time()
+    pool = self.searching.get(name, {})
+    for ticket in list(pool.values()):
+      self._timeout(ticket, now)
+    if not pool:
+      return
+    configuration = self.configurations[name]
+    ruleset = configuration['compiled']
+    candidates = sorted((ticket for ticket in pool.values() if ticket.get('backfill') is None),
+                        key=lambda ticket: (self._sortKey(ruleset, ticket), ticket['StartTime']))
+    backfills = sorted((ticket for ticket in pool.values() if ticket.get('backfill') is not None), key=lambda ticket: ticket['StartTime'])
+    used = set()
+    if ruleset['backfillPriority'] == 'high':
+      self._backfill_pass(name, configuration, backfills, candidates, used, now)
+    self._match_pass(name, configuration, candidates, used, now)
+    if ruleset['backfillPriority'] != 'high':
+      self._backfill_pass(name, configuration, backfills, candidates, used, now)
+    if pool:
+      self._schedule_pass(name)
+
+  def _match_pass(self, name, configuration, candidates, used, now):
+    """New matches from the searching tickets, each ticket anchoring the search over its neighbours"""
+    ruleset = configuration['compiled']
+    window = SEARCH_WINDOW * len(ruleset['teams'])
+    # An anchor whose neighbours and expansion stages are unchanged fails again, it is not re-evaluated
+    rejected = configuration['rejected']
+    configuration['rejected'] = {}
+    for index, anchor in enumerate(candidates):
+      if anchor['TicketId'] in used:
+        continue
+      neighbours = []
+      for ticket in candidates[index:]:
+        if ticket['TicketId'] not in used:
+          neighbours.append(ticket)
+          if len(neighbours) == window:
+            break
+      key = tuple((ticket['TicketId'], bisect.bisect_right(ruleset['thresholds'], now - ticket['StartTime'])) for ticket in neighbours)
+      if rejected.get(anchor['TicketId']) == key:
+        configuration['rejected'][anchor['TicketId']] = key
+        continue
+      teams = self._best_match(ruleset, neighbours, now)
+      if teams is None:
+        configuration['rejected'][anchor['TicketId']] = key
+        continue
+      used.update(ticket['TicketId'] for team in teams for ticket in team)
+      self._matched(name, configuration, ruleset, teams, now)
+
+  def _backfill_pass(self, name, configuration, backfills, candidates, used, now):
+    """Fill the open slots of each backfill ticket with the nearest searching tickets"""
+    ruleset = configuration['compiled']
+    for backfill in backfills:
+      free = [ticket for ticket in candidates if ticket['TicketId'] not in used]
+      if not free:
+        return
+      key = self._sortKey(ruleset, backfill)
+      nearest = sorted(free, key=lambda ticket: (abs(self._sortKey(ruleset, ticket) - key), ticket['StartTime']))
+      teams = self._best_backfill(ruleset, backfill, nearest[:SEARCH_WINDOW * len(ruleset['teams'])], now)
+      if teams is None:
+        continue
+      used.update(ticket['TicketId'] for team in teams for ticket in team)
+      self._matched(name, configuration, ruleset, teams, now, backfill)
+
+  def _best_backfill(self, ruleset, backfill, nearest, now):
+    """Most of the nearest tickets that fit the open slots and pass the rules, as the new tickets of each team"""
+    sessionTeams = backfill['backfill']['teams']
+    # The players already in the game count as one ticket per team, as old as the backfill request
+    current = [[{'features': sessionTeams[team['name']][0], 'StartTime': backfill['StartTime']}] if team['name'] in sessionTeams else []
+               for team in ruleset['teams']]
+    for size in range(len(nearest), 0, -1):
+      teams = self._assign(ruleset, nearest[:size], current)
+      if teams is not None and self._passes(ruleset, [old + new for old, new in zip(current, teams)], now):
+        return teams
+    return None
+
+  def _matched(self, name, configuration, ruleset, teams, now, backfill=None):
+    """Matched tickets wait for acceptance or are placed, a backfill joins the players of its request"""
+    self.matchCount += 1
+    tickets = [ticket for team in teams for ticket in team]
+    playerTeams = {player['PlayerId']: team['name'] for team, group in zip(ruleset['teams'], teams) for ticket in group for player in ticket['Players']}
+    players = len(playerTeams)
+    matchId = f"{name}-{self.matchCount}"
+    if backfill is not None:
+      for _, sessionPlayers in backfill['backfill']['teams'].values():
+        playerTeams.update(sessionPlayers)
+      tickets = [backfill] + tickets
+    match = {'id': matchId, 'tickets': tickets, 'playerIds': list(playerTeams), 'players': players, 'teams': playerTeams,
+             'accepted': set(), 'rejected': set(), 'resolved': False}
+    for ticket in tickets:
+      self.searching[name].pop(ticket['TicketId'], None)
+      ticket['match'] = match
+    if configuration['acceptance'] > 0:
+      for ticket in tickets:
+        if ticket.get('backfill') is None:
+          ticket['Status'] = 'REQUIRES_ACCEPTANCE'
+      self.simulation.schedule(configuration['acceptance'], self._acceptance_timeout, match)
+    else:
+      match['resolved'] = True
+      self._place(match, now)
+
+  def _sortKey(self, ruleset, ticket):
+    if ruleset['sortAttribute'] is None:
+      return 0
+    return ticket['features']['numbers'].get(ruleset['sortAttribute'], 0) / ticket['features']['size']
+
+  def _best_match(self, ruleset, neighbours, now):
+    """Largest prefix of the neighbours that fills the teams and passes the rules, as teams of tickets"""
+    group, players = [], [0]
+    for ticket in neighbours:
+      if players[-1] + ticket['features']['size'] <= ruleset['maxPlayers']:
+        group.append(ticket)
+        players.append(players[-1] + ticket['features']['size'])
+    for size in range(len(group), 0, -1):
+      if players[size] < ruleset['minPlayers']:
+        break
+      teams = self._assign(ruleset, group[:size])
+      if teams is not None and self._passes(ruleset, teams, now):
+        return teams
+    return None
+
+  def _assign(self, ruleset, tickets, current=None):
+    """Parties into teams, largest first into the emptiest team, None if the team sizes are not met"""
+    teams = [[] for _ in ruleset['teams']]
+    sizes = [sum(ticket['features']['size'] for ticket in group) for group in current] if current else [0 for _ in ruleset['teams']]
+    for ticket in sorted(tickets, key=lambda ticket: -ticket['features']['size']):
+      index = min(range(len(teams)), key=lambda i: (sizes[i] / ruleset['teams'][i]['maxPlayers'], i))
+      if sizes[index] + ticket['features']['size'] > ruleset['teams'][index]['maxPlayers']:
+        return None
+      teams[index].append(ticket)
+      sizes[index] += ticket['features']['size']
+    for team, size in zip(ruleset['teams'], sizes):
+      if size < team.get('minPlayers', 1):
+        return None
+    return teams
+
+  def _expanded(self, ruleset, ruleName, field, value, tickets, now):
+    steps = ruleset['expansions'].get(f"rules[{ruleName}].{field}")
+    if not steps:
+      return value
+    ages = [now - ticket['StartTime'] for ticket in tickets]
+    age = max(ages) if ruleset['oldest'] else min(ages)
+    for step in steps:
+      if age >= step['waitTimeSeconds']:
+        value = step['value']
+    return value
+
+  def _passes(self, ruleset, teams, now):
+    """Every rule that is not part of a compound statement passes, compounds evaluated on their own rules"""
+    statements = ruleset['statements']
+    results = {}
+
+    def result(name):
+      if name not in results:
+        results[name] = self._statement(statements[name], result) if name in statements else self._rule(ruleset, ruleset['rules'][name], teams, now)
+      return results[name]
+
+    return all(result(name) for name in ruleset['top'])
+
+  def _statement(self, tree, result):
+    if isinstance(tree, str):
+      return result(tree)
+    operator, operands = tree
+    if operator == 'and':
+      return all(self._statement(operand, result) for operand in operands)
+    if operator == 'or':
+      return any(self._statement(operand, result) for operand in operands)
+    if operator == 'not':
+      return not self._statement(operands[0], result)
+    if operator == 'xor':
+      return sum(self._statement(operand, result) for operand in operands) == 1
+    return True
+
+  def _rule(self, ruleset, rule, teams, now):
+    tickets = [ticket for team in teams for ticket in team]
+    features = [ticket['features'] for ticket in tickets]
+    attribute = rule['attribute']
+    if rule['type'] == 'comparison':
+      if rule['left'] and rule['right'] and rule.get('operation') == '=':
+        teamSizes = {team['name']: sum(ticket['features']['size'] for ticket in group) for team, group in zip(ruleset['teams'], teams)}
+        return teamSizes.get(rule['left'].group(1), 0) == teamSizes.get(rule['right'].group(1), 0)
+      return True
+    if rule['type'] == 'collection':
+      if attribute is None:
+        return True
+      if rule.get('operation') == 'intersection':
+        values = [feature['sets'].get(attribute, set()) for feature in features]
+        return len(set.intersection(*values)) >= rule.get('minCount', 1) if values else False
+      if rule.get('operation') == 'contains':
+        count = sum(feature['counts'].get(attribute, {}).get(rule['referenceValue'], 0) for feature in features)
+        return rule.get('minCount', 0) <= count <= rule.get('maxCount', count)
+      return True
+    if rule['type'] == 'distance':
+      if attribute is None:
+        return True
+      maxDistance = self._expanded(ruleset, rule['name'], 'maxDistance', rule['maxDistance'], tickets, now)
+      total = sum(feature['numbers'].get(attribute, 0) for feature in features)
+      overall = total / sum(feature['size'] for feature in features)
+      for group in teams:
+        players = sum(ticket['features']['size'] for ticket in group)
+        if players and abs(sum(ticket['features']['numbers'].get(attribute, 0) for ticket in group) / players - overall) > maxDistance:
+          return False
+      return True
+    if rule['type'] == 'latency':
+      if all(feature['latency'] is None for feature in features):
+        return True
+      maxLatency = self._expanded(ruleset, rule['name'], 'maxLatency', rule['maxLatency'], tickets, now)
+      latencies = [feature['latency'] or {} for feature in features]
+      regions = set.intersection(*[set(latency) for latency in latencies])
+      return any(all(latency[region] <= maxLatency for latency in latencies) for region in regions)
+    return True
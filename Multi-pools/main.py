@@ -5,7 +5,6 @@ Main entry point for the application.
 Handles command line arguments and executes corresponding actions.
 """
 
-from cmd_parser import cmd_parser
 from ticket.helpers import read_json_file
 from pprint import pprint
 
@@ -21,10 +20,19 @@ def help():
     print("\t-sample: sample json of a player")
     print("\t-destroy: destroy resources")
     print("\t-benchmark: Start a benchmark")
+    print("\t-resume: Resume the last interrupted benchmark from its checkpoint")
     print("\t-result: Get the last benchmark result")
+    print("\t-analytics[=id]: Compare the match quality of the pools in the last (or given) benchmark")
+    print("\t-daemon[=status|stop]: Start the benchmark daemon, or query/stop the running one")
+    print("\t-remote: Send the options that follow to the benchmark daemon as one job")
 
 # Check if arguments are provided
-if len(sys.argv) > 1:
+if len(sys.argv) > 1 and sys.argv[1] == "-remote":
+    # Thin client, the daemon runs the remaining options with its warm clients
+    from daemon import remote
+    sys.exit(remote(sys.argv[2:]))
+elif len(sys.argv) > 1:
+    configJson = None
     # Loop through all arguments
     for arg in sys.argv[1:]:
         # Check if argument starts with "-", indicating it's an option
@@ -36,7 +44,9 @@ if len(sys.argv) > 1:
             option =  None if len(option_arr) == 0 else option_arr[0]
             value = None if len(option_arr) == 1 else option_arr[1]
 
-            configJson = read_json_file(f"{os.getcwd()}/Multi-pools/Configs/config.json")
+            # Parse config.json once for all the options of the command line
+            if configJson is None:
+                configJson = read_json_file(f"{os.getcwd()}/Multi-pools/Configs/config.json")
             if configJson is None:
                 print("No config.json found.")
                 exit -1
@@ -44,9 +54,14 @@ if len(sys.argv) > 1:
             if option == "print":
                 pprint(configJson)
                 pass
-            elif option in ['test', 'flexmatch', 'sample', 'benchmark', 'result', 'destroy']:
+            elif option in ['test', 'flexmatch', 'sample', 'benchmark', 'resume', 'result', 'analytics', 'destroy']:
+                # Imported here so -print and -help never load boto3 and numpy
+                from cmd_parser import cmd_parser
                 cmd_parser(option, value, configJson) 
                 pass
+            elif option == "daemon":
+                from daemon import daemon_command
+                daemon_command(value)
             else:
                 help()
         else:
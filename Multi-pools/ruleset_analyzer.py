@@ -0,0 +1,240 @@
+"""
+This module provides the static cost analysis of FlexMatch rulesets, run by -flexmatch before a
+ruleset is created.
+
+For each active configuration, the ruleset is checked against the party-size mix the
+benchmark submits to it (benchmark.partySizes, or 1..benchmark.teamSize uniformly) and the
+game modes its players carry:
+- Feasibility: the team sizes that parties can fill under minPlayers/maxPlayers and the
+  equal-team-size comparisons, parties that fit no team, and collection rules whose
+  minCount/maxCount or referenceValue can never be met. Compound statements are followed,
+  so an unmeetable branch of an `or` is a warning, and an unmeetable required rule is an error.
+- Cost: an estimate of the candidate matches the strategy examines per batch and of the rule
+  evaluations they need, on a log10 scale. exhaustiveSearch examines every way to pick the
+  tickets of a match from the search window and to split them across teams; a `sorted` or
+  `balanced` batchingPreference narrows the window to the neighbours in sort order. Each
+  expansion step reopens the search, so the cost is multiplied by the number of stages.
+
+The numbers are an order-of-magnitude model of the search, meant to compare rulesets and to
+catch a combinatorial blow-up before a benchmark is paid for, not to predict latency.
+"""
+
+import math, os, re
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_LOG10_COST = 9
+# Search window, in tickets per match, when the batch is sorted and only neighbours are combined
+SORTED_WINDOW = 2
+COUNT_MEASUREMENT = re.compile(r'^count\(teams\[(.+)\]\.players\)$')
+
+def party_sizes(configurationName, benchmark):
+  """Party sizes the benchmark submits to a configuration and their mean, see helpers.party_size_distribution"""
+  from ticket.helpers import party_size_distribution
+  sizes, probabilities = party_size_distribution(benchmark, configurationName)
+  return sizes.tolist(), float(sizes @ probabilities)
+
+def pool_game_modes(configurationName, gameModes):
+  """Game modes the players of a configuration carry, see Player._get_game_modes"""
+  if "All" in configurationName:
+    return list(gameModes)
+  return [mode for mode in gameModes if mode in configurationName]
+
+def parse_statement(statement):
+  """Compound statement as nested (operator, [operands]) tuples, rule names as leaves"""
+  tokens = re.findall(r'[A-Za-z_][\w\-\[\]\.]*|\(|\)|,', statement)
+  position = 0
+
+  def node():
+    nonlocal position
+    name = tokens[position]
+    position += 1
+    if position < len(tokens) and tokens[position] == '(':
+      position += 1
+      operands = [node()]
+      while tokens[position] == ',':
+        position += 1
+        operands.append(node())
+      position += 1
+      return (name.lower(), operands)
+    return name
+
+  return node()
+
+def statement_depth(tree):
+  if isinstance(tree, str):
+    return 0
+  return 1 + max(statement_depth(operand) for operand in tree[1])
+
+def statement_leaves(tree):
+  if isinstance(tree, str):
+    return [tree]
+  return [leaf for operand in tree[1] for leaf in statement_leaves(operand)]
+
+def reachable_sizes(sizes, limit):
+  """Player counts a team can reach by adding whole parties"""
+  reachable = {0}
+  for total in range(1, limit + 1):
+    if any(total - size in reachable for size in sizes):
+      reachable.add(total)
+  return reachable
+
+def _log10_comb(n, k):
+  if k < 0 or k > n:
+    return float('-inf')
+  return (math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)) / math.log(10)
+
+class RulesetAnalyzer():
+
+  def __init__(self, context):
+    analyzer = context['flexmatch'].get('analyzer', {})
+    self.batchSize = analyzer.get('batchSize', DEFAULT_BATCH_SIZE)
+    self.maxLog10Cost = analyzer.get('maxLog10Cost', DEFAULT_MAX_LOG10_COST)
+    self.strict = analyzer.get('strict', False)
+    self.benchmark = context['benchmark']
+    self.gameModes = context['sample']['gameModes']
+
+  def check(self, config, rulesetJson=None):
+    """Analyze and print the report of a configuration, False when strict and it should not be deployed"""
+    from ticket.helpers import read_json_file
+    if rulesetJson is None:
+      rulesetJson = read_json_file(os.getcwd()+f"/Multi-pools/Configs/{config['ruleset']}.json")
+    if rulesetJson is None:
+      return not self.strict
+    report = self.analyze(config['name'], rulesetJson)
+    for line in self.format(report):
+      print(line)
+    return not (self.strict and (report['errors'] or report['log10Cost'] > self.maxLog10Cost))
+
+  def analyze(self, configurationName, ruleset):
+    sizes, meanParty = party_sizes(configurationName, self.benchmark)
+    modes = pool_game_modes(configurationName, self.gameModes)
+    rules = {rule['name']: rule for rule in ruleset.get('rules', [])}
+    teams = ruleset.get('teams', [])
+    report = {
+      'name': configurationName,
+      'ruleset': ruleset.get('name'),
+      'partySizes': sizes,
+      'gameModes': modes,
+      'errors': [],
+      'warnings': [],
+    }
+
+    # Team sizes parties can fill, with the equal-size comparisons applied
+    teamSizes = {}
+    for team in teams:
+      reachable = reachable_sizes(sizes, team['maxPlayers'])
+      teamSizes[team['name']] = {size for size in reachable if team.get('minPlayers', 1) <= size <= team['maxPlayers']}
+      oversized = [size for size in sizes if size > team['maxPlayers']]
+      if oversized:
+        report['warnings'].append(f"parties of {oversized} players never fit team {team['name']} (maxPlayers {team['maxPlayers']})")
+    for rule in rules.values():
+      if rule['type'] == 'comparison' and rule.get('operation') == '=':
+        left = COUNT_MEASUREMENT.match(''.join(rule.get('measurements', [])))
+        right = COUNT_MEASUREMENT.match(str(rule.get('referenceValue', '')))
+        if left and right and left.group(1) in teamSizes and right.group(1) in teamSizes:
+          common = teamSizes[left.group(1)] & teamSizes[right.group(1)]
+          teamSizes[left.group(1)] = teamSizes[right.group(1)] = common
+    for name, feasible in teamSizes.items():
+      if not feasible:
+        report['errors'].append(f"team {name} can never be filled with parties of {sizes} players")
+    minPlayers = sum(min(feasible) for feasible in teamSizes.values() if feasible)
+    maxPlayers = sum(max(feasible) for feasible in teamSizes.values() if feasible)
+    report['matchPlayers'] = (minPlayers, maxPlayers)
+
+    # Rules that can never pass, followed through the compound statements
+    meetable = {name: self._meetable(rule, modes, minPlayers, maxPlayers) for name, rule in rules.items()}
+    nested = set()
+    report['compoundDepth'] = 0
+    for rule in rules.values():
+      if rule['type'] == 'compound':
+        tree = parse_statement(rule['statement'])
+        nested.update(statement_leaves(tree))
+        report['compoundDepth'] = max(report['compoundDepth'], statement_depth(tree))
+        meetable[rule['name']] = self._evaluate(tree, meetable, rule['name'], report)
+    for name, rule in rules.items():
+      if name in nested or meetable[name] is True:
+        continue
+      if rule['type'] != 'compound':
+        report['errors'].append(f"rule {name} can never be met: {meetable[name]}")
+      else:
+        report['errors'].append(f"compound rule {name} can never be met")
+
+    # Candidate space and evaluation cost of one search of a batch
+    ticketsPerMatch = max(1, math.ceil(maxPlayers / meanParty))
+    algorithm = ruleset.get('algorithm', {})
+    strategy = algorithm.get('strategy', 'exhaustiveSearch')
+    window = self.batchSize
+    if algorithm.get('batchingPreference') in ('sorted', 'balanced'):
+      window = min(self.batchSize, SORTED_WINDOW * ticketsPerMatch)
+    if strategy == 'exhaustiveSearch':
+      log10Candidates = _log10_comb(window, ticketsPerMatch) + max(0.0, ticketsPerMatch * math.log10(max(len(teams), 1)) - math.lgamma(len(teams) + 1) / math.log(10))
+    else:
+      log10Candidates = math.log10(window * ticketsPerMatch)
+    evaluations = sum(self._evaluation_cost(rules[leaf] if leaf in rules else {}, maxPlayers)
+                      for name, rule in rules.items() if name not in nested
+                      for leaf in (statement_leaves(parse_statement(rule['statement'])) if rule['type'] == 'compound' else [name]))
+    stages = 1 + len({step['waitTimeSeconds'] for expansion in ruleset.get('expansions', []) for step in expansion.get('steps', [])})
+    report.update({
+      'strategy': strategy,
+      'batchingPreference': algorithm.get('batchingPreference', 'random'),
+      'ticketsPerMatch': ticketsPerMatch,
+      'searchWindow': window,
+      'log10Candidates': log10Candidates,
+      'evaluationsPerCandidate': evaluations,
+      'expansionStages': stages,
+      'log10Cost': log10Candidates + math.log10(max(evaluations, 1) * stages),
+    })
+    if report['log10Cost'] > self.maxLog10Cost:
+      report['warnings'].append(f"estimated evaluation cost 1e{report['log10Cost']:.1f} per batch exceeds 1e{self.maxLog10Cost}")
+    return report
+
+  def _meetable(self, rule, modes, minPlayers, maxPlayers):
+    """True, or the reason the rule can never pass for this pool"""
+    if rule['type'] != 'collection' or rule.get('operation') != 'contains':
+      return True
+    value = rule.get('referenceValue')
+    if value not in modes and rule.get('minCount', 1) > 0:
+      return f"no player of this pool has {value}"
+    if rule.get('minCount', 0) > maxPlayers:
+      return f"minCount {rule['minCount']} above the largest match of {maxPlayers} players"
+    if 'maxCount' in rule and rule['maxCount'] < minPlayers and len(modes) == 1:
+      return f"maxCount {rule['maxCount']} below the smallest match of {minPlayers} players"
+    return True
+
+  def _evaluate(self, tree, meetable, compoundName, report):
+    if isinstance(tree, str):
+      return meetable.get(tree, True) is True
+    operator, operands = tree
+    results = [self._evaluate(operand, meetable, compoundName, report) for operand in operands]
+    if operator == 'or':
+      for operand, result in zip(operands, results):
+        if not result:
+          report['warnings'].append(f"{compoundName}: branch {_statement(operand)} can never be met")
+      return any(results)
+    if operator == 'and':
+      return all(results)
+    # not / xor: meetability cannot be told statically
+    return True
+
+  def _evaluation_cost(self, rule, players):
+    """Rule evaluations of one candidate, aggregates over players count once per player"""
+    if rule.get('type') in ('distance', 'collection', 'latency', 'batchDistance'):
+      return players
+    return 1
+
+  def format(self, report):
+    lines = [f"\tRuleset analysis for {report['name']} ({report['ruleset']}): "
+             f"parties of {report['partySizes'][0]}-{report['partySizes'][-1]} players, modes {', '.join(report['gameModes'])}"]
+    if 'log10Cost' in report:
+      lines.append(f"\t  {report['strategy']}/{report['batchingPreference']}: {report['ticketsPerMatch']} tickets per match "
+                   f"of {report['matchPlayers'][0]}-{report['matchPlayers'][1]} players, window {report['searchWindow']}, "
+                   f"~1e{report['log10Candidates']:.1f} candidates x {report['evaluationsPerCandidate']} evaluations "
+                   f"x {report['expansionStages']} stages = ~1e{report['log10Cost']:.1f}, compound depth {report['compoundDepth']}")
+    lines += [f"\t  ERROR: {error}" for error in report['errors']]
+    lines += [f"\t  WARNING: {warning}" for warning in report['warnings']]
+    return lines
+
+def _statement(tree):
+  if isinstance(tree, str):
+    return tree
+  return f"{tree[0]}({','.join(_statement(operand) for operand in tree[1])})"
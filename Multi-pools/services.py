@@ -0,0 +1,66 @@
+"""
+This module provides the lazy registry of the AWS clients used by the commands.
+
+Services hands out LazyClient proxies instead of boto3 clients and resources. A proxy
+imports boto3 and creates its client the first time one of its attributes is used, so
+local commands (-print, -sample, -help) never pay for them, and each command only creates
+the clients it actually calls. Created clients are kept for the life of the registry.
+"""
+
+import threading
+
+class LazyClient():
+
+  def __init__(self, services, name, kind):
+    self._services = services
+    self._name = name
+    self._kind = kind
+
+  def __getattr__(self, attr):
+    return getattr(self._services.get(self._name, self._kind), attr)
+
+  def __repr__(self):
+    return f"LazyClient({self._kind} {self._name})"
+
+class Services():
+
+  def __init__(self, region):
+    self.region = region
+    self._lock = threading.Lock()
+    self._clients = {}
+
+  def get(self, name, kind='client'):
+    """The boto3 client or resource, created on first use"""
+    client = self._clients.get((name, kind))
+    if client is None:
+      with self._lock:
+        client = self._clients.get((name, kind))
+        if client is None:
+          import boto3
+          factory = boto3.resource if kind == 'resource' else boto3.client
+          client = factory(name, region_name=self.region)
+          self._clients[(name, kind)] = client
+    return client
+
+  def created(self):
+    return [f"{kind} {name}" for name, kind in self._clients]
+
+  @property
+  def gamelift(self):
+    return LazyClient(self, 'gamelift', 'client')
+
+  @property
+  def sns(self):
+    return LazyClient(self, 'sns', 'client')
+
+  @property
+  def iam(self):
+    return LazyClient(self, 'iam', 'client')
+
+  @property
+  def lambda_client(self):
+    return LazyClient(self, 'lambda', 'client')
+
+  @property
+  def dynamodb(self):
+    return LazyClient(self, 'dynamodb', 'resource')
@@ -52,4 +52,32 @@ class PartiQLWrapper:
                 )
             raise
         else:
-            return output
\ No newline at end of file
+            return output
+    def run_partiql_pages(self, statement, params):
+        """
+        Runs a PartiQL statement and follows NextToken, so results larger than one
+        response page (1 MB) are returned in full.
+
+        :param statement: The PartiQL statement.
+        :param params: The list of PartiQL parameters.
+        :return: A generator over the items of every page.
+        """
+        next_token = None
+        while True:
+            kwargs = {"Statement": statement, "Parameters": params}
+            if next_token:
+                kwargs["NextToken"] = next_token
+            try:
+                output = self.dyn_resource.meta.client.execute_statement(**kwargs)
+            except ClientError as err:
+                logger.error(
+                    "Couldn't execute PartiQL '%s'. Here's why: %s: %s",
+                    statement,
+                    err.response["Error"]["Code"],
+                    err.response["Error"]["Message"],
+                )
+                raise
+            yield from output["Items"]
+            next_token = output.get("NextToken")
+            if not next_token:
+                break
@@ -1,3 +1,12 @@
-from .main_ticket import main_ticket
-from .real_ticket import RealTicket
+import importlib
 
+# main_ticket and RealTicket pull in numpy and the whole simulator, so they are only
+# imported when first used; `from ticket.helpers import ...` stays cheap
+_LAZY = {'main_ticket': '.main_ticket', 'RealTicket': '.real_ticket'}
+
+def __getattr__(name):
+  if name not in _LAZY:
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+  value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+  globals()[name] = value
+  return value
@@ -0,0 +1,192 @@
+"""
+This module provides the player abandonment workload of a RealTicket.
+
+With benchmark.abandonment enabled, every submitted party draws a patience from a lognormal
+wait-tolerance distribution (patience.default, or the entry of its party size), and a share
+of the parties gives up: when its patience runs out while its ticket is still queued or
+searching, the party cancels with stop_matchmaking. Parties that already have a match offer
+(REQUIRES_ACCEPTANCE) answer it instead. Cancelled tickets go through handle_ticket_status
+like any other CANCELLED ticket, and besides the cancellation rate and the time to cancel
+the workload splits the time to match of the remaining tickets by whether a party of the
+pool gave up while they were searching.
+
+Deadlines are kept in a heap and served by a thread of their own (created with clock.thread,
+so it also runs on the virtual clock of a simulation): stop_matchmaking calls never hold up
+the monitor loop, and the monitor never delays a cancellation.
+
+Memory stays bounded in soak runs: cancellation times are only kept for as long as a ticket
+still in flight can have been searching, and the elapsed times go to histograms.
+"""
+
+import bisect, heapq, itertools, math, random, threading
+import logging
+from .helpers import to_timestamp
+from .stats import ElapsedTimes, ElapsedHistogram
+from .poller import REQUEST_TIMEOUT
+from .counters import error_name
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARE = 1.0
+DEFAULT_PATIENCE = {'median': 90, 'sigma': 0.5, 'min': 5}
+# Statuses a party can still walk away from
+CANCELLABLE_STATUSES = ('QUEUED', 'SEARCHING')
+# Longest sleep of the scheduler while no deadline is due, so it notices the end of the run
+IDLE_TICK = 1
+# Request timeouts a ticket can be searching and then placed for, after acceptance: older
+# cancellations cannot overlap the search of a ticket that is still to complete
+HORIZON_TIMEOUTS = 2
+
+class AbandonmentLoad():
+
+  def __init__(self, realticket, config, bounded=False):
+    self.realticket = realticket
+    self.share = config.get('share', DEFAULT_SHARE)
+    self.patience = config.get('patience', {'default': DEFAULT_PATIENCE})
+    # (deadline, sequence, ticket id) of the impatient parties, stale once the ticket is gone
+    self.due = []
+    self._sequence = itertools.count()
+    # The submission thread plans deadlines while the scheduler thread takes them
+    self._lock = threading.Lock()
+    # Ticket id -> time stop_matchmaking was called, until the CANCELLED status is seen
+    self.requested = {}
+    # Times of the cancellations, in order, to tell which searches overlapped one
+    self.cancelTimes = []
+    # Soak runs keep constant-size histograms, like their finished tickets
+    elapsed = ElapsedHistogram if bounded else ElapsedTimes
+    self.patienceTimes = elapsed()
+    self.cancelledTimes = elapsed()
+    self.remainingUnderCancels = elapsed()
+    self.remainingWithoutCancels = elapsed()
+
+  def __getstate__(self):
+    state = self.__dict__.copy()
+    del state['realticket']
+    del state['_sequence']
+    del state['_lock']
+    return state
+
+  def __setstate__(self, state):
+    self.__dict__.update(state)
+    self.realticket = None
+    self._sequence = itertools.count(len(self.due))
+    self._lock = threading.Lock()
+
+  def draw(self, partySize):
+    """Seconds a party of partySize waits before giving up"""
+    distribution = dict(DEFAULT_PATIENCE, **self.patience.get(str(partySize), self.patience.get('default', {})))
+    return max(random.lognormvariate(math.log(distribution['median']), distribution['sigma']), distribution['min'])
+
+  def submitted(self, ticketId, partySize, now):
+    """A party was submitted: plan its cancellation if it is one of the impatient ones"""
+    if random.random() >= self.share:
+      return
+    patience = self.draw(partySize)
+    self.patienceTimes.append(patience)
+    with self._lock:
+      heapq.heappush(self.due, (now + patience, next(self._sequence), ticketId))
+
+  def cancelDue(self, now):
+    """Stop the searching tickets whose patience ran out by now"""
+    realticket = self.realticket
+    while True:
+      with self._lock:
+        if not self.due or self.due[0][0] > now:
+          return
+        _, _, ticketId = heapq.heappop(self.due)
+      record = realticket.tickets.get(ticketId)
+      if record is None:
+        continue
+      if record.status not in CANCELLABLE_STATUSES:
+        realticket.counters.add('abandonment.spared')
+        continue
+      try:
+        realticket.gamelift.stop_matchmaking(TicketId=ticketId)
+      except Exception as e:
+        realticket.counters.add(f"errors.StopMatchmaking.{error_name(e)}")
+        logger.error("Error stopping matchmaking for %s: %s", ticketId, e)
+        continue
+      self.requested[ticketId] = now
+      with self._lock:
+        self.cancelTimes.append(now)
+        self._trim(now)
+      realticket.counters.add('abandonment.requested')
+      logger.debug("%s - %s - party gave up after %.1f seconds", realticket.machmakingConfigurationName, ticketId, now - record.submitTime)
+
+  def _trim(self, now):
+    """Forget the cancellations older than the horizon, once they are half of the list"""
+    realticket = self.realticket
+    requestTimeout = realticket.poller.requestTimeout if realticket.poller is not None else REQUEST_TIMEOUT
+    horizon = HORIZON_TIMEOUTS * requestTimeout + realticket.acceptance.get('timeout', 0)
+    expired = bisect.bisect_left(self.cancelTimes, now - horizon)
+    if expired * 2 >= len(self.cancelTimes):
+      del self.cancelTimes[:expired]
+
+  def _pending(self):
+    """Drop the deadlines of finished tickets at the front, returns the next deadline or None"""
+    with self._lock:
+      while self.due and self.due[0][2] not in self.realticket.tickets:
+        heapq.heappop(self.due)
+      return self.due[0][0] if self.due else None
+
+  def run(self):
+    """Scheduler thread: cancel at each deadline until the run is over or interrupted"""
+    realticket = self.realticket
+    try:
+      while not realticket.stopEvent.is_set():
+        now = realticket.clock.time()
+        self.cancelDue(now)
+        deadline = self._pending()
+        if realticket.end_time is not None and (deadline is None or len(realticket.tickets) == 0):
+          return
+        wait = IDLE_TICK if deadline is None else min(deadline - realticket.clock.time(), IDLE_TICK)
+        realticket.clock.sleep(max(wait, 0))
+    except Exception as e:
+      realticket.counters.add(f"errors.Abandonment.{error_name(e)}")
+      logger.exception("Error during abandonment: %s", e)
+
+  def failed(self, ticketId, status, elapsed_time):
+    """A ticket ended without a match, a CANCELLED one counts when this workload stopped it"""
+    if self.requested.pop(ticketId, None) is None or status != 'CANCELLED':
+      return
+    self.cancelledTimes.append(elapsed_time)
+    self.realticket.counters.add('abandonment.cancelled')
+
+  def completed(self, ticket, elapsed_time):
+    """A ticket completed: split its time to match by whether a party gave up during its search"""
+    # Stopped too late, the party got its match anyway
+    self.requested.pop(ticket['TicketId'], None)
+    start, end = to_timestamp(ticket['StartTime']), to_timestamp(ticket['EndTime'])
+    with self._lock:
+      overlapped = bisect.bisect_left(self.cancelTimes, start) < bisect.bisect_right(self.cancelTimes, end)
+    (self.remainingUnderCancels if overlapped else self.remainingWithoutCancels).append(elapsed_time)
+
+  def summary(self):
+    """Numbers for the run summary"""
+    submitted = self.realticket.counters.get('submitted')
+    cancel = self.cancelledTimes.percentiles((50, 99))
+    patience = self.patienceTimes.percentiles((50, 99))
+    under = self.remainingUnderCancels.percentiles((50, 99))
+    without = self.remainingWithoutCancels.percentiles((50, 99))
+    return {
+      'impatient': len(self.patienceTimes),
+      'cancelledTickets': len(self.cancelledTimes),
+      'cancellationRate': len(self.cancelledTimes) / submitted if submitted else 0.0,
+      'patience': {'p50': patience[0], 'p99': patience[1]},
+      'timeToCancel': {'mean': self.cancelledTimes.mean(), 'p50': cancel[0], 'p99': cancel[1]},
+      'remainingUnderCancels': {'count': len(self.remainingUnderCancels), 'p50': under[0], 'p99': under[1]},
+      'remainingWithoutCancels': {'count': len(self.remainingWithoutCancels), 'p50': without[0], 'p99': without[1]},
+    }
+
+  def report(self):
+    """Summary lines of the pool"""
+    summary = self.summary()
+    return [
+      f"Abandonment: {summary['impatient']} impatient parties, {self.realticket.counters.get('abandonment.requested')} gave up, "
+      f"Cancelled: {summary['cancelledTickets']} ({summary['cancellationRate'] * 100:.1f}% of tickets), "
+      f"Time to Cancel p50/p99: {summary['timeToCancel']['p50']:.2f}/{summary['timeToCancel']['p99']:.2f} seconds",
+      f"Remaining Tickets p50/p99 with parties giving up: {summary['remainingUnderCancels']['p50']:.2f}/"
+      f"{summary['remainingUnderCancels']['p99']:.2f} seconds ({summary['remainingUnderCancels']['count']}), "
+      f"without: {summary['remainingWithoutCancels']['p50']:.2f}/{summary['remainingWithoutCancels']['p99']:.2f} "
+      f"seconds ({summary['remainingWithoutCancels']['count']})",
+    ]
@@ -0,0 +1,163 @@
+"""
+This module provides the match backfill workload of a RealTicket.
+
+With benchmark.backfill enabled, a share (rate) of the matches the pool completes loses some
+players (departed) after a delay, and the game asks FlexMatch to fill the open slots with
+start_match_backfill, sending the players who stayed with their teams. The configurations are
+STANDALONE FlexMatch: completed tickets carry no game session ARN, so a match is identified
+by helpers.match_key (its matched players) and backfill requests are sent without one. A
+backfilled match is not backfilled again: the match its backfill ticket completed, which the
+players who joined share, is marked as done. Backfill tickets
+compete with the new tickets of the same pool for searching players, so besides the
+backfill time-to-fill the workload splits the time to match of new tickets by whether
+backfill requests were in flight when they completed.
+
+Everything runs on the monitor thread: completed tickets are reported by handle_ticket_status,
+due backfills are submitted and backfill tickets are handled in the polling loop.
+"""
+
+import heapq, itertools, random
+import logging
+from collections import OrderedDict
+from .helpers import calculate_elapsed_time, generate_random_string, match_key
+from .registry import TERMINAL_STATUSES
+from .stats import ElapsedTimes
+from .counters import error_name
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE = 0.2
+DEFAULT_DEPARTED = {'min': 1, 'max': 2}
+DEFAULT_DELAY = {'min': 10, 'max': 60}
+# Matches remembered for backfill, the oldest are forgotten first
+RECENT_SESSIONS = 4096
+
+class BackfillLoad():
+
+  def __init__(self, realticket, config):
+    self.realticket = realticket
+    self.rate = config.get('rate', DEFAULT_RATE)
+    self.departed = config.get('departed', DEFAULT_DEPARTED)
+    self.delay = config.get('delay', DEFAULT_DELAY)
+    # Players of each match with their teams, from its completed tickets, None once backfilled
+    self.sessions = OrderedDict()
+    self.due = []
+    self._sequence = itertools.count()
+    self.inFlight = {}
+    self.fillTimes = ElapsedTimes()
+    self.failedTimes = ElapsedTimes()
+    self.newUnderLoad = ElapsedTimes()
+    self.newWithoutLoad = ElapsedTimes()
+
+  def __getstate__(self):
+    state = self.__dict__.copy()
+    del state['realticket']
+    del state['_sequence']
+    return state
+
+  def __setstate__(self, state):
+    self.__dict__.update(state)
+    self.realticket = None
+    self._sequence = itertools.count(len(self.due))
+
+  def owns(self, ticketId):
+    return ticketId in self.inFlight
+
+  def completed(self, ticket, elapsed_time):
+    """A new ticket completed: split its time to match, and maybe plan a backfill of its match"""
+    (self.newUnderLoad if self.inFlight else self.newWithoutLoad).append(elapsed_time)
+    matchId = match_key(ticket)
+    if not matchId or not all('Team' in player for player in ticket['Players']):
+      return
+    if matchId in self.sessions:
+      # Another ticket of the match, or a ticket that joined a backfilled match (None)
+      if self.sessions[matchId] is not None:
+        self.sessions[matchId].extend(ticket['Players'])
+      return
+    self.remember(matchId, list(ticket['Players']))
+    if random.random() < self.rate:
+      delay = random.uniform(self.delay['min'], self.delay['max'])
+      heapq.heappush(self.due, (self.realticket.clock.time() + delay, next(self._sequence), matchId))
+
+  def remember(self, matchId, players):
+    self.sessions[matchId] = players
+    self.sessions.move_to_end(matchId)
+    if len(self.sessions) > RECENT_SESSIONS:
+      self.sessions.popitem(last=False)
+
+  def submitDue(self, now):
+    """Start the backfills whose players have left by now, none once the submissions are over"""
+    realticket = self.realticket
+    if realticket.end_time is not None:
+      self.due.clear()
+    while self.due and self.due[0][0] <= now:
+      _, _, matchId = heapq.heappop(self.due)
+      players = self.sessions.get(matchId)
+      if not players or len(players) < 2:
+        continue
+      departed = min(random.randint(self.departed['min'], self.departed['max']), len(players) - 1)
+      staying = random.sample(players, len(players) - departed)
+      ticketId = f'{realticket.ticketPrefix}-{realticket.benchmarkId}-backfill-{generate_random_string(10)}'
+      try:
+        # STANDALONE FlexMatch: the players who stayed with their teams, no game session ARN
+        response = realticket.gamelift.start_match_backfill(
+          TicketId=ticketId,
+          ConfigurationName=realticket.machmakingConfigurationName,
+          Players=staying
+        )
+      except Exception as e:
+        realticket.counters.add(f"errors.StartMatchBackfill.{error_name(e)}")
+        logger.error("Error starting backfill for match %s: %s", matchId, e)
+        continue
+      # The match is backfilled once, the players who joined are not tracked
+      self.sessions[matchId] = None
+      realticket.tickets.add(ticketId, len(staying), [], response['MatchmakingTicket'].get('Status', 'QUEUED'), now, None, realticket.firstPoll(now))
+      self.inFlight[ticketId] = now
+      realticket.counters.add('backfill.submitted')
+      realticket.counters.add('backfill.departedPlayers', departed)
+      logger.debug("%s - backfill %s of match %s with %d players, %d departed", realticket.machmakingConfigurationName, ticketId, matchId, len(staying), departed)
+
+  def handle(self, ticket, ticketId):
+    """Status of a backfill ticket, its time to fill is kept apart from the new tickets"""
+    realticket = self.realticket
+    status = ticket['Status']
+    if status not in TERMINAL_STATUSES:
+      realticket.tickets.transition(ticketId, status, realticket.clock.time())
+      return
+    if realticket.tickets.remove(ticketId, status) is None:
+      return
+    self.inFlight.pop(ticketId, None)
+    refilled = match_key(ticket) if status == 'COMPLETED' else None
+    if refilled:
+      # The refilled match has other players, and so another key: it is not backfilled again
+      self.remember(refilled, None)
+    elapsed_time = calculate_elapsed_time(ticket['StartTime'], ticket['EndTime'])
+    (self.fillTimes if status == 'COMPLETED' else self.failedTimes).append(elapsed_time)
+    realticket.counters.add(f"backfill.{status}")
+    logger.info("%s - %s - backfill %s - %s", ticket['ConfigurationName'], ticketId, status, elapsed_time)
+
+  def summary(self):
+    """Numbers for the run summary"""
+    fill = self.fillTimes.percentiles((50, 99))
+    under = self.newUnderLoad.percentiles((50, 99))
+    without = self.newWithoutLoad.percentiles((50, 99))
+    return {
+      'filled': len(self.fillTimes),
+      'failed': len(self.failedTimes),
+      'timeToFill': {'mean': self.fillTimes.mean(), 'p50': fill[0], 'p99': fill[1]},
+      'newTicketsUnderBackfill': {'count': len(self.newUnderLoad), 'p50': under[0], 'p99': under[1]},
+      'newTicketsWithoutBackfill': {'count': len(self.newWithoutLoad), 'p50': without[0], 'p99': without[1]},
+    }
+
+  def report(self):
+    """Summary lines of the pool"""
+    summary = self.summary()
+    submitted = self.realticket.counters.get('backfill.submitted')
+    return [
+      f"Backfill Requests: {submitted}, Filled: {summary['filled']}, Failed: {summary['failed']}, "
+      f"Time to Fill p50/p99: {summary['timeToFill']['p50']:.2f}/{summary['timeToFill']['p99']:.2f} seconds",
+      f"New Tickets p50/p99 with backfill in flight: {summary['newTicketsUnderBackfill']['p50']:.2f}/"
+      f"{summary['newTicketsUnderBackfill']['p99']:.2f} seconds ({summary['newTicketsUnderBackfill']['count']}), "
+      f"without: {summary['newTicketsWithoutBackfill']['p50']:.2f}/{summary['newTicketsWithoutBackfill']['p99']:.2f} "
+      f"seconds ({summary['newTicketsWithoutBackfill']['count']})",
+    ]
@@ -0,0 +1,73 @@
+"""
+This module provides checkpoint files for interrupted benchmarks.
+
+Each configuration writes two files under Multi-pools/checkpoints:
+- <configuration>.schedule.pkl, once at the start: the mocked players and party sizes of
+  the arrival schedule, so a resumed run submits exactly the parties that were left.
+- <configuration>.state.pkl, every checkpoint.interval seconds and when the run is
+  interrupted: in-flight tickets, position in the schedule, aggregates so far and RNG state.
+
+Files are written to a temporary file and renamed over the previous one, so a crash while
+writing never leaves a truncated checkpoint behind. `main.py -resume` picks them up.
+"""
+
+import os, pickle, threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_DIR = f'{os.getcwd()}/Multi-pools/checkpoints'
+CHECKPOINT_VERSION = 3
+DEFAULT_INTERVAL = 30
+
+def checkpoint_path(configurationName, kind):
+  return f"{CHECKPOINT_DIR}/{configurationName}.{kind}.pkl"
+
+def write_checkpoint(path, state):
+  os.makedirs(os.path.dirname(path), exist_ok=True)
+  tmpPath = f"{path}.tmp"
+  with open(tmpPath, 'wb') as output:
+    pickle.dump(state, output, protocol=pickle.HIGHEST_PROTOCOL)
+    output.flush()
+    os.fsync(output.fileno())
+  os.replace(tmpPath, path)
+
+def read_checkpoint(path):
+  if not os.path.exists(path):
+    return None
+  with open(path, 'rb') as checkpoint:
+    state = pickle.load(checkpoint)
+  if state.get('version') != CHECKPOINT_VERSION:
+    logger.warning("Ignoring checkpoint %s written by another version", path)
+    return None
+  return state
+
+def remove_checkpoints(configurationName):
+  for kind in ('schedule', 'state'):
+    path = checkpoint_path(configurationName, kind)
+    if os.path.exists(path):
+      os.remove(path)
+
+class Checkpointer():
+
+  def __init__(self, realticket, config=None):
+    config = config or {}
+    self.realticket = realticket
+    self.interval = config.get('interval', DEFAULT_INTERVAL)
+    self._stop = threading.Event()
+    self._thread = threading.Thread(target=self._run, daemon=True)
+
+  def start(self):
+    self._thread.start()
+    return self
+
+  def stop(self):
+    self._stop.set()
+    self._thread.join()
+
+  def _run(self):
+    while not self._stop.wait(self.interval):
+      try:
+        self.realticket.checkpoint()
+      except Exception as e:
+        logger.exception("Error writing checkpoint: %s", e)
@@ -0,0 +1,168 @@
+"""
+This module provides the clocks the benchmark runs on.
+
+RealClock is wall-clock time and real threads, what every run uses by default.
+
+Simulation is a discrete-event kernel with a virtual clock, used with benchmark.simulation and
+the offline matchmaker (local/gamelift.py). The existing submission and monitor threads stay
+as they are, but they run one at a time: a thread that sleeps on the simulation is queued at
+its virtual wake-up time, and when no thread is running the kernel jumps the clock straight to
+the earliest queued event, either a sleeping thread or a callback scheduled by the matchmaker.
+Nobody waits in real time, so an hour of traffic takes seconds, and since exactly one thread
+runs at a time and ties are broken by insertion order, a run is reproducible from its seed.
+
+Threads taking part must be created with clock.thread() and must only block through the
+clock: sleep(), wait() and join().
+"""
+
+import heapq, itertools, random, threading, time
+import logging
+from datetime import datetime
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Virtual time starts at a fixed instant so ticket times are identical from run to run
+SIMULATION_EPOCH = 1700000000.0
+
+class RealClock():
+
+  def time(self):
+    return time.time()
+
+  def now(self):
+    return datetime.now()
+
+  def sleep(self, seconds):
+    time.sleep(seconds)
+
+  def schedule(self, delay, callback, *args):
+    """Run callback(*args) after delay seconds, in a timer thread of its own"""
+    timer = threading.Timer(max(delay, 0), callback, args)
+    timer.daemon = True
+    timer.start()
+
+  def wait(self, event, seconds):
+    """Wait up to seconds for event, returns True if it is set"""
+    return event.wait(seconds)
+
+  def thread(self, target, args=()):
+    return threading.Thread(target=target, args=args)
+
+  def join(self, thread):
+    thread.join()
+
+class _SimulationThread(threading.Thread):
+
+  def __init__(self, simulation, target, args):
+    super().__init__(target=target, args=args, daemon=True)
+    self.simulation = simulation
+    self.wake = threading.Event()
+    self.detached = False
+
+  def start(self):
+    # Queued at the current virtual time, it first runs once the starting thread blocks
+    self.simulation._enter(self)
+    super().start()
+
+  def run(self):
+    self.wake.wait()
+    try:
+      super().run()
+    finally:
+      if not self.detached:
+        self.simulation._leave(self)
+
+class Simulation():
+
+  def __init__(self, seed=0, epoch=SIMULATION_EPOCH):
+    self.seed = seed
+    self.epoch = epoch
+    self.elapsed = 0.0
+    self.events = 0
+    self._lock = threading.Lock()
+    self._queue = []
+    self._sequence = itertools.count()
+    self._running = 0
+    self._alive = 0
+    self._started = False
+
+  def seed_random(self):
+    """Seed the global generators the simulator draws from, see also the matchmaker's own generator"""
+    random.seed(self.seed)
+    np.random.seed(self.seed)
+
+  def time(self):
+    return self.epoch + self.elapsed
+
+  def now(self):
+    return datetime.fromtimestamp(self.time())
+
+  def thread(self, target, args=()):
+    return _SimulationThread(self, target, args)
+
+  def start(self):
+    """Let the threads started so far run, in the order they were started"""
+    with self._lock:
+      self._started = True
+    self._dispatch()
+
+  def schedule(self, delay, callback, *args):
+    """Run callback(*args) after delay virtual seconds, in the thread that is blocking at that moment"""
+    with self._lock:
+      heapq.heappush(self._queue, (self.elapsed + max(delay, 0), next(self._sequence), callback, args))
+
+  def sleep(self, seconds):
+    thread = threading.current_thread()
+    if not isinstance(thread, _SimulationThread) or thread.detached:
+      raise RuntimeError("Only simulation threads can sleep on the virtual clock")
+    thread.wake.clear()
+    with self._lock:
+      heapq.heappush(self._queue, (self.elapsed + max(seconds, 0), next(self._sequence), thread, None))
+      self._running -= 1
+    self._dispatch()
+    thread.wake.wait()
+
+  def wait(self, event, seconds):
+    self.sleep(seconds)
+    return event.is_set()
+
+  def join(self, thread):
+    """Leave the simulation, then wait for the thread in real time"""
+    current = threading.current_thread()
+    if isinstance(current, _SimulationThread) and not current.detached:
+      current.detached = True
+      self._leave(current)
+    thread.join()
+
+  def _enter(self, thread):
+    with self._lock:
+      self._alive += 1
+      heapq.heappush(self._queue, (self.elapsed, next(self._sequence), thread, None))
+
+  def _leave(self, thread):
+    with self._lock:
+      self._alive -= 1
+      self._running -= 1
+    self._dispatch()
+
+  def _dispatch(self):
+    """Advance the clock to the next event while nothing runs, until a thread has been woken"""
+    while True:
+      with self._lock:
+        if self._running > 0 or not self._started or not self._queue or self._alive == 0:
+          return
+        when, _, target, args = heapq.heappop(self._queue)
+        self.elapsed = max(self.elapsed, when)
+        self.events += 1
+        self._running += 1
+        if isinstance(target, _SimulationThread):
+          target.wake.set()
+          return
+      try:
+        target(*args)
+      except Exception as e:
+        logger.exception("Error in simulation event %s: %s", getattr(target, '__name__', target), e)
+      finally:
+        with self._lock:
+          self._running -= 1
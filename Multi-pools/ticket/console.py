@@ -0,0 +1,109 @@
+"""
+This module provides the non-blocking logging layer and the console dashboard used during a benchmark.
+
+Ticket threads log through the standard logging module into a queue; a QueueListener thread
+does the actual file and console writes, so per-ticket detail never blocks matchmaking.
+The detail goes to a file next to benchmark.logs, and by default the console shows only a
+refreshing one-line-per-pool dashboard plus warnings and errors.
+
+benchmark.console selects the console output:
+  dashboard (default): refreshing per-pool summary lines
+  verbose: every ticket event, like the original per-ticket prints
+  quiet: warnings and errors only
+"""
+
+import logging, logging.handlers
+import os, queue, sys, threading
+from .stats import LiveHistogram
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(threadName)s %(message)s'
+DASHBOARD_INTERVAL = 1.0
+# Non-tty consoles (CI logs, redirected output) get a plain snapshot this often instead of a redraw
+SNAPSHOT_INTERVAL = 10.0
+
+_listener = None
+
+def setup_logging(benchmark):
+  """Route the 'ticket' loggers through a background writer, returns the detail log path"""
+  global _listener
+  stop_logging()
+  mode = benchmark.get('console', 'dashboard')
+  detailPath = f"{os.getcwd()}/{os.path.splitext(benchmark['logs'])[0]}-detail.log"
+
+  fileHandler = logging.FileHandler(detailPath)
+  fileHandler.setLevel(logging.DEBUG)
+  fileHandler.setFormatter(logging.Formatter(LOG_FORMAT))
+  consoleHandler = logging.StreamHandler(sys.stdout)
+  consoleHandler.setLevel(logging.DEBUG if mode == 'verbose' else logging.WARNING)
+  consoleHandler.setFormatter(logging.Formatter('%(message)s'))
+
+  logQueue = queue.SimpleQueue()
+  _listener = logging.handlers.QueueListener(logQueue, fileHandler, consoleHandler, respect_handler_level=True)
+  _listener.start()
+
+  root = logging.getLogger('ticket')
+  root.handlers = [logging.handlers.QueueHandler(logQueue)]
+  root.setLevel(logging.DEBUG)
+  root.propagate = False
+  return detailPath
+
+def stop_logging():
+  """Drain the log queue and close the files"""
+  global _listener
+  if _listener is not None:
+    _listener.stop()
+    for handler in _listener.handlers:
+      handler.close()
+    _listener = None
+    logging.getLogger('ticket').handlers = []
+
+class Dashboard():
+
+  def __init__(self, realtickets, benchmark):
+    self.realtickets = realtickets
+    self.enabled = benchmark.get('console', 'dashboard') == 'dashboard'
+    self.isatty = sys.stdout.isatty()
+    self._stop = threading.Event()
+    self._thread = threading.Thread(target=self._run, daemon=True)
+    self._lines = 0
+    # Binned as the tickets complete, a redraw does not sort every time to match again
+    self._histograms = {}
+
+  def start(self):
+    if self.enabled:
+      self._thread.start()
+    return self
+
+  def stop(self):
+    if self.enabled and self._thread.is_alive():
+      self._stop.set()
+      self._thread.join()
+      self.render()
+
+  def lines(self):
+    lines = [f"{'pool':<28}{'submitted':>10}{'searching':>10}{'placing':>9}{'completed':>10}{'failed':>8}{'p50':>8}{'p99':>8}"]
+    for realticket in self.realtickets:
+      counts = realticket.tickets.counts()
+      searching = counts.get('QUEUED', 0) + counts.get('SEARCHING', 0)
+      placing = counts.get('REQUIRES_ACCEPTANCE', 0) + counts.get('PLACING', 0)
+      histogram = self._histograms.setdefault(id(realticket), LiveHistogram())
+      p50, p99 = histogram.percentiles(realticket.completeTickets)
+      lines.append(f"{realticket.machmakingConfigurationName:<28}{realticket.submittedTickets:>10}{searching:>10}{placing:>9}"
+                   f"{len(realticket.completeTickets):>10}{len(realticket.failedTickets):>8}{p50:>8.1f}{p99:>8.1f}")
+    return lines
+
+  def render(self):
+    lines = self.lines()
+    if self.isatty:
+      # Move back over the previous frame and redraw it in place
+      prefix = f"\x1b[{self._lines}F" if self._lines else ''
+      sys.stdout.write(prefix + ''.join(f"\x1b[2K{line}\n" for line in lines))
+      self._lines = len(lines)
+    else:
+      sys.stdout.write('\n'.join(lines) + '\n\n')
+    sys.stdout.flush()
+
+  def _run(self):
+    interval = DASHBOARD_INTERVAL if self.isatty else SNAPSHOT_INTERVAL
+    while not self._stop.wait(interval):
+      self.render()
@@ -0,0 +1,147 @@
+"""
+This module provides the event counters of a RealTicket and the run summary built from them.
+
+ShardedCounters gives every thread its own shard (threading.local), so the submission and
+monitor threads count without locks and without racing on a shared integer; the lock is only
+taken once per thread, to register its shard. Shards are summed when a value is read.
+
+run_summary merges the counters and elapsed times of every pool of a run into one JSON
+document, written next to the benchmark log as <logs>-run-<benchmark id>-summary.json, so
+multi-pool runs can be compared by a script.
+"""
+
+import json, threading
+from datetime import datetime, timezone
+
+RUN_SUMMARY_VERSION = 1
+PERCENTILES = (50, 90, 99)
+
+def error_name(error):
+  """Error code of a botocore ClientError, exception class name otherwise"""
+  response = getattr(error, 'response', None)
+  if isinstance(response, dict) and response.get('Error', {}).get('Code'):
+    return response['Error']['Code']
+  return type(error).__name__
+
+class ShardedCounters():
+
+  def __init__(self, values=None):
+    self._local = threading.local()
+    self._lock = threading.Lock()
+    # Values restored from a checkpoint live in a shard of their own
+    self._shards = [dict(values or {})]
+
+  def __getstate__(self):
+    return {'values': self.values()}
+
+  def __setstate__(self, state):
+    self.__init__(state['values'])
+
+  def _shard(self):
+    shard = getattr(self._local, 'shard', None)
+    if shard is None:
+      shard = self._local.shard = {}
+      with self._lock:
+        self._shards.append(shard)
+    return shard
+
+  def add(self, name, amount=1):
+    shard = self._shard()
+    shard[name] = shard.get(name, 0) + amount
+
+  def get(self, name):
+    return sum(shard.get(name, 0) for shard in list(self._shards))
+
+  def values(self):
+    """All counters, merged over the shards"""
+    merged = {}
+    for shard in list(self._shards):
+      for name, value in dict(shard).items():
+        merged[name] = merged.get(name, 0) + value
+    return merged
+
+def _grouped(values, prefix):
+  return {name[len(prefix):]: value for name, value in sorted(values.items()) if name.startswith(prefix)}
+
+def _elapsed(elapsed):
+  percentiles = elapsed.percentiles(PERCENTILES)
+  summary = {'count': len(elapsed), 'mean': elapsed.mean()}
+  summary.update({f"p{q}": value for q, value in zip(PERCENTILES, percentiles)})
+  return summary
+
+def pool_summary(realticket):
+  """Counters, throughput and time to match of one pool"""
+  values = realticket.counters.values()
+  start, finish = realticket.start_time, realticket.finish_time or realticket.end_time
+  duration = (finish - start).total_seconds() if start and finish else 0
+  rate = lambda count: count / duration if duration > 0 else 0.0
+  completed, failed = len(realticket.completeTickets), len(realticket.failedTickets)
+  calls = values.get('polls.calls', 0)
+  return {
+    'benchmarkId': realticket.benchmarkId,
+    'players': realticket.totalPlayers,
+    'submitted': values.get('submitted', 0),
+    'completed': completed,
+    'failed': failed,
+    'matches': values.get('matches', 0),
+    'matchedPlayers': values.get('matchedPlayers', 0),
+    'successRate': completed / (completed + failed) if completed + failed else 0.0,
+    'duration': duration,
+    'throughput': {
+      'ticketsPerSecond': rate(values.get('submitted', 0)),
+      'matchesPerSecond': rate(values.get('matches', 0)),
+      'playersPerSecond': rate(values.get('matchedPlayers', 0)),
+    },
+    'timeToMatch': _elapsed(realticket.completeTickets),
+    'timeToFail': _elapsed(realticket.failedTickets),
+    'statuses': _grouped(values, 'status.'),
+    'acceptance': _grouped(values, 'acceptance.'),
+    'errors': _grouped(values, 'errors.'),
+    'polling': {
+      'calls': calls,
+      'callsPerSecond': rate(calls),
+      'ticketsPerCall': values.get('polls.tickets', 0) / calls if calls else 0.0,
+      'deferred': values.get('polls.deferred', 0),
+      'statusLag': _elapsed(realticket.pollLag),
+    },
+    'interrupted': realticket.stopEvent.is_set(),
+    'digest': realticket.digest.hexdigest() if realticket.digest is not None else None,
+    'backfill': dict(_grouped(values, 'backfill.'), **realticket.backfill.summary()) if realticket.backfill is not None else None,
+    'abandonment': dict(_grouped(values, 'abandonment.'), **realticket.abandonment.summary()) if realticket.abandonment is not None else None,
+    'memory': realticket.memory.pool(realticket.machmakingConfigurationName) if realticket.memory is not None else None,
+  }
+
+def run_summary(realtickets, startTime, endTime, simulation=None, memory=None):
+  """One document for every pool of the run, with the totals across pools, times are read on the run's clock"""
+  pools = {realticket.machmakingConfigurationName: pool_summary(realticket) for realticket in realtickets}
+  totals = {}
+  for pool in pools.values():
+    for key in ('players', 'submitted', 'completed', 'failed', 'matches', 'matchedPlayers'):
+      totals[key] = totals.get(key, 0) + pool[key]
+    totals['describeCalls'] = totals.get('describeCalls', 0) + pool['polling']['calls']
+    for group in ('statuses', 'acceptance', 'errors'):
+      merged = totals.setdefault(group, {})
+      for name, value in pool[group].items():
+        merged[name] = merged.get(name, 0) + value
+  duration = endTime - startTime
+  finished = totals.get('completed', 0) + totals.get('failed', 0)
+  totals.update({
+    'successRate': totals.get('completed', 0) / finished if finished else 0.0,
+    'matchesPerSecond': totals.get('matches', 0) / duration if duration > 0 else 0.0,
+    'playersPerSecond': totals.get('matchedPlayers', 0) / duration if duration > 0 else 0.0,
+  })
+  return {
+    'version': RUN_SUMMARY_VERSION,
+    'startTime': datetime.fromtimestamp(startTime, timezone.utc).isoformat(),
+    'endTime': datetime.fromtimestamp(endTime, timezone.utc).isoformat(),
+    'duration': duration,
+    'simulation': None if simulation is None else {'seed': simulation.seed, 'events': simulation.events},
+    'totals': totals,
+    'memory': memory,
+    'pools': pools,
+  }
+
+def write_run_summary(path, summary):
+  with open(path, 'w') as output:
+    json.dump(summary, output, indent=2)
+  return path
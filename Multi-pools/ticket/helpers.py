@@ -1,8 +1,6 @@
-import json, os, random, time
+import json, os, random, sys, time
 import string
 import uuid
-import boto3
-import numpy as np
 import configparser
 from datetime import datetime
 
@@ -22,28 +20,161 @@ def flushTempDb():
    with open(TempDbFilePath, 'w') as configfile:
     TempDbParser.write(configfile)
 
-def generate_scores(num_players, median=1000, std_dev=400):
-    scores = np.random.normal(loc=median, scale=std_dev, size=num_players)
-    scores = [max(1, int(score)) for score in scores]
-    return scores
+def generate_latency_matrix(num_players, regions):
+    """
+    Players x regions latency matrix generated in one vectorized step.
+    Each player gets a home region drawn by weight, home and remote latencies follow the
+    region's distributions, and the noise is correlated across regions so a player with
+    a bad connection is slow everywhere. Returns (region names, int32 matrix, home indexes).
+    """
+    import numpy as np
+    locations = regions['locations']
+    names = [location['name'] for location in locations]
+    weights = np.array([location.get('weight', 1) for location in locations], dtype=np.float64)
+    home = np.random.choice(len(locations), size=num_players, p=weights / weights.sum())
+
+    noise = np.random.standard_normal((num_players, len(locations))) @ latency_correlation(regions).T
+
+    homeMedian = np.array([location['home']['median'] for location in locations], dtype=np.float64)
+    homeStdDev = np.array([location['home']['std_dev'] for location in locations], dtype=np.float64)
+    remoteMedian = np.array([location['remote']['median'] for location in locations], dtype=np.float64)
+    remoteStdDev = np.array([location['remote']['std_dev'] for location in locations], dtype=np.float64)
+    isHome = home[:, None] == np.arange(len(locations))
+    latency = np.where(isHome, homeMedian + homeStdDev * noise, remoteMedian + remoteStdDev * noise)
+    return names, np.maximum(latency, 1).astype(np.int32), home
+
+def latency_correlation(regions):
+    """
+    Factor of the correlation matrix of the latency noise, every pair of regions shares
+    regions.correlation. It has to lie in [-1/(n-1), 1] for n regions; at the edges the matrix
+    is only semidefinite and is factored from its eigendecomposition instead of Cholesky.
+    """
+    import numpy as np
+    count = len(regions['locations'])
+    value = float(regions.get('correlation', 0.0))
+    lowest = -1 / (count - 1) if count > 1 else -1.0
+    if not lowest <= value <= 1:
+        raise ValueError(f"sample.regions.correlation must be between {lowest:.3g} and 1 for {count} regions, got {value}")
+    correlation = np.full((count, count), value)
+    np.fill_diagonal(correlation, 1.0)
+    try:
+        return np.linalg.cholesky(correlation)
+    except np.linalg.LinAlgError:
+        values, vectors = np.linalg.eigh(correlation)
+        return vectors * np.sqrt(np.clip(values, 0, None))
+
+def validate_benchmark(sample, benchmark):
+    """Raise ValueError on settings the pools would only trip over once they are running"""
+    if sample.get('regions'):
+        latency_correlation(sample['regions'])
+    # Soak runs are population runs, they keep the population settings of their players
+    modes = [mode for mode in ('population', 'soak') if (benchmark.get(mode) or {}).get('enabled')]
+    if modes:
+        ccu = (benchmark.get('population') or {}).get('ccu')
+        if not isinstance(ccu, int) or ccu <= 0:
+            raise ValueError(f"benchmark.{modes[-1]} is enabled but benchmark.population.ccu (number of concurrent players) "
+                             f"is not a positive number: {ccu}")
+
+def encode_latencies(players, names, rows):
+    """Fill LatencyInMs of each player from its row of the latency matrix"""
+    for player, row in zip(players, rows.tolist()):
+        player['LatencyInMs'] = dict(zip(names, row))
 
 def generate_random_string(length):
     characters = string.ascii_letters + string.digits
     random_string = ''.join(random.choice(characters) for _ in range(length))
     return random_string
 
-def split_array(arr, team_size):
-    # print(f"split_array: {team_size}")
-    if len(arr) <= 4:
-        return [arr]
-    result = []
-    i = 0
-    while i < len(arr):
-        sub_len = random.randint(1, team_size)
-        sub_len = min(sub_len, len(arr) - i)
-        result.append(arr[i:i+sub_len])
-        i += sub_len
-    return result
+def party_size_distribution(benchmark, name):
+    """
+    Party sizes and their probabilities for a configuration or game mode name.
+    benchmark.partySizes maps a game mode (or "default") to relative weights per size; without
+    it sizes are uniform from 1 to teamSize, small for Survival.
+    """
+    import numpy as np
+    partySizes = benchmark.get('partySizes')
+    if partySizes:
+        mode = next((mode for mode in partySizes if mode != 'default' and mode in name), 'default')
+        weights = {int(size): weight for size, weight in partySizes[mode].items() if weight > 0}
+    else:
+        limit = benchmark['teamSize']['small'] if "Survival" in name else benchmark['teamSize']['default']
+        weights = {size: 1 for size in range(1, limit + 1)}
+    sizes = np.array(sorted(weights), dtype=np.int64)
+    probabilities = np.array([weights[size] for size in sizes], dtype=np.float64)
+    return sizes, probabilities / probabilities.sum()
+
+def partition_parties(count, sizes, probabilities):
+    """
+    Partition a batch of count players into parties, as (offsets, lengths) arrays over the batch.
+    Sizes are drawn from the distribution in one vectorized step and the last party is cut to
+    fit, the players themselves are never copied.
+    """
+    import numpy as np
+    if count <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    mean = float(np.dot(sizes, probabilities))
+    draws, total = [], 0
+    while total < count:
+        draw = np.random.choice(sizes, size=int((count - total) / mean * 1.05) + 16, p=probabilities)
+        draws.append(draw)
+        total += int(draw.sum())
+    lengths = np.concatenate(draws)
+    ends = np.cumsum(lengths)
+    parties = int(np.searchsorted(ends, count)) + 1
+    lengths = lengths[:parties]
+    offsets = ends[:parties] - lengths
+    lengths[-1] = count - offsets[-1]
+    return offsets, lengths
+
+def generate_scores(num_players, median=1000, std_dev=400, lengths=None, correlation=0.0):
+    """
+    Normally distributed scores, at least 1. With party lengths, members of a party share part
+    of their deviation so their scores are correlated by correlation.
+    """
+    import numpy as np
+    noise = np.random.standard_normal(num_players)
+    if lengths is not None and correlation > 0:
+        shared = np.repeat(np.random.standard_normal(len(lengths)), lengths)
+        noise = np.sqrt(correlation) * shared + np.sqrt(1 - correlation) * noise
+    return np.maximum(median + std_dev * noise, 1).astype(np.int64).tolist()
+
+def result_file_path(logs, configurationName, benchmarkId, suffix=''):
+  """Base path (without extension) of the per-ticket result files next to the benchmark log"""
+  stem = os.path.splitext(logs)[0]
+  return f"{os.getcwd()}/{stem}-{configurationName}-{benchmarkId}{suffix}"
+
+def match_key(ticket):
+  """
+  Identity of the match of a completed ticket, the same for every ticket of the match: a short
+  hash of the game session ARN, or of the matched player ids when there is none (standalone
+  FlexMatch). None when the ticket carries neither.
+  """
+  import hashlib
+  connection = ticket.get('GameSessionConnectionInfo') or {}
+  key = connection.get('GameSessionArn') or ','.join(sorted(
+    session['PlayerId'] for session in connection.get('MatchedPlayerSessions', [])))
+  return hashlib.blake2b(key.encode(), digest_size=8).hexdigest() if key else None
+
+def to_timestamp(value):
+  """Epoch seconds of a datetime or ISO 8601 string"""
+  if isinstance(value, str):
+    value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+  return value.timestamp()
+
+def current_rss_bytes():
+  """Current resident set size of this process"""
+  try:
+    with open('/proc/self/statm') as statm:
+      return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+  except (OSError, ValueError):
+    # No procfs (macOS): fall back to the peak resident size
+    return peak_rss_bytes()
+
+def peak_rss_bytes():
+  """Largest resident set size of this process so far"""
+  import resource
+  rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  return rss if sys.platform == 'darwin' else rss * 1024
 
 def format_elapsed_time(seconds):
   hours = seconds // 3600
@@ -65,11 +196,6 @@ def calculate_elapsed_time(start_time, end_time):
   # Get elapsed time in different units
   return elapsed.total_seconds()
 
-def generate_scores(num_players, median=1000, std_dev=400):
-    scores = np.random.normal(loc=median, scale=std_dev, size=num_players)
-    scores = [max(1, int(score)) for score in scores]
-    return scores
-
 def read_json_file(file_path):
   try:
     if not os.path.exists(file_path):
@@ -1,13 +1,29 @@
-import json, os, random
+import json, os, queue, random, time
 import threading
-import boto3
 from .real_ticket import RealTicket
+from .console import setup_logging, stop_logging, Dashboard
+from .router import PartyRouter, topology_summary
+from .clock import RealClock, Simulation
+from .counters import run_summary, write_run_summary
+from .poller import CallBudget, DEFAULT_CALLS_PER_SECOND
+from .memory import MemoryProfiler
+from .helpers import result_file_path, incremental_read, validate_benchmark
+from .match_quality import describe_quality
 
 class MainTicket():
   def __init__(self):
     self.realtickets = []
+    # PartyRouter of the running benchmark, stopped with the pools when the run is interrupted
+    self.router = None
     pass
 
+  def interrupt(self):
+    """Stop the shared party stream and every pool, the runs are checkpointed so they can be resumed"""
+    if self.router is not None:
+      self.router.stop()
+    for realticket in self.realtickets:
+      realticket.interrupt()
+
   def call(self):
     RealTicket().call()
 
@@ -25,19 +41,111 @@ class MainTicket():
     for realticket in self.realtickets:
       realticket.doSampling(sampleNum, sample)
 
-  def startMatchmaking(self, value, gamelift, dynamodb, nofity, sample, benchmark):
+  def startMatchmaking(self, value, gamelift, dynamodb, nofity, sample, benchmark, resume=False, clock=None):
+    try:
+      validate_benchmark(sample, benchmark)
+    except ValueError as e:
+      print(f"Invalid benchmark configuration: {e}")
+      return
     threads = []
+    clock = clock or RealClock()
+    if isinstance(clock, Simulation):
+      # Same seed, same players, parties and matches
+      clock.seed_random()
+      for realticket in self.realtickets:
+        realticket.clock = clock
+    # One DescribeMatchmaking budget for every pool, the GameLift request rate is per account
+    budget = CallBudget(clock, benchmark.get('polling', {}).get('callsPerSecond', DEFAULT_CALLS_PER_SECOND))
+    for realticket in self.realtickets:
+      realticket.pollBudget = budget
+    # Tracing starts before the pools allocate their players
+    memory = None
+    if benchmark.get('memory', {}).get('enabled'):
+      memory = MemoryProfiler(benchmark['memory']).start()
+      for realticket in self.realtickets:
+        realticket.memory = memory
+    detailPath = setup_logging(benchmark)
+    print(f"Per-ticket details are written to {detailPath}")
+    dashboard = Dashboard(self.realtickets, benchmark).start()
 
+    # One shared party stream for every pool, so the per-mode and all-in-one topologies see the same demand
+    router = None
+    if benchmark.get('router', {}).get('enabled') and not resume and not isinstance(clock, Simulation):
+      totalPlayers = int(value) if value is not None else benchmark['totalPlayers']
+      router = self.router = PartyRouter(self.realtickets, sample, benchmark, totalPlayers)
+      for realticket in router.pools:
+        realticket.inbox = queue.Queue()
+
+    runStart = clock.time()
     for realticket in self.realtickets:
-      thread = threading.Thread(
-        target=realticket.doMatchmaking, 
-        args=(value, gamelift, dynamodb, nofity, sample, benchmark,))
+      thread = clock.thread(
+        realticket.doMatchmaking, 
+        (value, gamelift, dynamodb, nofity, sample, benchmark, resume,))
       threads.append(thread)
       thread.start()
 
-    # Wait for all threads to complete
-    for thread in threads:
-      thread.join()
+    routerThread = None
+    if router is not None:
+      routerThread = threading.Thread(target=router.run)
+      routerThread.start()
+    start_time = time.time()
+    cpu_time = time.process_time()
+    if isinstance(clock, Simulation):
+      clock.start()
+
+    # Wait for all threads to complete, Ctrl-C checkpoints the runs so they can be resumed
+    try:
+      for thread in threads:
+        thread.join()
+    except KeyboardInterrupt:
+      print("\nInterrupted, checkpointing in-flight tickets...")
+      self.interrupt()
+      for thread in threads:
+        thread.join()
+    if routerThread is not None:
+      routerThread.join()
+    self.router = None
+    dashboard.stop()
+    stop_logging()
+
+    for realticket in self.realtickets:
+      print('\n'.join(realticket.summary))
+    self.writeRunSummary(benchmark, runStart, clock, memory)
+    if router is not None:
+      print('\n'.join(topology_summary(router, time.time() - start_time)))
+    if isinstance(clock, Simulation):
+      wall_time = time.time() - start_time
+      print(f"\nSimulated {clock.elapsed:.0f} seconds ({clock.events} events, seed {clock.seed}) in "
+            f"{wall_time:.2f} seconds wall time, {time.process_time() - cpu_time:.2f} seconds CPU, "
+            f"{clock.elapsed / max(wall_time, 1e-9):.0f}x real time")
+
+  def writeRunSummary(self, benchmark, runStart, clock, memory=None):
+    """Merge the counters of every pool into one JSON summary of the run"""
+    if not self.realtickets:
+      return
+    memorySummary = memory.stop() if memory is not None else None
+    summary = run_summary(self.realtickets, runStart, clock.time(), clock if isinstance(clock, Simulation) else None, memorySummary)
+    benchmarkId = min(realticket.benchmarkId for realticket in self.realtickets)
+    path = write_run_summary(result_file_path(benchmark['logs'], 'run', benchmarkId, '-summary') + '.json', summary)
+    print(f"\nRun summary of {len(self.realtickets)} pool(s) written to {path}")
+
+  def getMatchQuality(self, value, dynamodb, notify, benchmark):
+    """Compare the match quality of the pools in one benchmark, the last one by default"""
+    _, benchmarkId = incremental_read() if value is None else (None, str(value).zfill(4))
+    print(f"Match quality of benchmark {benchmarkId}")
+    summaries = {}
+    for realticket in self.realtickets:
+      summary = realticket.matchQuality(benchmarkId, dynamodb, notify, benchmark)
+      if summary is not None:
+        summaries[realticket.machmakingConfigurationName] = summary
+    if not summaries:
+      return
+    print("\np50 / p90 per match, time to match in seconds")
+    print('\n'.join(describe_quality(summaries)))
+    path = result_file_path(benchmark['logs'], 'run', benchmarkId, '-quality') + '.json'
+    with open(path, 'w') as output:
+      json.dump({'benchmarkId': benchmarkId, 'pools': summaries}, output, indent=2)
+    print(f"\nMatch quality of {len(summaries)} pool(s) written to {path}")
 
   def getMatchmakingResult(self, value, dynamodb, notify, benchmark):
     for realticket in self.realtickets:
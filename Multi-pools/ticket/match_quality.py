@@ -0,0 +1,163 @@
+"""
+This module provides the match quality analytics of -analytics.
+
+A benchmark records two columnar streams per pool (see result_writer.py): the attributes of
+every submitted player (-players.npy) and the match and team of every player of a completed
+ticket (-matches.npy). With lambda notifications, the matches are read from the players JSON
+the lambda stores with every MatchmakingSucceeded event instead. Matched players are joined
+to their attributes on ticket and player id with a sort and a binary search, the rows are
+grouped by match, and every measure is computed with bincount and reduceat over the groups,
+without a Python loop over the rows:
+- skillDifference: highest minus lowest team mean skill
+- skillSpread, latencySpread: highest minus lowest player skill and best-region latency
+- soloShare: share of the players who queued alone; partySizeGap: largest minus smallest party
+- modeOverlap: game modes every player of the match asked for, over the modes any of them did
+- timeToMatch: mean wait of the players of the match
+The per-match measures are saved as <logs>-<configuration>-<benchmark id>-quality.npy, and
+their distributions per pool are compared in <logs>-run-<benchmark id>-quality.json.
+"""
+
+import hashlib, json
+import numpy as np
+from .result_writer import MATCH_DTYPE
+
+PERCENTILES = (10, 50, 90, 99)
+QUALITY_DTYPE = np.dtype([
+  ('match_id', 'S16'),
+  ('players', 'u2'),
+  ('parties', 'u2'),
+  ('teams', 'u1'),
+  ('time_to_match', 'f4'),
+  ('skill_difference', 'f4'),
+  ('skill_spread', 'f4'),
+  ('latency_spread', 'f4'),
+  ('solo_share', 'f4'),
+  ('party_size_gap', 'u1'),
+  ('mode_overlap', 'f4'),
+])
+MEASURES = {
+  'timeToMatch': 'time_to_match',
+  'skillDifference': 'skill_difference',
+  'skillSpread': 'skill_spread',
+  'latencySpread': 'latency_spread',
+  'soloShare': 'solo_share',
+  'partySizeGap': 'party_size_gap',
+  'modeOverlap': 'mode_overlap',
+}
+# Set bits of every game mode bitmask
+POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.float32)
+
+def match_rows(items):
+  """MATCH_DTYPE rows of the MatchmakingSucceeded items of the result table"""
+  rows = []
+  for item in items:
+    # Items stored before the lambda kept the match id are grouped on their event time
+    matchId = hashlib.blake2b(str(item.get('match_id') or item['matchevent_time']).encode(), digest_size=8).hexdigest()
+    elapsed = float(item['elapsed_time'])
+    rows.extend((matchId, item['ticket_id'], player['playerId'], player.get('team', ''), elapsed)
+                for player in json.loads(item['players']))
+  return np.array(rows, dtype=MATCH_DTYPE)
+
+def join_players(matches, players):
+  """Matched rows that have a player row, and the player rows in the same order"""
+  if len(matches) == 0 or len(players) == 0:
+    return matches[:0], players[:0]
+  keys = np.char.add(np.char.add(players['ticket_id'], b'/'), players['player_id'])
+  order = np.argsort(keys, kind='stable')
+  sortedKeys = keys[order]
+  wanted = np.char.add(np.char.add(matches['ticket_id'], b'/'), matches['player_id'])
+  index = np.minimum(np.searchsorted(sortedKeys, wanted), len(sortedKeys) - 1)
+  found = sortedKeys[index] == wanted
+  return matches[found], players[order[index[found]]]
+
+def match_quality(matches, players):
+  """QUALITY_DTYPE row per match of the joined rows"""
+  if len(matches) == 0:
+    return np.zeros(0, dtype=QUALITY_DTYPE)
+  matchIds, match = np.unique(matches['match_id'], return_inverse=True)
+  _, team = np.unique(matches['team'], return_inverse=True)
+  _, ticket = np.unique(matches['ticket_id'], return_inverse=True)
+  count, teamCount = len(matchIds), int(team.max()) + 1
+  skill = players['skill'].astype(np.float64)
+  latency = players['latency'].astype(np.float64)
+  partySize = players['party_size']
+  quality = np.zeros(count, dtype=QUALITY_DTYPE)
+  quality['match_id'] = matchIds
+  size = np.bincount(match, minlength=count)
+  quality['players'] = size
+  quality['parties'] = np.bincount(np.unique(match * (int(ticket.max()) + 1) + ticket) // (int(ticket.max()) + 1), minlength=count)
+  quality['time_to_match'] = np.bincount(match, weights=matches['elapsed_time'], minlength=count) / size
+  quality['solo_share'] = np.bincount(match, weights=partySize == 1, minlength=count) / size
+
+  # Mean skill of every team of every match, as a matches x teams grid
+  cell = match * teamCount + team
+  members = np.bincount(cell, minlength=count * teamCount).reshape(count, teamCount)
+  total = np.bincount(cell, weights=skill, minlength=count * teamCount).reshape(count, teamCount)
+  present = members > 0
+  with np.errstate(invalid='ignore', divide='ignore'):
+    mean = total / members
+  quality['teams'] = present.sum(axis=1)
+  difference = np.where(present, mean, -np.inf).max(axis=1) - np.where(present, mean, np.inf).min(axis=1)
+  quality['skill_difference'] = np.where(quality['teams'] > 1, difference, np.nan)
+
+  # Contiguous groups of rows per match for the reductions
+  order = np.argsort(match, kind='stable')
+  starts = np.flatnonzero(np.r_[True, np.diff(match[order]) != 0])
+  quality['skill_spread'] = np.fmax.reduceat(skill[order], starts) - np.fmin.reduceat(skill[order], starts)
+  quality['latency_spread'] = np.fmax.reduceat(latency[order], starts) - np.fmin.reduceat(latency[order], starts)
+  quality['party_size_gap'] = np.maximum.reduceat(partySize[order], starts) - np.minimum.reduceat(partySize[order], starts)
+  modes = players['game_modes'][order]
+  common = POPCOUNT[np.bitwise_and.reduceat(modes, starts)]
+  union = POPCOUNT[np.bitwise_or.reduceat(modes, starts)]
+  with np.errstate(invalid='ignore', divide='ignore'):
+    quality['mode_overlap'] = np.where(union > 0, common / union, np.nan)
+  return quality
+
+def distribution(values):
+  values = np.asarray(values, dtype=np.float64)
+  values = values[~np.isnan(values)]
+  if len(values) == 0:
+    return {'count': 0}
+  summary = {'count': int(len(values)), 'mean': float(values.mean())}
+  summary.update({f"p{q}": float(value) for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES))})
+  return summary
+
+def average_ranks(values):
+  """Ranks of values, tied values share the mean of their ranks"""
+  _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+  ends = np.cumsum(counts)
+  return ((ends - counts + ends - 1) / 2)[inverse]
+
+def rank_correlation(first, second):
+  """Spearman correlation of two measures over the matches that have both, None with fewer than 3"""
+  first, second = np.asarray(first, dtype=np.float64), np.asarray(second, dtype=np.float64)
+  both = ~(np.isnan(first) | np.isnan(second))
+  if both.sum() < 3:
+    return None
+  ranks = [average_ranks(values[both]) for values in (first, second)]
+  if ranks[0].std() == 0 or ranks[1].std() == 0:
+    return None
+  return float(np.corrcoef(ranks[0], ranks[1])[0, 1])
+
+def quality_summary(quality):
+  """Distributions of the measures of one pool, and how waiting longer relates to fairer teams"""
+  summary = {'matches': int(len(quality)), 'players': int(quality['players'].sum())}
+  summary.update({measure: distribution(quality[field]) for measure, field in MEASURES.items()})
+  summary['waitVsSkillDifference'] = rank_correlation(quality['time_to_match'], quality['skill_difference'])
+  return summary
+
+def describe_quality(summaries):
+  """Comparison table of the pools, p50 / p90 of each measure"""
+  def cell(measure, scale=1, digits=0):
+    if measure.get('count', 0) == 0:
+      return 'n/a'
+    return f"{measure['p50'] * scale:.{digits}f} / {measure['p90'] * scale:.{digits}f}"
+  width = max([len(name) for name in summaries] + [4])
+  lines = [f"{'pool':<{width}} {'matches':>8} {'time to match':>15} {'skill diff':>13} {'skill spread':>13} "
+           f"{'latency spread':>15} {'solo %':>11} {'mode overlap %':>15}"]
+  for name, summary in summaries.items():
+    lines.append(f"{name:<{width}} {summary['matches']:>8} {cell(summary['timeToMatch'], digits=1):>15} "
+                 f"{cell(summary['skillDifference']):>13} {cell(summary['skillSpread']):>13} "
+                 f"{cell(summary['latencySpread']):>15} {cell(summary['soloShare'], 100):>11} "
+                 f"{cell(summary['modeOverlap'], 100):>15}")
+  return lines
@@ -0,0 +1,140 @@
+"""
+This module provides the opt-in memory accounting of a benchmark run (benchmark.memory).
+
+tracemalloc is started before the pools generate their players, and every pool takes a
+snapshot at the boundaries of its run:
+- start: before anything of the pool is allocated
+- parties: after the players are partitioned into parties
+- players: after the players are generated (or restored from the schedule of a resumed run)
+- submission: halfway through the submission of a burst or population run
+- monitoring: when the submission is over and every ticket is in flight
+- summary: when the pool is done
+Each phase records the traced and resident memory of the process, the memory held by the
+ticket registries and the allocation sites that grew the most since the previous snapshot.
+Bytes per player are the traced growth of the players phase, from the phase before it, over
+the pool's players. Bytes per in-flight ticket are the registry memory over the tickets in flight, at the
+phase with the most of them. tracemalloc traces the whole process, so the figures of a pool also
+hold the allocations of pools running alongside it: size a host from a run with a single active
+pool.
+
+Snapshots are taken under a lock and only the last one is kept to diff the next one against.
+A snapshot of a multi-million player run takes seconds, and tracing slows allocations down a
+few times, so the phases are only accounted when benchmark.memory.enabled is set.
+"""
+
+import linecache, threading, time, tracemalloc
+from . import registry
+from .helpers import current_rss_bytes, peak_rss_bytes
+
+DEFAULT_TOP_SITES = 10
+# Allocations of the tracing itself and of the import machinery are left out of the snapshots
+SNAPSHOT_FILTERS = (
+  tracemalloc.Filter(False, tracemalloc.__file__),
+  tracemalloc.Filter(False, linecache.__file__),
+  tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+  tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+  tracemalloc.Filter(False, '<unknown>'),
+)
+# Ticket records, the ticket index and the poll queue are allocated by the registry
+TICKET_FILTERS = (tracemalloc.Filter(True, registry.__file__),)
+
+class MemoryProfiler():
+
+  def __init__(self, config):
+    self.topSites = config.get('topSites', DEFAULT_TOP_SITES)
+    self.pools = {}
+    self._snapshot = None
+    self._lock = threading.Lock()
+
+  def start(self):
+    tracemalloc.start()
+    self.phase(None, 'start')
+    return self
+
+  def stop(self):
+    """Account the end of the run and stop tracing, returns the run level figures"""
+    self.phase(None, 'summary')
+    summary = self.summary()
+    tracemalloc.stop()
+    self._snapshot = None
+    return summary
+
+  def _sites(self, snapshot):
+    """Allocation sites that grew the most since the previous snapshot"""
+    if self._snapshot is None:
+      stats = [(stat, stat.size) for stat in snapshot.statistics('lineno')[:self.topSites]]
+    else:
+      stats = [(stat, stat.size_diff) for stat in snapshot.compare_to(self._snapshot, 'lineno')[:self.topSites]]
+    return [{
+      'site': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+      'growth': growth,
+      'size': stat.size,
+      'count': stat.count,
+    } for stat, growth in stats]
+
+  def phase(self, pool, name, **counts):
+    """Snapshot the process at a phase boundary of pool (None for the run itself)"""
+    if not tracemalloc.is_tracing():
+      return None
+    with self._lock:
+      traced, tracedPeak = tracemalloc.get_traced_memory()
+      snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+      record = {
+        'phase': name,
+        'time': time.time(),
+        'tracedBytes': traced,
+        'tracedPeakBytes': tracedPeak,
+        'rssBytes': current_rss_bytes(),
+        'peakRssBytes': peak_rss_bytes(),
+        'ticketBytes': sum(stat.size for stat in snapshot.filter_traces(TICKET_FILTERS).statistics('filename')),
+        'topSites': self._sites(snapshot),
+      }
+      record.update(counts)
+      self._snapshot = snapshot
+      self.pools.setdefault(pool or 'run', []).append(record)
+    return record
+
+  def _find(self, phases, name):
+    return next((phase for phase in phases if phase['phase'] == name), None)
+
+  def pool(self, pool):
+    """Phases of one pool with its bytes per player and per in-flight ticket"""
+    phases = self.pools.get(pool, [])
+    players = self._find(phases, 'players')
+    # Parties, or the start of population runs: first use imports are left out of the players
+    start = phases[phases.index(players) - 1] if players and phases.index(players) > 0 else None
+    busiest = max(phases, key=lambda phase: phase.get('inFlight', 0), default=None)
+    bytesPerPlayer = bytesPerTicket = None
+    if start and players and players.get('players'):
+      bytesPerPlayer = (players['tracedBytes'] - start['tracedBytes']) / players['players']
+    if busiest and busiest.get('inFlight'):
+      bytesPerTicket = busiest['ticketBytes'] / busiest['inFlight']
+    return {
+      'bytesPerPlayer': bytesPerPlayer,
+      'bytesPerTicket': bytesPerTicket,
+      'tracedPeakBytes': max((phase['tracedPeakBytes'] for phase in phases), default=0),
+      'peakRssBytes': max((phase['peakRssBytes'] for phase in phases), default=0),
+      'phases': phases,
+    }
+
+  def summary(self):
+    """Run level figures: peaks over every phase and the run's own start and summary phases"""
+    phases = [phase for pool in self.pools.values() for phase in pool]
+    return {
+      'tracedPeakBytes': max((phase['tracedPeakBytes'] for phase in phases), default=0),
+      'peakRssBytes': max((phase['peakRssBytes'] for phase in phases), default=0),
+      'phases': self.pools.get('run', []),
+    }
+
+def describe_pool(memory):
+  """Report lines of the memory figures of one pool"""
+  perPlayer = f"{memory['bytesPerPlayer']:.0f}" if memory['bytesPerPlayer'] is not None else 'n/a'
+  perTicket = f"{memory['bytesPerTicket']:.0f}" if memory['bytesPerTicket'] is not None else 'n/a'
+  lines = [f"Memory: peak RSS {memory['peakRssBytes'] / 1e6:.1f} MB, traced peak {memory['tracedPeakBytes'] / 1e6:.1f} MB, "
+           f"{perPlayer} bytes per player, {perTicket} bytes per in-flight ticket"]
+  for phase in memory['phases']:
+    top = phase['topSites'][0] if phase['topSites'] else None
+    lines.append(f"  {phase['phase']:<11} traced {phase['tracedBytes'] / 1e6:8.1f} MB, RSS {phase['rssBytes'] / 1e6:8.1f} MB, "
+                 f"{phase.get('inFlight', 0)} tickets in flight"
+                 + (f", top growth {top['growth'] / 1e6:+.1f} MB at {top['site']}" if top else ''))
+  return lines
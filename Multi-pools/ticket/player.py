@@ -1,8 +1,6 @@
 import json, os, random, time
 import string
 import uuid
-import boto3
-import numpy as np
 from .helpers import *
 
 class Player:
@@ -26,18 +24,21 @@ class Player:
                       if mode in machmakingConfigurationName)]
       return gameModes, sleepRandomTimeLower, sleepRandomTimeUpper
 
-    def mock(self, attrs):
+    def mock(self, attrs, index):
+        """Build the player from the index-th value of each generated attribute"""
         self.PlayerId = "player-" + str(random.randint(1000000, 9999999))
-        latency = random.sample(attrs['latency'], 1)[0]
-        self.LatencyInMs = {
-          "us-east-1": latency
-        }
+        # Multi-region latencies are encoded from the latency matrix at submission time
+        self.LatencyInMs = {}
+        if 'latency' in attrs:
+            self.LatencyInMs = {
+              "us-east-1": attrs['latency'][index]
+            }
         self.PlayerAttributes = {}
         if isinstance(attrs, dict):
             for attr, value in attrs.items():
                 if attr != "latency":
                     self.PlayerAttributes[attr] = {
-                        'N' : random.sample(value, 1)[0]
+                        'N' : value[index]
                     }
 
         return {
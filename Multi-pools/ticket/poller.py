@@ -0,0 +1,111 @@
+"""
+This module provides the polling policy of the monitor thread of a RealTicket.
+
+Every in-flight ticket has its own next poll time in the TicketRegistry's priority queue,
+picked by PollScheduler from its status and age:
+- REQUIRES_ACCEPTANCE and PLACING are polled every minInterval, the acceptance has to be
+  answered and the placement ends within seconds
+- QUEUED and SEARCHING tickets are polled according to the time to match observed in the
+  pool. The deciles of the completed tickets split the ticket's life into bins that each hold
+  a tenth of the matches, and a ticket is polled `resolution` times per bin: sparsely while a
+  match is unlikely, densely where most tickets match. Before MIN_SAMPLES matches are known
+  every ticket is polled every DEFAULT_INTERVAL seconds
+- a ticket is polled right after its request timeout, when it is known to end
+
+The monitor thread takes the tickets due first, up to DESCRIBE_BATCH per DescribeMatchmaking
+call, and fills the rest of a call with the tickets due within the next minInterval. Calls are
+paid from a CallBudget shared by every pool of the run, so a busy run delays the tickets that
+can wait rather than going over the GameLift request rate.
+"""
+
+import bisect, threading
+
+DEFAULT_INTERVAL = 3
+DEFAULT_MIN_INTERVAL = 1
+DEFAULT_MAX_INTERVAL = 10
+DEFAULT_RESOLUTION = 2
+DEFAULT_CALLS_PER_SECOND = 10
+# RequestTimeoutSeconds of the configurations created by -flexmatch
+REQUEST_TIMEOUT = 120
+# Ticket ids one DescribeMatchmaking call accepts
+DESCRIBE_BATCH = 10
+# Matched tickets needed before the observed time to match drives the polling
+MIN_SAMPLES = 20
+DECILES = tuple(range(10, 100, 10))
+# The deciles are computed again once the matches grew by this share
+REFRESH_GROWTH = 0.1
+# Seconds after the request timeout a timed out ticket is polled
+TIMEOUT_SLACK = 0.5
+
+class CallBudget():
+  """Token bucket of DescribeMatchmaking calls on the run's clock, shared by the monitor threads"""
+
+  def __init__(self, clock, callsPerSecond=DEFAULT_CALLS_PER_SECOND):
+    self.clock = clock
+    self.rate = float(callsPerSecond)
+    self.tokens = self.rate
+    self.updated = clock.time()
+    self._lock = threading.Lock()
+
+  def _refill(self, now):
+    self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+    self.updated = now
+
+  def take(self):
+    """Pay for one call, returns False if the budget is spent for now"""
+    with self._lock:
+      self._refill(self.clock.time())
+      if self.tokens < 1:
+        return False
+      self.tokens -= 1
+      return True
+
+  def wait(self):
+    """Seconds until the next call can be paid"""
+    with self._lock:
+      self._refill(self.clock.time())
+      return max(0.0, (1 - self.tokens) / self.rate)
+
+class PollScheduler():
+
+  def __init__(self, config, completeTickets, requestTimeout):
+    self.minInterval = config.get('minInterval', DEFAULT_MIN_INTERVAL)
+    self.maxInterval = config.get('maxInterval', DEFAULT_MAX_INTERVAL)
+    self.resolution = config.get('resolution', DEFAULT_RESOLUTION)
+    self.requestTimeout = requestTimeout
+    self.completeTickets = completeTickets
+    self.edges = None
+    self._samples = 0
+
+  def _bins(self):
+    """Edges of the decile bins of the observed time to match, None until enough tickets matched"""
+    samples = len(self.completeTickets)
+    if samples < MIN_SAMPLES:
+      return None
+    if self.edges is None or samples >= self._samples * (1 + REFRESH_GROWTH):
+      deciles = self.completeTickets.percentiles(DECILES)
+      self.edges = [0.0] + [float(value) for value in deciles] + [max(float(self.requestTimeout), deciles[-1])]
+      self._samples = samples
+    return self.edges
+
+  def delay(self, status, age):
+    """Seconds until the next poll of a ticket in status, submitted age seconds ago"""
+    if status in ('REQUIRES_ACCEPTANCE', 'PLACING'):
+      return self.minInterval
+    edges = self._bins()
+    if edges is None:
+      delay = DEFAULT_INTERVAL
+    elif age >= edges[-1]:
+      delay = self.minInterval
+    else:
+      index = bisect.bisect_right(edges, age) - 1
+      delay = (edges[index + 1] - edges[index]) / self.resolution
+    delay = min(max(delay, self.minInterval), self.maxInterval)
+    if age < self.requestTimeout < age + delay:
+      # The ticket times out before then, poll it right after
+      delay = max(self.requestTimeout - age + TIMEOUT_SLACK, self.minInterval)
+    return delay
+
+  def next(self, record, now):
+    """Time of the next poll of a tracked ticket"""
+    return now + self.delay(record.status, now - record.submitTime)
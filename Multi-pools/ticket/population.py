@@ -0,0 +1,114 @@
+"""
+This module provides the persistent player population used by sustained-load benchmarks.
+
+A fixed number of concurrent users (CCU) is kept in compact NumPy arrays instead of player
+dicts. Players enter the arrival stream when they are ready, play a session of random length
+after a successful match (their skill drifting a little every game), and queue again, so a
+benchmark measures steady-state throughput at a fixed CCU level.
+"""
+
+import threading
+import numpy as np
+from .helpers import generate_latency_matrix
+
+IDLE = 0
+QUEUED = 1
+PLAYING = 2
+
+DEFAULT_SESSION_LENGTH = {'median': 300, 'std_dev': 60}
+DEFAULT_REQUEUE_DELAY = {'median': 5, 'std_dev': 2}
+
+def _positive_normal(distribution, size):
+  return np.maximum(np.random.normal(distribution['median'], distribution['std_dev'], size), 0)
+
+class Population():
+
+  def __init__(self, size, playerData, regions, config, now):
+    self._lock = threading.Lock()
+    self.size = size
+    self.sessionLength = config.get('sessionLength', DEFAULT_SESSION_LENGTH)
+    self.requeueDelay = config.get('requeueDelay', DEFAULT_REQUEUE_DELAY)
+    self.skillDrift = config.get('skillDrift', 0)
+
+    skill = playerData['skill']
+    self.skill = np.maximum(np.random.normal(skill['median'], skill['std_dev'], size), 1).astype(np.float32)
+    if regions:
+      self.latencyRegions, self.latencyMatrix, _ = generate_latency_matrix(size, regions)
+    else:
+      latency = playerData['latency']
+      self.latencyRegions = ['us-east-1']
+      self.latencyMatrix = np.maximum(np.random.normal(latency['median'], latency['std_dev'], (size, 1)), 1).astype(np.int32)
+
+    self.state = np.full(size, IDLE, dtype=np.int8)
+    self.games = np.zeros(size, dtype=np.int32)
+    # Stagger the first arrivals over one session so the run does not start with a single burst
+    self.readyAt = now + np.random.uniform(0, self.sessionLength['median'], size)
+
+  def __getstate__(self):
+    state = self.__dict__.copy()
+    del state['_lock']
+    return state
+
+  def __setstate__(self, state):
+    self.__dict__.update(state)
+    self._lock = threading.Lock()
+
+  def ready(self, now, limit=None):
+    """Indexes of idle players whose session or requeue delay is over, marked as queued"""
+    with self._lock:
+      indexes = np.flatnonzero((self.state != QUEUED) & (self.readyAt <= now))
+      if limit is not None:
+        indexes = indexes[:limit]
+      self.state[indexes] = QUEUED
+      return indexes
+
+  def partyOrder(self, indexes, correlation):
+    """
+    Ready players reordered so that neighbours, who are cut into parties, have correlated skills:
+    sorted on their standardized skill mixed with noise weighted by 1 - correlation.
+    """
+    if correlation <= 0 or len(indexes) < 2:
+      return indexes
+    skill = self.skill[indexes]
+    standardized = (skill - skill.mean()) / (skill.std() or 1)
+    key = np.sqrt(correlation) * standardized + np.sqrt(1 - correlation) * np.random.standard_normal(len(indexes))
+    return indexes[np.argsort(key, kind='stable')]
+
+  def players(self, indexes, gameModes):
+    """Matchmaking Players payload for a party of population indexes"""
+    return [{
+      'PlayerId': f"player-{index}",
+      'PlayerAttributes': {
+        'skill': {'N': int(self.skill[index])},
+        'GameMode': {'SL': gameModes},
+      },
+      'LatencyInMs': dict(zip(self.latencyRegions, self.latencyMatrix[index].tolist())),
+    } for index in indexes.tolist()]
+
+  def matched(self, indexes, now):
+    """Players found a match: they play a session and drift in skill before queueing again"""
+    with self._lock:
+      self.state[indexes] = PLAYING
+      self.games[indexes] += 1
+      self.readyAt[indexes] = now + _positive_normal(self.sessionLength, len(indexes))
+      if self.skillDrift:
+        drift = np.random.normal(0, self.skillDrift, len(indexes)).astype(np.float32)
+        self.skill[indexes] = np.maximum(self.skill[indexes] + drift, 1)
+
+  def released(self, indexes, now):
+    """Players whose ticket failed queue again after a short delay"""
+    with self._lock:
+      self.state[indexes] = IDLE
+      self.readyAt[indexes] = now + _positive_normal(self.requeueDelay, len(indexes))
+
+  def counts(self, now):
+    """Players queued, playing and idle right now"""
+    with self._lock:
+      # Sessions end lazily: a playing player becomes idle once its session is over
+      finished = (self.state == PLAYING) & (self.readyAt <= now)
+      self.state[finished] = IDLE
+      return {
+        'queued': int(np.count_nonzero(self.state == QUEUED)),
+        'playing': int(np.count_nonzero(self.state == PLAYING)),
+        'idle': int(np.count_nonzero(self.state == IDLE)),
+      }
@@ -14,42 +14,117 @@ It includes the RealTicket class, which handles tasks such as:
 The module also includes various helper methods for parsing configurations, generating random data, and handling time calculations.
 """
 
-import json, os, random, time
+import configparser, hashlib, json, os, queue, random, time
 import string
 import uuid
-import boto3
 import numpy as np
 import threading
+import logging
+from collections import OrderedDict
+from datetime import timedelta
 
 from pprint import pprint
-from boto3.dynamodb.conditions import Key
 from .player import Player
 from .helpers import *
-from .PartiQLWrapper import PartiQLWrapper
+from .registry import TicketRegistry, TERMINAL_STATUSES
+from .result_writer import ResultWriter, PLAYER_DTYPE, MATCH_DTYPE, load_results
+from .match_quality import match_rows, join_players, match_quality, quality_summary
+from .sampler import TimeSeriesSampler
+from .population import Population
+from .stats import ElapsedTimes, ElapsedHistogram
+from .soak import SoakMonitor
+from .memory import describe_pool
+from .backfill import BackfillLoad
+from .abandonment import AbandonmentLoad
+from .result_table import read_shards
+from .result_cache import shared_result_cache, SUCCEEDED_EVENTS, FAILED_EVENTS, mark_run_end
+from .clock import RealClock, Simulation
+from .counters import ShardedCounters, error_name
+from .poller import PollScheduler, DESCRIBE_BATCH, REQUEST_TIMEOUT
+from .checkpoint import Checkpointer, CHECKPOINT_VERSION, checkpoint_path, read_checkpoint, write_checkpoint, remove_checkpoints
+
+logger = logging.getLogger(__name__)
+
+# Shortest sleep of the monitor loop, when polls are due in quick succession
+MIN_TICK = 0.05
+# Seconds between two submission rounds of ready players in population runs
+ARRIVAL_INTERVAL = 1
+# Recently completed matches remembered to count each match once across its tickets
+RECENT_MATCHES = 4096
 
 class RealTicket():
 
   def __init__(self, name):
     self.players = []
-    self.ticketIds = []
-    self.completeTickets = []
-    self.failedTickets = []
+    self.tickets = TicketRegistry()
+    self.completeTickets = ElapsedTimes()
+    self.failedTickets = ElapsedTimes()
     self.machmakingConfigurationName = name
     self.start_time = None
     self.end_time = None
-    self.pending_acceptances = {}  # Track tickets waiting for acceptance
+    self.finish_time = None
     self.benchmarkId = '0000'
+    self.results = None
+    # Inputs of the match quality analytics: submitted players and the teams of their matches
+    self.playerRows = None
+    self.matchRows = None
+    # Events counted per thread, submittedTickets, matches and matchedPlayers are read from it
+    self.counters = ShardedCounters()
+    self.recentMatches = OrderedDict()
+    self.sampler = None
+    self.latencyRegions = []
+    self.latencyMatrix = None
+    self.homeRegions = None
+    self.population = None
+    self.soak = None
+    self.backfill = None
+    self.abandonment = None
+    self.nextBatch = 0
+    self.nextOffset = 0
+    # Parties of a burst run as offset and length arrays over self.players
+    self.partyOffsets = []
+    self.partySizes = []
+    self.partySkillCorrelation = 0
+    self.duration = 0
+    self.stopEvent = threading.Event()
+    # Held while a ticket is submitted or finished, so a checkpoint sees either none or all of it
+    self.checkpointLock = threading.Lock()
+    # Parties sent by the PartyRouter when both topologies share one stream
+    self.inbox = None
+    # Wall clock, or the virtual clock of a simulation (see clock.py)
+    self.clock = RealClock()
+    self.digest = None
+    self.summary = []
+    # Next poll of each ticket, and the DescribeMatchmaking budget shared by the pools of the run
+    self.poller = None
+    self.pollBudget = None
+    # Seconds between the end of a ticket and the poll that saw it
+    self.pollLag = ElapsedHistogram()
+    # MemoryProfiler of the run when benchmark.memory is enabled (see memory.py)
+    self.memory = None
     pass
 
   def call(self):
     print("RealTicket")
 
+  @property
+  def submittedTickets(self):
+    return self.counters.get('submitted')
+
+  @property
+  def matches(self):
+    return self.counters.get('matches')
+
+  @property
+  def matchedPlayers(self):
+    return self.counters.get('matchedPlayers')
+
   def handle_match_acceptance(self, ticket_id, players):
     """
     Simulate match acceptance behavior for all players in a match
     Returns True if all players accept, False if any player rejects
     """
-    acceptance_start = time.time()
+    acceptance_start = self.clock.time()
     
     # Simulate each player's acceptance decision
     accept_playerIds = []
@@ -62,7 +137,7 @@ class RealTicket():
         reject_playerIds.append(player['PlayerId'])
 
     if len(reject_playerIds) > 0:
-      print(f"reject players {reject_playerIds}")
+      logger.debug("%s - reject players %s", ticket_id, reject_playerIds)
       try:
         self.gamelift.accept_match(
           TicketId=ticket_id,
@@ -70,103 +145,224 @@ class RealTicket():
           AcceptanceType='REJECT'
         )
       except Exception as e: 
-        print(f"======= Error rejecting match: {e}")
+        self.counters.add(f"errors.AcceptMatch.{error_name(e)}")
+        logger.error("Error rejecting match %s: %s", ticket_id, e)
+      self.counters.add('acceptance.rejected')
       return False
 
     if len(accept_playerIds) > 0:
       try:
-        print(f"accept players {accept_playerIds}")
+        logger.debug("%s - accept players %s", ticket_id, accept_playerIds)
         self.gamelift.accept_match(
           TicketId=ticket_id,
           PlayerIds=accept_playerIds,
           AcceptanceType='ACCEPT'
         )   
       except Exception as e: 
-        print(f"======= Error accepting match: {e}")
+        self.counters.add(f"errors.AcceptMatch.{error_name(e)}")
+        logger.error("Error accepting match %s: %s", ticket_id, e)
         return False
+    self.counters.add('acceptance.accepted')
     # Add small delay between player responses
-    time.sleep(random.uniform(0.1, 0.5))
+    self.clock.sleep(random.uniform(0.1, 0.5))
     return True
 
   def handle_ticket_status(self, ticket, ticket_id):
     """Handle the status of a matchmaking ticket"""
     status = ticket['Status']
     # Handle other statuses
-    dt = datetime.strptime(str(ticket['StartTime']), "%Y-%m-%d %H:%M:%S.%f%z")
-    formatted_time = dt.strftime("%Y-%m-%d %H:%M:%S")
-    print(f"{ticket['ConfigurationName']} - {ticket_id} - {status} - {len(ticket['Players'])} - {formatted_time}")
+    logger.debug("%s - %s - %s - %d - %s", ticket['ConfigurationName'], ticket_id, status, len(ticket['Players']), ticket['StartTime'])
+    if self.backfill is not None and self.backfill.owns(ticket_id):
+      self.backfill.handle(ticket, ticket_id)
+      return
 
     # Handle tickets requiring acceptance
     if status == 'REQUIRES_ACCEPTANCE':
-      if ticket_id not in self.pending_acceptances:
-        print(f"{ticket['ConfigurationName']} - {ticket_id} - {status} - Requires acceptance")
-        self.pending_acceptances[ticket_id] = time.time()
-        if self.handle_match_acceptance(ticket_id, ticket['Players']):
-          print(f"All players accepted match for ticket {ticket_id}")
+      if self.tickets.transition(ticket_id, status, self.clock.time()) not in (None, status):
+        logger.debug("%s - %s - %s - Requires acceptance", ticket['ConfigurationName'], ticket_id, status)
+        accepted = self.handle_match_acceptance(ticket_id, ticket['Players'])
+        record = self.tickets.get(ticket_id)
+        if record is not None:
+          record.acceptance = 1 if accepted else 0
+        if accepted:
+          logger.debug("All players accepted match for ticket %s", ticket_id)
         else:
-          print(f"Match acceptance failed for ticket {ticket_id}")
+          logger.info("Match acceptance failed for ticket %s", ticket_id)
       return
       
+    if status in TERMINAL_STATUSES:
+      with self.checkpointLock:
+        self.finish_ticket(ticket, ticket_id, status)
+      return
+
+    self.tickets.transition(ticket_id, status, self.clock.time())
+
+  def finish_ticket(self, ticket, ticket_id, status):
+    """Aggregate and write out a ticket that reached a terminal status"""
     # Handle completed tickets
     if status == 'COMPLETED':
-      if ticket_id in self.pending_acceptances:
-        del self.pending_acceptances[ticket_id]
+      record = self.tickets.remove(ticket_id, status)
+      if record is None:
+        return
       elapsed_time = calculate_elapsed_time(ticket['StartTime'], ticket['EndTime'])
-      self.ticketIds.remove(ticket_id)
       self.completeTickets.append(elapsed_time)
-      print(f"{ticket['ConfigurationName']} - {ticket_id} - {status} - {elapsed_time}")
-      # print(f"{ticket}")
+      self.counters.add('status.COMPLETED')
+      self.count_match(ticket)
+      if self.backfill is not None:
+        self.backfill.completed(ticket, elapsed_time)
+      if self.abandonment is not None:
+        self.abandonment.completed(ticket, elapsed_time)
+      if self.population is not None and record.players is not None:
+        self.population.matched(record.players, self.clock.time())
+      self.write_result(record, ticket, elapsed_time)
+      if self.matchRows is not None:
+        matchId = match_key(ticket) or ticket_id
+        self.matchRows.writeRows([(matchId, ticket_id, player['PlayerId'], player.get('Team', ''), elapsed_time)
+                                  for player in ticket['Players']])
+      logger.info("%s - %s - %s - %s", ticket['ConfigurationName'], ticket_id, status, elapsed_time)
       return
       
     # Handle failed tickets
-    if status in ['CANCELLED', 'FAILED', 'TIMED_OUT']:
-      if ticket_id in self.pending_acceptances:
-        del self.pending_acceptances[ticket_id]
-      elapsed_time = calculate_elapsed_time(ticket['StartTime'], ticket['EndTime'])
-      self.ticketIds.remove(ticket_id)
-      self.failedTickets.append(elapsed_time)
-      print(f"{ticket['ConfigurationName']} - {ticket_id} - {status} - {elapsed_time}")
+    record = self.tickets.remove(ticket_id, status)
+    if record is None:
+      return
+    elapsed_time = calculate_elapsed_time(ticket['StartTime'], ticket['EndTime'])
+    self.failedTickets.append(elapsed_time)
+    self.counters.add(f"status.{status}")
+    if self.abandonment is not None:
+      self.abandonment.failed(ticket_id, status, elapsed_time)
+    self.write_result(record, ticket, elapsed_time)
+    if self.population is not None and record.players is not None:
+      self.population.released(record.players, self.clock.time())
+    logger.info("%s - %s - %s - %s", ticket['ConfigurationName'], ticket_id, status, elapsed_time)
+
+  def count_match(self, ticket):
+    """Count matched players, and the match itself only for the first of its tickets"""
+    self.counters.add('matchedPlayers', len(ticket['Players']))
+    key = match_key(ticket)
+    if not key:
+      self.counters.add('matches')
+      return
+    if key in self.recentMatches:
       return
+    self.recentMatches[key] = True
+    if len(self.recentMatches) > RECENT_MATCHES:
+      self.recentMatches.popitem(last=False)
+    self.counters.add('matches')
+
+  def report(self, *lines):
+    """Keep summary lines for the console once the dashboard is gone, and log them right away"""
+    self.summary.extend(lines)
+    for line in lines:
+      logger.info(line.strip())
+
+  def write_result(self, record, ticket, elapsed_time):
+    """Stream one finished ticket to the result files"""
+    if self.results is None:
+      return
+    if self.digest is not None:
+      # Ticket ids without the benchmark id, so two runs with the same seed hash the same
+      self.digest.update(f"{record.ticketId.rsplit('-', 1)[-1]},{record.status},{to_timestamp(ticket['StartTime'])},"
+                         f"{to_timestamp(ticket['EndTime'])},{elapsed_time},{record.acceptance}\n".encode())
+    self.results.write(record.ticketId, self.machmakingConfigurationName, record.gameModes, record.partySize,
+                       to_timestamp(ticket['StartTime']), to_timestamp(ticket['EndTime']),
+                       record.status, elapsed_time, record.acceptance)
+
+  def interrupt(self):
+    """Stop submitting and monitoring, the run is checkpointed so it can be resumed"""
+    self.stopEvent.set()
+
+  def pause(self, seconds):
+    """Sleep between submissions, returns True as soon as the run is interrupted"""
+    return self.clock.wait(self.stopEvent, seconds)
+
+  def memoryPhase(self, name, **counts):
+    """Account the memory of the process at a phase boundary of this pool"""
+    if self.memory is not None:
+      self.memory.phase(self.machmakingConfigurationName, name, **counts)
+
+  def firstPoll(self, now):
+    """Next poll time of a ticket submitted now"""
+    return now + self.poller.delay('QUEUED', 0) if self.poller is not None else None
+
+  def pollDue(self):
+    """Describe the due tickets, DESCRIBE_BATCH per call, returns False once the call budget is spent"""
+    while True:
+      now = self.clock.time()
+      nextPoll = self.tickets.nextPoll()
+      if nextPoll is None or nextPoll > now:
+        return True
+      if self.pollBudget is not None and not self.pollBudget.take():
+        self.counters.add('polls.deferred')
+        return False
+      # Tickets due within minInterval ride along in the same call
+      ticketIds = self.tickets.due(now + self.poller.minInterval, DESCRIBE_BATCH)
+      self.counters.add('polls.calls')
+      self.counters.add('polls.tickets', len(ticketIds))
+      try:
+        ticketList = self.gamelift.describe_matchmaking(TicketIds=ticketIds)['TicketList']
+      except Exception as e:
+        self.counters.add(f"errors.DescribeMatchmaking.{error_name(e)}")
+        logger.error("Error describing %d tickets: %s", len(ticketIds), e)
+        ticketList = []
+      for ticket in ticketList:
+        if ticket['Status'] in TERMINAL_STATUSES and ticket.get('EndTime') and ticket['TicketId'] in self.tickets:
+          self.pollLag.append(max(self.clock.time() - to_timestamp(ticket['EndTime']), 0.0))
+        self.handle_ticket_status(ticket, ticket['TicketId'])
+      # The tickets still in flight are scheduled again from their new status
+      for ticketId in ticketIds:
+        record = self.tickets.get(ticketId)
+        if record is not None and record.nextPoll is None:
+          now = self.clock.time()
+          self.tickets.schedule(ticketId, self.poller.next(record, now), now)
 
   def monitorTask(self, notify):
+    monitored = False
     try:
-      while True:
-        # Monitor each active ticket
-        for ticket_id in list(self.ticketIds):  # Create a copy to avoid modification during iteration
-          response = self.gamelift.describe_matchmaking(TicketIds=[ticket_id])
-          for ticket in response['TicketList']:
-            self.handle_ticket_status(ticket, ticket_id)
+      while not self.stopEvent.is_set():
+        budgetLeft = self.pollDue()
+        if self.end_time is not None and not monitored:
+          # Submission is over, every ticket of the run is in flight
+          monitored = True
+          self.memoryPhase('monitoring', inFlight=len(self.tickets))
         
-        # Clean up expired acceptance requests
-        current_time = time.time()
-        expired_tickets = [
-          ticket_id for ticket_id, start_time in self.pending_acceptances.items()
-          if current_time - start_time > self.acceptance['timeout']
-        ]
-        for ticket_id in expired_tickets:
-          print(f"Acceptance timeout for ticket {ticket_id}")
-          del self.pending_acceptances[ticket_id]
+        # Expired acceptance requests go back to searching so they are handled again if re-matched
+        for ticket_id in self.tickets.expired('REQUIRES_ACCEPTANCE', self.acceptance['timeout'], self.clock.time()):
+          logger.info("Acceptance timeout for ticket %s", ticket_id)
+          self.counters.add('acceptance.timeout')
+          self.tickets.transition(ticket_id, 'SEARCHING', self.clock.time())
+
+        # Game sessions that lost players ask for backfill
+        if self.backfill is not None:
+          self.backfill.submitDue(self.clock.time())
         
         # Check if monitoring should end
-        # print(self.end_time,  len(self.ticketIds))
-        if self.end_time is not None and len(self.ticketIds) == 0:
-          complete_avg = sum(self.completeTickets) / len(self.completeTickets) if self.completeTickets else 0
-          failed_avg = sum(self.failedTickets) / len(self.failedTickets) if self.failedTickets else 0
-
-          print(f"\nMatchmaking Monitor for [{self.machmakingConfigurationName}] Done!")
-          print(f"Complete Tickets: {len(self.completeTickets)}, Average Time: {complete_avg:.2f} seconds")
-          print(f"Failed Tickets: {len(self.failedTickets)}, Average Time: {failed_avg:.2f} seconds\n")
-
-          # print(logfilePath)
-          # with open(logfilePath, 'a') as outputfile:
-          #   print(f"\n\nMatchmaking Monitor for [{self.machmakingConfigurationName}] Done!", file=outputfile)
-          #   print(f"Complete Tickets: {len(self.completeTickets)}, Average Time: {complete_avg:.2f} seconds", file=outputfile)
-          #   # print(self.failedTickets)
-          #   print(f"Failed Tickets: {len(self.failedTickets)}, Average Time: {failed_avg:.2f} seconds", file=outputfile)
+        # print(self.end_time,  len(self.tickets))
+        if self.end_time is not None and len(self.tickets) == 0:
+          complete_avg = self.completeTickets.mean()
+          failed_avg = self.failedTickets.mean()
+          self.finish_time = self.clock.now()
+
+          self.report(f"\nMatchmaking Monitor for [{self.machmakingConfigurationName}] Done!",
+                      f"Complete Tickets: {len(self.completeTickets)}, Average Time: {complete_avg:.2f} seconds",
+                      f"Failed Tickets: {len(self.failedTickets)}, Average Time: {failed_avg:.2f} seconds\n")
+
+          logfilePath = f"{os.getcwd()}/{self.logs}"
+          with open(logfilePath, 'a') as outputfile:
+            print(f"\n\nMatchmaking Monitor for [{self.machmakingConfigurationName}] Done!", file=outputfile)
+            print(f"Complete Tickets: {len(self.completeTickets)}, Average Time: {complete_avg:.2f} seconds", file=outputfile)
+            print(f"Failed Tickets: {len(self.failedTickets)}, Average Time: {failed_avg:.2f} seconds", file=outputfile)
           break
-        time.sleep(3)
+        # Sleep until the next poll is due and can be paid for, a second at most
+        now = self.clock.time()
+        nextPoll = self.tickets.nextPoll()
+        wait = 1 if nextPoll is None else nextPoll - now
+        if not budgetLeft:
+          wait = max(wait, self.pollBudget.wait())
+        self.clock.sleep(min(max(wait, MIN_TICK), 1))
     except Exception as e:
-      print(f"Error during monitoring: {e}")
+      self.counters.add(f"errors.Monitor.{error_name(e)}")
+      logger.exception("Error during monitoring: %s", e)
     pass
 
   def lambdaResult(self, value, dynamodb, notify, benchmark):
@@ -182,55 +378,104 @@ class RealTicket():
     self.ticketPrefix =benchmark['ticketPrefix']
     keyprefix = f'{self.ticketPrefix}-{self.lastbenchmarkId}-'
 
-    existing_tables = self.dynamodb.tables.all()
-    existing_table_names = [table.name for table in existing_tables]
-    if not tableName in existing_table_names:
-      print(f"\tTable '{tableName}' not exists.")
-      return 
-        
-    print(f'\ttable name {tableName}, ticket prefix: {keyprefix}')
-    wrapper = PartiQLWrapper(self.dynamodb)
-
-    output = wrapper.run_partiql(
-        f'SELECT * FROM "{tableName}" WHERE begins_with("ticket_id", ?) AND ("ticket_event" = ?)', 
-        [keyprefix, 'MatchmakingSucceeded']
-    )
-    total_time_elapse_succeed = 0
-    num_items_succeed = 0
-    for item in output["Items"]:
-      # print(f"\n{item['ticket_event']}, {item['ticket_id']}, {item['elapsed_time']}")
-      total_time_elapse_succeed += item['elapsed_time']
-      num_items_succeed += 1
-
-    output = wrapper.run_partiql(
-        f'SELECT * FROM "{tableName}" WHERE begins_with("ticket_id", ?) AND ("ticket_event" = ? OR "ticket_event" = ? OR "ticket_event" = ? )', 
-        [keyprefix, 'MatchmakingFailed', 'MatchmakingCancelled', 'MatchmakingTimedOut']
-    )
-    total_time_elapse_failed = 0
-    num_items_failed = 0
-    for item in output["Items"]:
-      # print(f"\n{item['ticket_event']}, {item['ticket_id']}, {item['elapsed_time']}")
-      total_time_elapse_failed += item['elapsed_time']
-      num_items_failed += 1
-
+    cache = shared_result_cache()
+    entry = cache.get(tableName, self.lastbenchmarkId, self.machmakingConfigurationName)
+    if entry['complete']:
+      print(f'\ttable name {tableName}, ticket prefix: {keyprefix} (cached, benchmark finished)')
+    else:
+      existing_tables = self.dynamodb.tables.all()
+      existing_table_names = [table.name for table in existing_tables]
+      if not tableName in existing_table_names:
+        print(f"\tTable '{tableName}' not exists.")
+        return 
+          
+      # Only the events at or after the cached high-water mark are read, the rest is already aggregated
+      events = SUCCEEDED_EVENTS + FAILED_EVENTS
+      try:
+        shards = int(getTempDb('dynamodb', 'shards'))
+      except configparser.Error:
+        shards = None
+      if shards:
+        print(f'\ttable name {tableName}, ticket prefix: {keyprefix}, {shards} shards, events since: {entry["mark"] or "start"}')
+        items = read_shards(self.dynamodb.meta.client, tableName, keyprefix[:-1], shards, entry['mark'], events)
+      else:
+        # Tables created before the sharded key design are keyed on ticket_id
+        print(f'\ttable name {tableName}, ticket prefix: {keyprefix}, events since: {entry["mark"] or "start"}')
+        from .PartiQLWrapper import PartiQLWrapper
+        wrapper = PartiQLWrapper(self.dynamodb)
+        items = wrapper.run_partiql_pages(
+            f'SELECT * FROM "{tableName}" WHERE begins_with("ticket_id", ?) AND "matchevent_time" >= ? AND ('
+            + ' OR '.join('"ticket_event" = ?' for _ in events) + ')',
+            [keyprefix, entry['mark'], *events]
+        )
+      results = ResultWriter(result_file_path(self.logs, self.machmakingConfigurationName, self.lastbenchmarkId, '-events'),
+                             append=entry['lastFetch'] is not None).start()
+      new_items = 0
+      for item in items:
+        # print(f"\n{item['ticket_event']}, {item['ticket_id']}, {item['elapsed_time']}")
+        if cache.merge(entry, item):
+          new_items += 1
+          self.write_event_result(results, item)
+      results.close()
+      cache.finish_fetch(entry)
+      cache.save()
+      print(f"\t{new_items} new events merged, ticket results written to {results.csvPath} and {results.npyPath}")
+
+    num_items_succeed = entry['succeeded']['count']
+    num_items_failed = entry['failed']['count']
     avg_time_elapse_failed = 0
     avg_time_elapse_succeeded = 0
     if num_items_failed > 0:
-      avg_time_elapse_failed = total_time_elapse_failed / num_items_failed
+      avg_time_elapse_failed = entry['failed']['total'] / num_items_failed
     if num_items_succeed > 0:
-      avg_time_elapse_succeeded = total_time_elapse_succeed / num_items_succeed
+      avg_time_elapse_succeeded = entry['succeeded']['total'] / num_items_succeed
 
     print(f"\nMatchmaking Monitor for [{self.machmakingConfigurationName}] Done!")
     print(f"Complete Tickets: {num_items_succeed}, Average Time: {avg_time_elapse_succeeded:.2f} seconds")
     print(f"Failed Tickets: {num_items_failed}, Average Time: {avg_time_elapse_failed:.2f} seconds\n")
 
-    # logfilePath = f"{os.getcwd()}/{self.logs}"
-    # with open(logfilePath, 'a') as outputfile:
-    #   print(f"\n\nMatchmaking Monitor for [{self.machmakingConfigurationName}] Done!", file=outputfile)
-    #   print(f"Complete Tickets: {num_items_succeed}, Average Time: {avg_time_elapse_succeeded:.2f} seconds", file=outputfile)
-    #   print(f"Failed Tickets: {num_items_failed}, Average Time: {avg_time_elapse_failed:.2f} seconds", file=outputfile)
+    logfilePath = f"{os.getcwd()}/{self.logs}"
+    with open(logfilePath, 'a') as outputfile:
+      print(f"\n\nMatchmaking Monitor for [{self.machmakingConfigurationName}] Done!", file=outputfile)
+      print(f"Complete Tickets: {num_items_succeed}, Average Time: {avg_time_elapse_succeeded:.2f} seconds", file=outputfile)
+      print(f"Failed Tickets: {num_items_failed}, Average Time: {avg_time_elapse_failed:.2f} seconds", file=outputfile)
 
     pass
+
+  def matchQuality(self, benchmarkId, dynamodb, notify, benchmark):
+    """Per-match quality of one benchmark of this pool and its distributions, None if its players were not recorded"""
+    basePath = result_file_path(benchmark['logs'], self.machmakingConfigurationName, benchmarkId)
+    if not os.path.exists(f"{basePath}-players.npy"):
+      print(f"\tNo players recorded for {self.machmakingConfigurationName} in benchmark {benchmarkId}")
+      return None
+    players = load_results(f"{basePath}-players.npy")
+    matches, source = None, f"{basePath}-matches.npy"
+    if notify == "lambda":
+      tableName = getTempDb('dynamodb', 'table')
+      try:
+        shards = int(getTempDb('dynamodb', 'shards'))
+      except configparser.Error:
+        shards = None
+      if shards:
+        items = read_shards(dynamodb.meta.client, tableName, f"{benchmark['ticketPrefix']}-{benchmarkId}", shards, '', ('MatchmakingSucceeded',))
+        matches, source = match_rows(items), f"table {tableName}"
+      else:
+        print(f"\tTable '{tableName}' predates the sharded keys, reading the matches seen by the monitor")
+    if matches is None:
+      matches = load_results(f"{basePath}-matches.npy") if os.path.exists(f"{basePath}-matches.npy") else np.zeros(0, dtype=MATCH_DTYPE)
+    matched, attributes = join_players(matches, players)
+    quality = match_quality(matched, attributes)
+    np.save(f"{basePath}-quality.npy", quality)
+    print(f"\t{self.machmakingConfigurationName}: {len(quality)} matches of {len(matched)} players from {source}, "
+          f"{len(matches) - len(matched)} matched players without a players row, per-match quality written to {basePath}-quality.npy")
+    return quality_summary(quality)
+
+  def write_event_result(self, results, item):
+    """Stream one notification event stored by the lambda to the result files"""
+    players = json.loads(item.get('players', '[]'))
+    results.write(item['ticket_id'], self.machmakingConfigurationName, [], len(players),
+                  to_timestamp(item['ticket_start_time']), to_timestamp(item['matchevent_time']),
+                  item['ticket_event'], float(item['elapsed_time']))
   
   def _get_game_modes(self):
       """Determine game modes based on configuration name"""
@@ -247,103 +492,384 @@ class RealTicket():
                       if mode in self.machmakingConfigurationName)]
       return gameModes, sleepRandomTimeLower, sleepRandomTimeUpper
 
-  def mockPlayers(self, num_players):
+  def mockPlayers(self, num_players, partySizes=None):
     attrs = {}
     for attr, value in self.playerData.items():
+      if attr == 'latency' and self.regions:
+        continue
       # if median and std_dev are in value's property
       if 'median' in value and 'std_dev' in value:
-        vals = generate_scores(num_players, value['median'],  value['std_dev'])
+        correlation = self.partySkillCorrelation if attr == 'skill' else 0
+        vals = generate_scores(num_players, value['median'],  value['std_dev'], partySizes, correlation)
         attrs[attr] = vals
 
+    if self.regions:
+      self.latencyRegions, self.latencyMatrix, self.homeRegions = generate_latency_matrix(num_players, self.regions)
+
     for i in range(num_players):
-      self.players.append(Player().mock(attrs))
+      self.players.append(Player().mock(attrs, i))
       pass
 
+  def encodeLatencies(self, players, offset):
+    """Encode LatencyInMs for players[offset:offset+len(players)] right before they are submitted"""
+    if self.latencyMatrix is not None:
+      encode_latencies(players, self.latencyRegions, self.latencyMatrix[offset:offset + len(players)])
+
   def _parseBenchmarkConfig(self, sample, benchmark):
     self.totalPlayers = benchmark['totalPlayers']
     self.ticketPrefix =benchmark['ticketPrefix']
     self.logs = benchmark['logs']
     self.acceptance = benchmark['acceptance']
     self.teamSize = benchmark['teamSize']
+    self.partySizeDistribution = party_size_distribution(benchmark, self.machmakingConfigurationName)
+    self.partySkillCorrelation = benchmark.get('partySkillCorrelation', 0)
     self._parseSampleConfig(sample)
  
   def _parseSampleConfig(self, sample):
     self.gameModes = sample['gameModes']
     self.playerData = sample['playerData']
+    self.regions = sample.get('regions')
 
   def doSampling(self, num_players, sample):
     self._parseSampleConfig(sample)
     self.mockPlayers(num_players)
+    self.encodeLatencies(self.players, 0)
     for sample_player in self.players:
       gameModes, _, _ = self._get_game_modes()
       sample_player['PlayerAttributes']['GameMode'] = {'SL' : gameModes}
     print(self.players)
 
-  def doMatchmaking(self, value, gamelift, dynamodb, notify, sample, benchmark):
+  def startTicket(self, players, gameModes, partyIndexes=None):
+    """Start one matchmaking ticket for a party and track it"""
+    response = self.gamelift.start_matchmaking(
+      TicketId= f'{self.ticketPrefix}-{self.benchmarkId}-{generate_random_string(10)}',
+      ConfigurationName=self.machmakingConfigurationName,
+      Players=players
+    )
+
+    ticketId = response['MatchmakingTicket']['TicketId']
+    now = self.clock.time()
+    if self.playerRows is not None:
+      self.playerRows.writeRows(self.playerAttributes(ticketId, players, gameModes))
+    self.tickets.add(ticketId, len(players), gameModes, response['MatchmakingTicket'].get('Status', 'QUEUED'), now, partyIndexes, self.firstPoll(now))
+    self.counters.add('submitted')
+    if self.abandonment is not None:
+      self.abandonment.submitted(ticketId, len(players), now)
+    return ticketId
+
+  def playerAttributes(self, ticketId, players, gameModes):
+    """PLAYER_DTYPE rows of a submitted party"""
+    modes = sum(1 << index for index, mode in enumerate(self.gameModes) if mode in gameModes)
+    return [(ticketId, player['PlayerId'], player['PlayerAttributes'].get('skill', {}).get('N', np.nan),
+             min(player['LatencyInMs'].values(), default=np.nan), len(players), modes) for player in players]
+
+  def submitBatches(self):
+    """Submit every mocked party once, the original one-shot burst, starting at nextBatch when resumed"""
+    total_batches = len(self.partySizes)
+    for index in range(self.nextBatch, total_batches):
+      offset, length = int(self.partyOffsets[index]), int(self.partySizes[index])
+      batch_players = self.players[offset:offset + length]
+      progress = ((index + 1) / total_batches) * 100
+      logger.debug("==== Progress: %.1f%% - Batch %d/%d - ==== Processing %d players in %s",
+                   progress, index + 1, total_batches, len(batch_players), self.machmakingConfigurationName)
+      gameModes, sleepRandomTimeLower, sleepRandomTimeUpper = self._get_game_modes()
+      sleepTime = random.randint(sleepRandomTimeLower, sleepRandomTimeUpper)
+      for batch_player in batch_players:
+        batch_player['PlayerAttributes']['GameMode'] = {'SL' : gameModes}        
+      self.encodeLatencies(batch_players, self.nextOffset)
+      logger.debug("starting matchmaking for: %s with players: %d game mode: %s sleep time: %s",
+                   self.machmakingConfigurationName, len(batch_players), gameModes, sleepTime)
+
+      with self.checkpointLock:
+        self.startTicket(batch_players, gameModes)
+        self.nextBatch = index + 1
+        self.nextOffset += len(batch_players)
+      if index == total_batches // 2:
+        self.memoryPhase('submission', inFlight=len(self.tickets))
+
+      #print(f'sleep {sleepTime} seconds')
+      if self.pause(sleepTime):
+        return
+
+  def submitPopulation(self):
+    """Submit parties of ready players until the run duration is over, players queue again after their games"""
+    endTime = self.clock.time() + self.duration - self.elapsed()
+    halfway = endTime - self.duration / 2
+    while self.clock.time() < endTime:
+      if halfway is not None and self.clock.time() >= halfway:
+        halfway = None
+        self.memoryPhase('submission', inFlight=len(self.tickets))
+      ready = self.population.partyOrder(self.population.ready(self.clock.time()), self.partySkillCorrelation)
+      offsets, lengths = partition_parties(len(ready), *self.partySizeDistribution)
+      for offset, length in zip(offsets.tolist(), lengths.tolist()):
+        party = ready[offset:offset + length]
+        gameModes, _, _ = self._get_game_modes()
+        with self.checkpointLock:
+          self.startTicket(self.population.players(party, gameModes), gameModes, party)
+      if self.pause(ARRIVAL_INTERVAL):
+        return
+
+  def submitRouted(self):
+    """Submit the parties the router sends to this pool until the shared stream is over"""
+    while not self.stopEvent.is_set():
+      try:
+        party = self.inbox.get(timeout=1)
+      except queue.Empty:
+        continue
+      if party is None:
+        return
+      players, gameModes = party
+      self.totalPlayers += len(players)
+      self.startTicket(players, gameModes)
+
+  def elapsed(self):
+    return (self.clock.now() - self.start_time).total_seconds() if self.start_time else 0
+
+  def checkpointState(self):
+    """Everything a resumed run needs besides the schedule file"""
+    return {
+      'version': CHECKPOINT_VERSION,
+      'configuration': self.machmakingConfigurationName,
+      'benchmarkId': self.benchmarkId,
+      'lastbenchmarkId': self.lastbenchmarkId,
+      'totalPlayers': self.totalPlayers,
+      'duration': self.duration,
+      'elapsed': self.elapsed(),
+      'nextBatch': self.nextBatch,
+      'nextOffset': self.nextOffset,
+      'tickets': self.tickets.snapshot(),
+      'counters': self.counters,
+      'completeTickets': self.completeTickets,
+      'failedTickets': self.failedTickets,
+      'population': self.population,
+      'soakRollups': list(self.soak.rollups) if self.soak is not None else None,
+      'backfill': self.backfill,
+      'abandonment': self.abandonment,
+      'rng': (random.getstate(), np.random.get_state()),
+      # Rows of the tickets finished (and players submitted) so far, the resumed run truncates the files there
+      'resultRows': {name: writer.queued for name, writer in self.resultWriters().items()},
+    }
+
+  def resultWriters(self):
+    return {name: writer for name, writer in (('results', self.results), ('players', self.playerRows), ('matches', self.matchRows))
+            if writer is not None}
+
+  def checkpoint(self):
+    with self.checkpointLock:
+      state = self.checkpointState()
+    # The rows the checkpoint counts are on disk before it is written
+    for writer in self.resultWriters().values():
+      writer.sync()
+    write_checkpoint(checkpoint_path(self.machmakingConfigurationName, 'state'), state)
+
+  def restoreState(self, state):
+    self.benchmarkId = state['benchmarkId']
+    self.lastbenchmarkId = state['lastbenchmarkId']
+    self.totalPlayers = state['totalPlayers']
+    self.duration = state['duration']
+    self.nextBatch = state['nextBatch']
+    self.nextOffset = state['nextOffset']
+    self.tickets.restore(state['tickets'])
+    self.counters = state['counters']
+    self.completeTickets = state['completeTickets']
+    self.failedTickets = state['failedTickets']
+    self.population = state['population']
+    self.backfill = state['backfill']
+    if self.backfill is not None:
+      self.backfill.realticket = self
+    self.abandonment = state['abandonment']
+    if self.abandonment is not None:
+      self.abandonment.realticket = self
+    random.setstate(state['rng'][0])
+    np.random.set_state(state['rng'][1])
+
+  def populationSummary(self, total_time):
+    """Steady-state numbers of a population run, measured over the second half of the run"""
+    counts = self.population.counts(self.clock.time())
+    lines = [f"Population CCU: {self.population.size}, Games Played: {int(self.population.games.sum())}, "
+             f"Queued: {counts['queued']}, Playing: {counts['playing']}, Idle: {counts['idle']}"]
+    if self.sampler is not None:
+      samples = self.sampler.samples.values()
+      steady = samples[samples['time'] >= samples['time'][0] + total_time / 2] if len(samples) else samples
+      if len(steady):
+        lines.append(f"Steady-state Throughput: {steady['matches_per_sec'].mean():.2f} matches/s, "
+                     f"{steady['players_per_sec'].mean():.2f} players/s, "
+                     f"{(steady['queued'] + steady['searching']).mean():.1f} tickets searching")
+    return lines
+
+  def doMatchmaking(self, value, gamelift, dynamodb, notify, sample, benchmark, resume=False):
     self.gamelift = gamelift
     self.dynamodb = dynamodb
     self._parseBenchmarkConfig(sample, benchmark)
     if not value is None:
       self.totalPlayers = int(value)
-    self.mockPlayers(self.totalPlayers)
-
-    sub_players = split_array(self.players, self.teamSize['default'])
-    if "Survival" in self.machmakingConfigurationName:
-      sub_players = split_array(self.players, self.teamSize['small'])  
-    total_batches = len(sub_players)
-
-    print(f"\nStarting matchmaking for {self.machmakingConfigurationName}, notify type {notify}")
-    print(f"Total players: {self.totalPlayers}, Batches: {total_batches}")
+    self.memoryPhase('start')
+
+    state = None
+    if resume:
+      state = read_checkpoint(checkpoint_path(self.machmakingConfigurationName, 'state'))
+      if state is None:
+        self.report(f"No checkpoint to resume for {self.machmakingConfigurationName}")
+        return
+      self.restoreState(state)
+      logger.info("Resuming benchmark %s for %s at batch %d with %d tickets in flight",
+                  self.benchmarkId, self.machmakingConfigurationName, self.nextBatch, len(self.tickets))
+
+    population = benchmark.get('population', {})
+    soak = benchmark.get('soak', {})
+    if benchmark.get('backfill', {}).get('enabled') and state is None:
+      self.backfill = BackfillLoad(self, benchmark['backfill'])
+    if benchmark.get('abandonment', {}).get('enabled') and state is None:
+      self.abandonment = AbandonmentLoad(self, benchmark['abandonment'], bounded=soak.get('enabled'))
+    if soak.get('enabled') and state is None:
+      # Soak runs are population runs whose finished tickets only feed constant-size histograms
+      self.completeTickets = ElapsedHistogram()
+      self.failedTickets = ElapsedHistogram()
+    if self.inbox is not None:
+      self.totalPlayers = 0
+      logger.info("Starting routed matchmaking for %s, notify type %s", self.machmakingConfigurationName, notify)
+    elif population.get('enabled') or soak.get('enabled'):
+      if state is None:
+        self.totalPlayers = population['ccu']
+        self.duration = soak['duration'] if soak.get('enabled') else population.get('duration', 600)
+        self.population = Population(self.totalPlayers, self.playerData, self.regions, population, self.clock.time())
+        self.memoryPhase('players', players=self.totalPlayers)
+      logger.info("Starting population matchmaking for %s, notify type %s", self.machmakingConfigurationName, notify)
+      logger.info("CCU: %d, Duration: %d seconds", self.totalPlayers, self.duration)
+    else:
+      if state is None:
+        self.partyOffsets, self.partySizes = partition_parties(self.totalPlayers, *self.partySizeDistribution)
+        self.memoryPhase('parties', parties=len(self.partySizes))
+        self.mockPlayers(self.totalPlayers, self.partySizes)
+      else:
+        schedule = read_checkpoint(checkpoint_path(self.machmakingConfigurationName, 'schedule'))
+        self.players, self.partySizes = schedule['players'], np.asarray(schedule['partySizes'], dtype=np.int64)
+        self.latencyRegions, self.latencyMatrix = schedule['latencyRegions'], schedule['latencyMatrix']
+        self.partyOffsets = np.cumsum(self.partySizes) - self.partySizes
+      self.memoryPhase('players', players=self.totalPlayers)
+      logger.info("Starting matchmaking for %s, notify type %s", self.machmakingConfigurationName, notify)
+      logger.info("Total players: %d, Batches: %d", self.totalPlayers, len(self.partySizes))
 
     # response = self.gamelift.describe_matchmaking_configurations(Names=[self.machmakingConfigurationName])
     # print(response)
     # return 
 
-    # start monitor thread
-    monitor_thread = threading.Thread(target=self.monitorTask, args=(notify,))
-    monitor_thread.start() 
-
-    self.start_time = datetime.now()
+    # monitor thread, started once the result writers exist
+    monitor_thread = self.clock.thread(self.monitorTask, (notify,))
+    # cancel scheduler of the impatient parties, next to the monitor
+    abandonment_thread = self.clock.thread(self.abandonment.run) if self.abandonment is not None else None
+    # Simulated runs are driven by the virtual clock, the wall-clock helpers stay off
+    simulated = isinstance(self.clock, Simulation)
+    requestTimeout = benchmark.get('simulation', {}).get('requestTimeout', REQUEST_TIMEOUT) if simulated else REQUEST_TIMEOUT
+    self.poller = PollScheduler(benchmark.get('polling', {}), self.completeTickets, requestTimeout)
+    if simulated:
+      self.digest = hashlib.sha256()
+
+    self.start_time = self.clock.now() - timedelta(seconds=state['elapsed'] if state else 0)
+    checkpointer = None
     try:
 
-      step = 1 if notify == 'lambda' else 0
-      self.benchmarkId, self.lastbenchmarkId = incremental_read(step)
-      print(f'\n\t current bechmark id: {self.benchmarkId} \t notify type: {notify}')
-
-      for index, batch_players in enumerate(sub_players, 1):
-        progress = (index / total_batches) * 100
-        print(f"==== Progress: {progress:.1f}% - Batch {index}/{total_batches} - "
-              f"==== Processing {len(batch_players)} players in {self.machmakingConfigurationName}")
-        gameModes, sleepRandomTimeLower, sleepRandomTimeUpper = self._get_game_modes()
-        sleepTime = random.randint(sleepRandomTimeLower, sleepRandomTimeUpper)
-        for batch_player in batch_players:
-          batch_player['PlayerAttributes']['GameMode'] = {'SL' : gameModes}        
-        print(f"starting matchmaking for: {self.machmakingConfigurationName} with players: {len(batch_players)} game mode: {gameModes} sleep time: {sleepTime}")
-
-        response = self.gamelift.start_matchmaking(
-          TicketId= f'{self.ticketPrefix}-{self.benchmarkId}-{generate_random_string(10)}',
-          ConfigurationName=self.machmakingConfigurationName,
-          Players=batch_players
-        )
-
-        ticketId = response['MatchmakingTicket']['TicketId']
-        self.ticketIds.append(ticketId)
-
-        #print(f'sleep {sleepTime} seconds')
-        time.sleep(sleepTime)
+      if state is None:
+        step = 1 if notify == 'lambda' else 0
+        self.benchmarkId, self.lastbenchmarkId = incremental_read(step)
+        if self.population is None and self.inbox is None and not simulated:
+          write_checkpoint(checkpoint_path(self.machmakingConfigurationName, 'schedule'), {
+            'version': CHECKPOINT_VERSION,
+            'players': self.players,
+            'partySizes': self.partySizes,
+            'latencyRegions': self.latencyRegions,
+            'latencyMatrix': self.latencyMatrix,
+          })
+      logger.info("current bechmark id: %s notify type: %s", self.benchmarkId, notify)
+      resultRows = state['resultRows'] if state else {}
+      self.results = ResultWriter(result_file_path(self.logs, self.machmakingConfigurationName, self.benchmarkId),
+                                  append=state is not None, rows=resultRows.get('results')).start()
+      self.playerRows = ResultWriter(result_file_path(self.logs, self.machmakingConfigurationName, self.benchmarkId, '-players'),
+                                     append=state is not None, dtype=PLAYER_DTYPE, rows=resultRows.get('players')).start()
+      self.matchRows = ResultWriter(result_file_path(self.logs, self.machmakingConfigurationName, self.benchmarkId, '-matches'),
+                                    append=state is not None, dtype=MATCH_DTYPE, rows=resultRows.get('matches')).start()
+      self.sampler = TimeSeriesSampler(self, benchmark.get('sampler')).start()
+      if soak.get('enabled') and not simulated:
+        self.soak = SoakMonitor(self, soak, result_file_path(self.logs, self.machmakingConfigurationName, self.benchmarkId, '-soak'))
+        self.soak.start(state['soakRollups'] if state else None)
+      # Routed runs depend on the shared stream of this process and are not checkpointed
+      if self.inbox is None and not simulated:
+        checkpointer = Checkpointer(self, benchmark.get('checkpoint')).start()
+      monitor_thread.start() 
+      if abandonment_thread is not None:
+        abandonment_thread.start()
+
+      if self.inbox is not None:
+        self.submitRouted()
+      elif self.population is not None:
+        self.submitPopulation()
+      else:
+        self.submitBatches()
 
     except Exception as e:
-      print(f"\nError during matchmaking: {str(e)}")
+      self.counters.add(f"errors.Submit.{error_name(e)}")
+      logger.exception("Error during matchmaking: %s", e)
     finally:
-      self.end_time = datetime.now()
+      self.end_time = self.clock.now()
       total_time = (self.end_time - self.start_time).total_seconds()
       formatted_time = format_elapsed_time(int(total_time))
+      total_batches = max(self.submittedTickets, 1)
 
       # if notity == 'polling':
-      monitor_thread.join()  # Wait for monitor thread to 
-
-      print(f"\n\nMatchmaking Summary for {self.machmakingConfigurationName}")
-      print(f"Total Players: {self.totalPlayers}")
-      print(f"Total Batches: {total_batches}")
-      print(f"Total Time: {formatted_time}")
-      print(f"Average Time per Batch: {(total_time/total_batches):.2f} seconds")
+      if monitor_thread.ident is not None:
+        self.clock.join(monitor_thread)  # Wait for monitor thread to 
+      if abandonment_thread is not None and abandonment_thread.ident is not None:
+        self.clock.join(abandonment_thread)
+      if checkpointer is not None:
+        checkpointer.stop()
+      if self.stopEvent.is_set() and (self.inbox is not None or simulated):
+        self.report(f"\nBenchmark {self.benchmarkId} for {self.machmakingConfigurationName} interrupted")
+      elif self.stopEvent.is_set():
+        self.checkpoint()
+        self.report(f"\nBenchmark {self.benchmarkId} for {self.machmakingConfigurationName} interrupted with "
+                    f"{len(self.tickets)} tickets in flight, continue it with -resume")
+      elif not simulated:
+        remove_checkpoints(self.machmakingConfigurationName)
+        if notify == 'lambda':
+          mark_run_end(getTempDb('dynamodb', 'table'), self.benchmarkId, self.machmakingConfigurationName)
+      if self.results is not None:
+        self.results.close()
+        self.report(f"Ticket results written to {self.results.csvPath} and {self.results.npyPath}")
+      for writer in (self.playerRows, self.matchRows):
+        if writer is not None:
+          writer.close()
+      if self.matchRows is not None:
+        self.report(f"Players and matches for -analytics written to {self.playerRows.npyPath} and {self.matchRows.npyPath}")
+      if self.sampler is not None:
+        self.sampler.stop()
+        csvPath, npyPath = self.sampler.export(result_file_path(self.logs, self.machmakingConfigurationName, self.benchmarkId, '-timeseries'))
+        self.report(f"Time series written to {csvPath} and {npyPath}")
+      if self.soak is not None and self.stopEvent.is_set():
+        self.soak.stop(final=False)
+      elif self.soak is not None:
+        verdict = self.soak.stop()
+        self.report(f"Soak {'PASSED' if verdict['passed'] else 'FAILED'}: "
+                    f"memory growth {verdict['memoryGrowthMBPerHour']:.1f} MB/h, "
+                    f"CPU per ticket growth {verdict['cpuPerTicketGrowth'] * 100:.1f}% "
+                    f"over {verdict['intervals']} intervals, report written to {self.soak.reportPath}")
+
+      self.report(f"\n\nMatchmaking Summary for {self.machmakingConfigurationName}",
+                  f"Total Players: {self.totalPlayers}",
+                  f"Total Batches: {self.submittedTickets}",
+                  f"Total Time: {formatted_time}",
+                  f"Average Time per Batch: {(total_time/total_batches):.2f} seconds")
+      calls = self.counters.get('polls.calls')
+      lag = self.pollLag.percentiles((50, 99))
+      self.report(f"DescribeMatchmaking Calls: {calls}, {self.counters.get('polls.tickets') / max(calls, 1):.1f} tickets per call, "
+                  f"{self.counters.get('polls.deferred')} deferred by the call budget, status lag p50/p99: {lag[0]:.2f}/{lag[1]:.2f} seconds")
+      if self.memory is not None:
+        self.memoryPhase('summary', inFlight=len(self.tickets))
+        self.report(*describe_pool(self.memory.pool(self.machmakingConfigurationName)))
+      if self.population is not None:
+        self.report(*self.populationSummary(total_time))
+      if self.backfill is not None:
+        self.report(*self.backfill.report())
+      if self.abandonment is not None:
+        self.report(*self.abandonment.report())
+      if self.digest is not None:
+        self.report(f"Simulated Result Digest: {self.digest.hexdigest()}")
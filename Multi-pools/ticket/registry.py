@@ -0,0 +1,159 @@
+"""
+This module provides the in-flight ticket registry used by RealTicket.
+
+Tickets are stored as compact __slots__ records indexed by ticket id and by status, so
+submissions, status transitions and completions are O(1) per ticket and safe to call from
+the submit and monitor threads at the same time. The next poll of every ticket is kept in
+a priority queue, so "what needs polling now" is O(log n) per due ticket; entries of
+rescheduled or finished tickets are skipped when they reach the front.
+"""
+
+import heapq, itertools, threading, time
+
+TERMINAL_STATUSES = ('COMPLETED', 'FAILED', 'CANCELLED', 'TIMED_OUT')
+
+class TicketRecord():
+  __slots__ = ('ticketId', 'submitTime', 'partySize', 'gameModes', 'status', 'statusTime', 'lastPoll', 'acceptance', 'players', 'nextPoll')
+
+  def __init__(self, ticketId, submitTime, partySize, gameModes, status, players=None, nextPoll=None):
+    self.ticketId = ticketId
+    self.submitTime = submitTime
+    self.partySize = partySize
+    self.gameModes = gameModes
+    self.status = status
+    self.statusTime = submitTime
+    self.lastPoll = submitTime
+    self.acceptance = -1
+    # Population indexes of the party members, only set for population runs
+    self.players = players
+    self.nextPoll = submitTime if nextPoll is None else nextPoll
+
+class TicketRegistry():
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._records = {}
+    self._byStatus = {}
+    # (next poll, sequence, ticket id), the entry is current while it matches record.nextPoll
+    self._polls = []
+    self._sequence = itertools.count()
+
+  def __len__(self):
+    return len(self._records)
+
+  def __contains__(self, ticketId):
+    return ticketId in self._records
+
+  def add(self, ticketId, partySize, gameModes, status='QUEUED', submitTime=None, players=None, nextPoll=None):
+    """Track a newly submitted ticket, due for polling at nextPoll (right away by default)"""
+    now = time.time() if submitTime is None else submitTime
+    record = TicketRecord(ticketId, now, partySize, tuple(gameModes), status, players, nextPoll)
+    with self._lock:
+      self._records[ticketId] = record
+      self._byStatus.setdefault(status, {})[ticketId] = record
+      heapq.heappush(self._polls, (record.nextPoll, next(self._sequence), ticketId))
+    return record
+
+  def get(self, ticketId):
+    return self._records.get(ticketId)
+
+  def transition(self, ticketId, status, now=None):
+    """Move a ticket to a new status, returns the previous status or None if the ticket is unknown"""
+    with self._lock:
+      record = self._records.get(ticketId)
+      if record is None:
+        return None
+      previous = record.status
+      if previous != status:
+        del self._byStatus[previous][ticketId]
+        self._byStatus.setdefault(status, {})[ticketId] = record
+        record.status = status
+        record.statusTime = time.time() if now is None else now
+      return previous
+
+  def remove(self, ticketId, status=None):
+    """Stop tracking a finished ticket, returns its record or None if it was already removed"""
+    with self._lock:
+      record = self._records.pop(ticketId, None)
+      if record is None:
+        return None
+      del self._byStatus[record.status][ticketId]
+      if status is not None:
+        record.status = status
+      return record
+
+  def schedule(self, ticketId, nextPoll, now=None):
+    """Record that a ticket has just been polled, and when to poll it next"""
+    with self._lock:
+      record = self._records.get(ticketId)
+      if record is None:
+        return
+      record.lastPoll = time.time() if now is None else now
+      record.nextPoll = nextPoll
+      heapq.heappush(self._polls, (nextPoll, next(self._sequence), ticketId))
+
+  def _front(self):
+    """Drop the stale entries at the front of the queue, returns the current one or None"""
+    while self._polls:
+      nextPoll, _, ticketId = self._polls[0]
+      record = self._records.get(ticketId)
+      if record is not None and record.nextPoll == nextPoll:
+        return self._polls[0]
+      heapq.heappop(self._polls)
+    return None
+
+  def nextPoll(self):
+    """Time of the earliest poll, None without tickets"""
+    with self._lock:
+      front = self._front()
+      return None if front is None else front[0]
+
+  def due(self, until, limit=None):
+    """Ticket ids whose next poll is at or before until, earliest first. They leave the queue
+    until they are scheduled again"""
+    result = []
+    with self._lock:
+      while limit is None or len(result) < limit:
+        front = self._front()
+        if front is None or front[0] > until:
+          break
+        heapq.heappop(self._polls)
+        self._records[front[2]].nextPoll = None
+        result.append(front[2])
+    return result
+
+  def expired(self, status, timeout, now=None):
+    """Ticket ids that have been in status for longer than timeout seconds"""
+    now = time.time() if now is None else now
+    with self._lock:
+      return [ticketId for ticketId, record in self._byStatus.get(status, {}).items()
+              if now - record.statusTime > timeout]
+
+  def ids(self, status=None):
+    with self._lock:
+      if status is None:
+        return list(self._records)
+      return list(self._byStatus.get(status, {}))
+
+  def count(self, status=None):
+    if status is None:
+      return len(self._records)
+    return len(self._byStatus.get(status, {}))
+
+  def counts(self):
+    with self._lock:
+      return {status: len(records) for status, records in self._byStatus.items() if records}
+
+  def snapshot(self):
+    """Field tuples of every in-flight record, for checkpoints"""
+    with self._lock:
+      return [tuple(getattr(record, field) for field in TicketRecord.__slots__) for record in self._records.values()]
+
+  def restore(self, rows):
+    """Track the records of a checkpoint snapshot again, they are due for polling right away"""
+    for row in rows:
+      values = dict(zip(TicketRecord.__slots__, row))
+      record = self.add(values['ticketId'], values['partySize'], values['gameModes'], values['status'],
+                        values['submitTime'], values['players'], 0)
+      record.statusTime = values['statusTime']
+      record.acceptance = values['acceptance']
@@ -0,0 +1,98 @@
+"""
+This module provides the local cache of benchmark results read from the notification table.
+
+Entries are keyed by table, benchmark id and configuration, and hold the aggregates of the
+events read so far plus a high-water mark on matchevent_time. Later -result calls only read
+events at or after the mark and merge them in. The mark trails the newest event by
+SETTLE_SECONDS, because events can be stored slightly out of order, and the events inside
+that window are remembered so none is counted twice. Once the benchmark run has ended and
+a read happened SETTLE_SECONDS after that, the entry is complete and is served without any
+AWS reads.
+"""
+
+import json, os, threading, time
+from datetime import datetime, timedelta
+
+RESULT_CACHE_PATH = f'{os.getcwd()}/Multi-pools/resultcache.json'
+SETTLE_SECONDS = 60
+SUCCEEDED_EVENTS = ('MatchmakingSucceeded',)
+FAILED_EVENTS = ('MatchmakingFailed', 'MatchmakingCancelled', 'MatchmakingTimedOut')
+
+_lock = threading.Lock()
+
+def _new_entry():
+  return {
+    'succeeded': {'count': 0, 'total': 0.0},
+    'failed': {'count': 0, 'total': 0.0},
+    'events': {},
+    'mark': '',
+    'window': {},
+    'runEnd': None,
+    'lastFetch': None,
+    'complete': False,
+  }
+
+def _shift(isoTime, seconds):
+  value = datetime.fromisoformat(isoTime.replace('Z', '+00:00')) - timedelta(seconds=seconds)
+  return value.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+class ResultCache():
+
+  def __init__(self, path=RESULT_CACHE_PATH):
+    self.path = path
+    self.entries = {}
+    self.mtime = None
+    if os.path.exists(path):
+      with open(path, 'r', encoding='utf-8') as cache:
+        self.entries = json.load(cache)
+      self.mtime = os.path.getmtime(path)
+
+  def get(self, table, benchmarkId, configurationName):
+    return self.entries.setdefault(f"{table}/{benchmarkId}/{configurationName}", _new_entry())
+
+  def merge(self, entry, item):
+    """Add one stored event to the aggregates, returns False if it was already counted"""
+    key = f"{item['ticket_id']}/{item['ticket_event']}"
+    eventTime = item['matchevent_time']
+    if eventTime < entry['mark'] or key in entry['window']:
+      return False
+    entry['window'][key] = eventTime
+    bucket = entry['succeeded'] if item['ticket_event'] in SUCCEEDED_EVENTS else entry['failed']
+    bucket['count'] += 1
+    bucket['total'] += float(item['elapsed_time'])
+    entry['events'][item['ticket_event']] = entry['events'].get(item['ticket_event'], 0) + 1
+    return True
+
+  def finish_fetch(self, entry, fetchTime=None):
+    """Advance the high-water mark after a read and drop the events that fell behind it"""
+    fetchTime = time.time() if fetchTime is None else fetchTime
+    if entry['window']:
+      entry['mark'] = max(entry['mark'], _shift(max(entry['window'].values()), SETTLE_SECONDS))
+      entry['window'] = {key: eventTime for key, eventTime in entry['window'].items() if eventTime >= entry['mark']}
+    entry['lastFetch'] = fetchTime
+    if entry['runEnd'] is not None and fetchTime > entry['runEnd'] + SETTLE_SECONDS:
+      entry['complete'] = True
+
+  def save(self):
+    tmpPath = f"{self.path}.tmp"
+    with open(tmpPath, 'w', encoding='utf-8') as cache:
+      json.dump(self.entries, cache)
+    os.replace(tmpPath, self.path)
+    self.mtime = os.path.getmtime(self.path)
+
+_shared = None
+
+def shared_result_cache():
+  """Cache kept for the life of the process (see daemon.py), read again only if another process changed the file"""
+  global _shared
+  mtime = os.path.getmtime(RESULT_CACHE_PATH) if os.path.exists(RESULT_CACHE_PATH) else None
+  if _shared is None or _shared.mtime != mtime:
+    _shared = ResultCache()
+  return _shared
+
+def mark_run_end(table, benchmarkId, configurationName, runEnd=None):
+  """Record that a benchmark run finished submitting and monitoring, so its results can become complete"""
+  with _lock:
+    cache = shared_result_cache()
+    cache.get(table, benchmarkId, configurationName)['runEnd'] = time.time() if runEnd is None else runEnd
+    cache.save()
@@ -0,0 +1,120 @@
+"""
+This module provides the key design and capacity plan of the notification result table.
+
+The lambda stores one item per ticket and event. The items of a benchmark are spread over
+`shards` partition keys "<ticket prefix>-<benchmark id>#<n>", n being a CRC32 of the ticket id,
+and the sort key "<event time>#<ticket id>#<event>" keeps every shard ordered on time. Writes
+are spread evenly over the shards, and the reader queries every shard from the cached
+high-water mark in parallel instead of scanning the table for a ticket id prefix.
+
+plan_result_table sizes the table of a configuration from the planned ticket rate of the
+benchmark (benchmark.resultTable.ticketsPerSecond, or an estimate from the population, router
+or burst settings):
+- write units per second = tickets/s x events per ticket x units per item x headroom
+- PROVISIONED with those units up to onDemandAbove, PAY_PER_REQUEST above
+- warm throughput for on-demand tables above the ON_DEMAND_WRITE_UNITS a new table starts with
+- one shard per half of PARTITION_WRITE_UNITS, the most one partition key absorbs, so uneven
+  hashing does not throttle a shard, within minShards..maxShards
+"""
+
+import heapq, math
+from concurrent.futures import ThreadPoolExecutor
+from .helpers import party_size_distribution
+
+DEFAULT_HEADROOM = 2
+DEFAULT_ON_DEMAND_ABOVE = 100
+DEFAULT_MIN_SHARDS = 4
+DEFAULT_MAX_SHARDS = 64
+MIN_UNITS = 5
+PARTITION_WRITE_UNITS = 1000
+SHARD_WRITE_UNITS = PARTITION_WRITE_UNITS // 2
+ON_DEMAND_WRITE_UNITS = 4000
+# Estimated size of a stored event: the ticket fields plus the players JSON
+ITEM_BYTES = 300
+PLAYER_BYTES = 200
+MAX_READERS = 16
+
+def planned_ticket_rate(benchmark, configurationName):
+  """Tickets per second one configuration is expected to submit"""
+  config = benchmark.get('resultTable', {})
+  if config.get('ticketsPerSecond'):
+    return float(config['ticketsPerSecond'])
+  sizes, probabilities = party_size_distribution(benchmark, configurationName)
+  meanParty = float((sizes * probabilities).sum())
+  population = benchmark.get('population', {})
+  if population.get('enabled'):
+    # Every player queues again after a game and a requeue delay
+    cycle = population['sessionLength']['median'] + population['requeueDelay']['median']
+    return population['ccu'] / meanParty / max(cycle, 1)
+  router = benchmark.get('router', {})
+  if router.get('enabled'):
+    return 2 / (router['interval']['min'] + router['interval']['max'])
+  # Burst runs sleep 1-3 seconds between parties in the all-in-one pool, 2-6 in the per-mode pools
+  return 2 / (1 + 3) if 'All' in configurationName else 2 / (2 + 6)
+
+def plan_result_table(benchmark, flexmatchConfig):
+  """Capacity mode, capacity units and shard count of the result table of a configuration"""
+  config = benchmark.get('resultTable', {})
+  headroom = config.get('headroom', DEFAULT_HEADROOM)
+  ticketsPerSecond = planned_ticket_rate(benchmark, flexmatchConfig['name'])
+  sizes, probabilities = party_size_distribution(benchmark, flexmatchConfig['name'])
+  # MatchmakingSucceeded or a failure, plus AcceptMatchCompleted when acceptance is required
+  eventsPerTicket = 2 if flexmatchConfig.get('acceptance', 0) > 0 else 1
+  unitsPerItem = math.ceil((ITEM_BYTES + PLAYER_BYTES * float(sizes.max())) / 1024)
+  writeUnits = math.ceil(ticketsPerSecond * eventsPerTicket * unitsPerItem * headroom)
+  shards = math.ceil(writeUnits / SHARD_WRITE_UNITS)
+  shards = min(max(shards, config.get('minShards', DEFAULT_MIN_SHARDS)), config.get('maxShards', DEFAULT_MAX_SHARDS))
+  onDemand = writeUnits > config.get('onDemandAbove', DEFAULT_ON_DEMAND_ABOVE)
+  return {
+    'ticketsPerSecond': ticketsPerSecond,
+    'headroom': headroom,
+    'eventsPerTicket': eventsPerTicket,
+    'unitsPerItem': unitsPerItem,
+    'billingMode': 'PAY_PER_REQUEST' if onDemand else 'PROVISIONED',
+    'writeUnits': max(writeUnits, MIN_UNITS),
+    # Reads are eventually consistent and come in bursts of -result calls
+    'readUnits': max(math.ceil(writeUnits / 4), MIN_UNITS),
+    'warmWriteUnits': writeUnits if onDemand and writeUnits > ON_DEMAND_WRITE_UNITS else None,
+    'shards': shards,
+  }
+
+def describe_plan(plan):
+  capacity = 'on-demand' if plan['billingMode'] == 'PAY_PER_REQUEST' else f"{plan['readUnits']} RCU / {plan['writeUnits']} WCU"
+  if plan['warmWriteUnits']:
+    capacity += f" warmed to {plan['warmWriteUnits']} WCU"
+  return (f"{plan['ticketsPerSecond']:.2f} tickets/s, {plan['eventsPerTicket']} event(s) of {plan['unitsPerItem']} WCU "
+          f"per ticket: {capacity}, {plan['shards']} shards")
+
+def read_shard(client, tableName, partitionKey, mark, events):
+  """Items of one shard at or after the mark, in sort key (time) order"""
+  values = {':pk': partitionKey}
+  values.update({f':e{index}': event for index, event in enumerate(events)})
+  kwargs = {
+    'TableName': tableName,
+    'KeyConditionExpression': '#pk = :pk',
+    'FilterExpression': f"#event IN ({', '.join(f':e{index}' for index in range(len(events)))})",
+    'ExpressionAttributeNames': {'#pk': 'pk', '#event': 'ticket_event'},
+    'ExpressionAttributeValues': values,
+  }
+  if mark:
+    # Key values cannot be empty strings, the first read takes the whole shard
+    kwargs['KeyConditionExpression'] += ' AND #sk >= :mark'
+    kwargs['ExpressionAttributeNames']['#sk'] = 'sk'
+    values[':mark'] = mark
+  items = []
+  while True:
+    response = client.query(**kwargs)
+    items.extend(response['Items'])
+    if 'LastEvaluatedKey' not in response:
+      return items
+    kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def read_shards(client, tableName, group, shards, mark, events):
+  """
+  Query every shard of a ticket group in parallel and merge them in time order. client must be
+  thread safe: the client of a DynamoDB resource (resource.meta.client), which also converts
+  items to Python values.
+  """
+  with ThreadPoolExecutor(max_workers=min(shards, MAX_READERS)) as executor:
+    parts = list(executor.map(lambda shard: read_shard(client, tableName, f"{group}#{shard}", mark, events), range(shards)))
+  return heapq.merge(*parts, key=lambda item: item['sk'])
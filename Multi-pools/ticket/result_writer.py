@@ -0,0 +1,200 @@
+"""
+This module streams one row per finished matchmaking ticket to disk.
+
+Rows are queued by the monitor thread and written by a background thread in batches, to a
+CSV file for humans and to a NumPy .npy file of fixed-width records that can be opened
+zero-copy with load_results(path) (np.load with mmap_mode='r').
+
+The same writer streams the inputs of the match quality analytics (see match_quality.py):
+one PLAYER_DTYPE row per submitted player with the attributes it was submitted with, and one
+MATCH_DTYPE row per player of a completed ticket with its match and team.
+
+The row count in the .npy header is only final once the writer is closed. A writer that
+appends to the files of an interrupted run (resume, or the event files of -result) therefore
+never trusts the header: it keeps the first `rows` rows (the count a checkpoint recorded, see
+sync) or every whole row found in the file, truncates both files there, and goes on from that
+count. Rows written after the checkpoint are written again by the resumed run, so they are
+dropped instead of counted twice.
+"""
+
+import csv, os, queue, threading
+import numpy as np
+
+RESULT_DTYPE = np.dtype([
+  ('ticket_id', 'S64'),
+  ('configuration', 'S64'),
+  ('game_modes', 'S48'),
+  ('party_size', 'u1'),
+  ('start_time', 'f8'),
+  ('end_time', 'f8'),
+  ('status', 'S20'),
+  ('elapsed_time', 'f8'),
+  ('acceptance', 'i1'),  # 1 accepted, 0 rejected, -1 not required
+])
+
+PLAYER_DTYPE = np.dtype([
+  ('ticket_id', 'S64'),
+  ('player_id', 'S24'),
+  ('skill', 'f4'),
+  ('latency', 'f4'),     # to the player's best region, NaN without latencies
+  ('party_size', 'u1'),
+  ('game_modes', 'u1'),  # bit i set for sample.gameModes[i]
+])
+
+MATCH_DTYPE = np.dtype([
+  ('match_id', 'S16'),   # see helpers.match_key
+  ('ticket_id', 'S64'),
+  ('player_id', 'S24'),
+  ('team', 'S16'),
+  ('elapsed_time', 'f8'),
+])
+
+FLUSH_ROWS = 4096
+FLUSH_SECONDS = 1.0
+
+def _npy_header(dtype, rows, size=None):
+  """Version 1.0 .npy header, padded to size bytes so it can be rewritten in place with the final row count"""
+  header = repr({
+    'descr': np.lib.format.dtype_to_descr(dtype),
+    'fortran_order': False,
+    'shape': (rows,),
+  })
+  if size is None:
+    # Leave room for a 20 digit row count and keep the data 64-byte aligned
+    size = (10 + len(header) + 20 + 1 + 63) // 64 * 64
+  header = header.ljust(size - 10 - 1) + '\n'
+  return b'\x93NUMPY\x01\x00' + len(header).to_bytes(2, 'little') + header.encode('latin1')
+
+def load_results(path):
+  """Memory-map a .npy result file written by ResultWriter"""
+  return np.load(path, mmap_mode='r')
+
+def _truncate_csv(csvFile, rows):
+  """Keep the header and at most rows lines after it of a CSV file opened 'r+b', returns the lines kept"""
+  csvFile.seek(0)
+  kept, offset = -1, 0
+  while kept < rows:
+    line = csvFile.readline()
+    # A line cut short by a crash has no line ending and is dropped
+    if not line.endswith(b'\n'):
+      break
+    kept += 1
+    offset = csvFile.tell()
+  csvFile.truncate(offset)
+  return max(kept, 0)
+
+class ResultWriter():
+
+  def __init__(self, basePath, append=False, dtype=RESULT_DTYPE, rows=None):
+    self.dtype = dtype
+    self.csvPath = f"{basePath}.csv"
+    self.npyPath = f"{basePath}.npy"
+    self.append = append and os.path.exists(self.csvPath) and os.path.exists(self.npyPath)
+    # Rows of the previous run to keep when appending, every whole row on disk when None
+    self.keepRows = rows
+    self.rows = 0
+    # Rows handed to the writer so far, including the kept ones, see sync
+    self.queued = 0
+    self._ready = threading.Event()
+    self._queue = queue.SimpleQueue()
+    self._thread = threading.Thread(target=self._run, daemon=True)
+    self._closed = False
+
+  def start(self):
+    os.makedirs(os.path.dirname(self.csvPath) or '.', exist_ok=True)
+    self._thread.start()
+    # The kept rows are counted before the first row is queued
+    self._ready.wait()
+    return self
+
+  def write(self, ticketId, configuration, gameModes, partySize, startTime, endTime, status, elapsedTime, acceptance=-1):
+    """Queue one finished ticket, never blocks the caller"""
+    self.queued += 1
+    self._queue.put((ticketId, configuration, '|'.join(gameModes), partySize, startTime, endTime, status, elapsedTime, acceptance))
+
+  def writeRows(self, rows):
+    """Queue a list of rows of the writer's dtype at once"""
+    self.queued += len(rows)
+    self._queue.put(rows)
+
+  def sync(self):
+    """Block until every row queued so far is on disk, so a checkpoint can record self.queued"""
+    if self._closed:
+      return
+    done = threading.Event()
+    self._queue.put(done)
+    while not done.wait(FLUSH_SECONDS):
+      if not self._thread.is_alive():
+        return
+
+  def close(self):
+    """Flush the remaining rows and finalize both files"""
+    if self._closed:
+      return
+    self._closed = True
+    self._queue.put(None)
+    self._thread.join()
+
+  def _flush(self, buffer, csvWriter, csvFile, npyFile, sync=False):
+    csvWriter.writerows(buffer)
+    np.array(buffer, dtype=self.dtype).tofile(npyFile)
+    # Both files reach the same row at every flush, so a crash leaves them in step
+    csvFile.flush()
+    npyFile.flush()
+    if sync:
+      os.fsync(csvFile.fileno())
+      os.fsync(npyFile.fileno())
+    self.rows += len(buffer)
+    buffer.clear()
+
+  def _resume(self, npyFile):
+    """Truncate both files to the rows kept from the previous run, returns the .npy header size"""
+    np.lib.format.read_magic(npyFile)
+    np.lib.format.read_array_header_1_0(npyFile)
+    headerSize = npyFile.tell()
+    # The header of a crashed run holds a stale count, the file size tells the rows on disk
+    rows = (os.path.getsize(self.npyPath) - headerSize) // self.dtype.itemsize
+    if self.keepRows is not None:
+      rows = min(rows, self.keepRows)
+    with open(self.csvPath, 'r+b') as csvFile:
+      rows = min(rows, _truncate_csv(csvFile, rows))
+    npyFile.truncate(headerSize + rows * self.dtype.itemsize)
+    npyFile.seek(0, os.SEEK_END)
+    self.rows = self.queued = rows
+    return headerSize
+
+  def _run(self):
+    buffer = []
+    try:
+      npyFile = open(self.npyPath, 'r+b' if self.append else 'wb')
+      headerSize = self._resume(npyFile) if self.append else npyFile.write(_npy_header(self.dtype, 0))
+    finally:
+      self._ready.set()
+    with npyFile, open(self.csvPath, 'a' if self.append else 'w', newline='') as csvFile:
+      csvWriter = csv.writer(csvFile)
+      # A run killed before its first flush left an empty CSV behind
+      if not self.append or csvFile.tell() == 0:
+        csvWriter.writerow(self.dtype.names)
+      while True:
+        try:
+          row = self._queue.get(timeout=FLUSH_SECONDS)
+        except queue.Empty:
+          if buffer:
+            self._flush(buffer, csvWriter, csvFile, npyFile)
+          continue
+        if row is None:
+          break
+        if isinstance(row, threading.Event):
+          self._flush(buffer, csvWriter, csvFile, npyFile, sync=True)
+          row.set()
+          continue
+        if isinstance(row, list):
+          buffer.extend(row)
+        else:
+          buffer.append(row)
+        if len(buffer) >= FLUSH_ROWS:
+          self._flush(buffer, csvWriter, csvFile, npyFile)
+      if buffer:
+        self._flush(buffer, csvWriter, csvFile, npyFile)
+      npyFile.seek(0)
+      npyFile.write(_npy_header(self.dtype, self.rows, headerSize))
@@ -0,0 +1,113 @@
+"""
+This module provides the router that feeds both matchmaking topologies from one stream of parties.
+
+The router generates a single arrival stream of parties, each with one game mode. Every
+party is sent to the per-mode pool of its game mode (Radiant-Dire-Classic-1, -Practice,
+-Survival) and, at the same time, an identical copy is sent to the all-in-one pool
+(Radiant-Dire-All). Both topologies therefore see exactly the same demand, and their
+throughput and time-to-match can be compared side by side.
+
+The all-in-one copy suffixes every PlayerId with ROUTED_COPY_SUFFIX, because FlexMatch does
+not accept the same player in two active tickets.
+"""
+
+import random, threading
+import numpy as np
+from .helpers import generate_scores, generate_latency_matrix, party_size_distribution
+from .stats import ElapsedTimes, histogram_percentiles
+
+ROUTED_COPY_SUFFIX = '-all'
+DEFAULT_INTERVAL = {'min': 1, 'max': 3}
+
+class PartyRouter():
+
+  def __init__(self, realtickets, sample, benchmark, totalPlayers):
+    self.gameModes = sample['gameModes']
+    self.playerData = sample['playerData']
+    self.regions = sample.get('regions')
+    self.partySizeDistributions = {mode: party_size_distribution(benchmark, mode) for mode in self.gameModes}
+    self.partySkillCorrelation = benchmark.get('partySkillCorrelation', 0)
+    self.interval = benchmark.get('router', {}).get('interval', DEFAULT_INTERVAL)
+    self.totalPlayers = totalPlayers
+    self.allPools = [realticket for realticket in realtickets if 'All' in realticket.machmakingConfigurationName]
+    self.modePools = {}
+    for realticket in realtickets:
+      for mode in self.gameModes:
+        if mode in realticket.machmakingConfigurationName and realticket not in self.allPools:
+          self.modePools[mode] = realticket
+    self.pools = self.allPools + list(self.modePools.values())
+    self.routedParties = 0
+    self._stop = threading.Event()
+
+  def stop(self):
+    self._stop.set()
+
+  def _latencies(self):
+    if self.regions:
+      names, matrix, _ = generate_latency_matrix(self.totalPlayers, self.regions)
+      return names, matrix
+    latency = self.playerData['latency']
+    return ['us-east-1'], np.array(generate_scores(self.totalPlayers, latency['median'], latency['std_dev']))[:, None]
+
+  def _parties(self):
+    """Game mode and size of every party of the stream, sizes drawn from the distribution of the mode"""
+    modes, sizes, total = [], [], 0
+    while total < self.totalPlayers:
+      mode = random.choice(self.gameModes)
+      partySizes, probabilities = self.partySizeDistributions[mode]
+      size = min(int(np.random.choice(partySizes, p=probabilities)), self.totalPlayers - total)
+      modes.append(mode)
+      sizes.append(size)
+      total += size
+    return modes, sizes
+
+  def run(self):
+    """Generate the shared party stream, then tell every pool the stream is over"""
+    skill = self.playerData['skill']
+    modes, sizes = self._parties()
+    skills = generate_scores(self.totalPlayers, skill['median'], skill['std_dev'], sizes, self.partySkillCorrelation)
+    regionNames, latencies = self._latencies()
+    offset = 0
+    try:
+      for mode, size in zip(modes, sizes):
+        if self._stop.is_set():
+          break
+        players = [{
+          'PlayerId': f"player-{index}",
+          'PlayerAttributes': {'skill': {'N': skills[index]}, 'GameMode': {'SL': [mode]}},
+          'LatencyInMs': dict(zip(regionNames, latencies[index].tolist())),
+        } for index in range(offset, offset + size)]
+        offset += size
+
+        if mode in self.modePools:
+          self.modePools[mode].inbox.put((players, [mode]))
+        for pool in self.allPools:
+          pool.inbox.put(([dict(player, PlayerId=player['PlayerId'] + ROUTED_COPY_SUFFIX) for player in players], [mode]))
+        self.routedParties += 1
+        self._stop.wait(random.uniform(self.interval['min'], self.interval['max']))
+    finally:
+      for pool in self.pools:
+        pool.inbox.put(None)
+
+def _percentiles(elapsedCollections):
+  """p50/p99 over the elapsed times of several pools"""
+  if all(isinstance(elapsed, ElapsedTimes) for elapsed in elapsedCollections):
+    return ElapsedTimes(value for elapsed in elapsedCollections for value in elapsed).percentiles()
+  return histogram_percentiles(sum(elapsed.snapshot() for elapsed in elapsedCollections))
+
+def topology_summary(router, totalTime):
+  """Side by side numbers of the per-mode pools and the all-in-one pool under the same load"""
+  lines = [f"\n\nTopology Comparison ({router.routedParties} parties, same stream)",
+           f"{'topology':<14}{'pools':>6}{'tickets':>9}{'completed':>11}{'failed':>8}{'rate':>8}{'players/s':>11}{'p50':>8}{'p99':>8}"]
+  for topology, pools in (('multi-pool', list(router.modePools.values())), ('all-in-one', router.allPools)):
+    if not pools:
+      continue
+    tickets = sum(pool.submittedTickets for pool in pools)
+    completed = sum(len(pool.completeTickets) for pool in pools)
+    failed = sum(len(pool.failedTickets) for pool in pools)
+    players = sum(pool.matchedPlayers for pool in pools)
+    p50, p99 = _percentiles([pool.completeTickets for pool in pools])
+    rate = completed / tickets * 100 if tickets else 0
+    lines.append(f"{topology:<14}{len(pools):>6}{tickets:>9}{completed:>11}{failed:>8}{rate:>7.1f}%"
+                 f"{players / max(totalTime, 1e-9):>11.2f}{p50:>8.1f}{p99:>8.1f}")
+  return lines
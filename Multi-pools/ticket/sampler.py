@@ -0,0 +1,108 @@
+"""
+This module samples the load of one matchmaking configuration at fixed intervals.
+
+Every sample records the number of in-flight tickets per status, the submission rate, the
+match completion rate (matches and players per second) and the acceptance backlog. Samples
+are kept in a fixed-size ring buffer, so a long run keeps only the most recent window, and
+are exported at the end of the run to CSV and .npy next to the other result files.
+
+Samples are taken on the pool's clock: every sample schedules the next one with
+clock.schedule, so a simulation samples its virtual time at the same interval as a real run.
+"""
+
+import csv
+import numpy as np
+
+SAMPLE_DTYPE = np.dtype([
+  ('time', 'f8'),
+  ('queued', 'i4'),
+  ('searching', 'i4'),
+  ('acceptance_backlog', 'i4'),  # tickets in REQUIRES_ACCEPTANCE
+  ('placing', 'i4'),
+  ('submitted', 'i8'),
+  ('completed', 'i8'),
+  ('failed', 'i8'),
+  ('submissions_per_sec', 'f4'),
+  ('matches_per_sec', 'f4'),
+  ('players_per_sec', 'f4'),
+])
+
+DEFAULT_INTERVAL = 5
+DEFAULT_CAPACITY = 17280  # one day at the default interval
+
+class RingBuffer():
+
+  def __init__(self, capacity, dtype):
+    self.data = np.zeros(capacity, dtype=dtype)
+    self.capacity = capacity
+    self.size = 0
+    self.next = 0
+
+  def append(self, row):
+    self.data[self.next] = row
+    self.next = (self.next + 1) % self.capacity
+    self.size = min(self.size + 1, self.capacity)
+
+  def values(self):
+    """Samples in time order, oldest first"""
+    if self.size < self.capacity:
+      return self.data[:self.size]
+    return np.concatenate((self.data[self.next:], self.data[:self.next]))
+
+class TimeSeriesSampler():
+
+  def __init__(self, realticket, config=None):
+    config = config or {}
+    self.realticket = realticket
+    self.interval = config.get('interval', DEFAULT_INTERVAL)
+    self.samples = RingBuffer(config.get('capacity', DEFAULT_CAPACITY), SAMPLE_DTYPE)
+    self.clock = realticket.clock
+    self._stopped = False
+    self._last = None
+
+  def start(self):
+    self._tick()
+    return self
+
+  def stop(self):
+    """Take the last sample, the tick already scheduled does nothing"""
+    self._stopped = True
+    self.sample()
+
+  def _tick(self):
+    if self._stopped:
+      return
+    self.sample()
+    self.clock.schedule(self.interval, self._tick)
+
+  def sample(self):
+    realticket = self.realticket
+    now = self.clock.time()
+    counts = realticket.tickets.counts()
+    totals = (realticket.submittedTickets, realticket.matches, realticket.matchedPlayers)
+    rates = (0.0, 0.0, 0.0)
+    if self._last is not None and now > self._last[0]:
+      elapsed = now - self._last[0]
+      rates = tuple((current - previous) / elapsed for current, previous in zip(totals, self._last[1]))
+    self._last = (now, totals)
+    self.samples.append((
+      now,
+      counts.get('QUEUED', 0),
+      counts.get('SEARCHING', 0),
+      counts.get('REQUIRES_ACCEPTANCE', 0),
+      counts.get('PLACING', 0),
+      realticket.submittedTickets,
+      len(realticket.completeTickets),
+      len(realticket.failedTickets),
+      rates[0], rates[1], rates[2],
+    ))
+
+  def export(self, basePath):
+    """Write the samples to basePath.csv and basePath.npy, returns the two paths"""
+    values = self.samples.values()
+    np.save(f"{basePath}.npy", values)
+    with open(f"{basePath}.csv", 'w', newline='') as csvFile:
+      writer = csv.writer(csvFile)
+      writer.writerow(SAMPLE_DTYPE.names)
+      writer.writerows(values.tolist())
+    return f"{basePath}.csv", f"{basePath}.npy"
@@ -0,0 +1,133 @@
+"""
+This module provides the rollups and the pass/fail check of long-running soak benchmarks.
+
+A soak run is a population run (see population.py) that lasts hours or days. Finished tickets
+only update constant-size histograms, and every rollupInterval seconds the SoakMonitor closes
+an interval: throughput, time-to-match percentiles, in-flight tickets, resident memory and CPU
+time of the interval are appended to a partial JSON Lines report and kept in a bounded deque.
+At the end of the run, memory growth and CPU cost per ticket are checked against the soak
+thresholds, and the verdict is written to the final report.
+"""
+
+import json, threading, time
+from collections import deque
+import numpy as np
+from .helpers import current_rss_bytes
+from .stats import histogram_percentiles
+
+DEFAULT_ROLLUP_INTERVAL = 60
+DEFAULT_MAX_INTERVALS = 1440
+# Leading share of the intervals ignored by the pass/fail check while caches and pools warm up
+DEFAULT_WARMUP = 0.2
+# Allowed resident memory growth after warm-up, in MB per hour
+DEFAULT_MAX_MEMORY_GROWTH = 50
+# Allowed relative increase of CPU seconds per finished ticket between the first and last third
+DEFAULT_MAX_CPU_GROWTH = 0.25
+
+class SoakMonitor():
+
+  def __init__(self, realticket, config, reportPath):
+    self.realticket = realticket
+    self.interval = config.get('rollupInterval', DEFAULT_ROLLUP_INTERVAL)
+    self.warmup = config.get('warmup', DEFAULT_WARMUP)
+    self.maxMemoryGrowth = config.get('maxMemoryGrowthMB', DEFAULT_MAX_MEMORY_GROWTH)
+    self.maxCpuGrowth = config.get('maxCpuGrowth', DEFAULT_MAX_CPU_GROWTH)
+    self.rollups = deque(maxlen=config.get('maxIntervals', DEFAULT_MAX_INTERVALS))
+    self.partialPath = f"{reportPath}.jsonl"
+    self.reportPath = f"{reportPath}.json"
+    self._stop = threading.Event()
+    self._thread = threading.Thread(target=self._run, daemon=True)
+    self._last = None
+
+  def start(self, rollups=None):
+    if rollups is None:
+      open(self.partialPath, 'w').close()
+    else:
+      # Resumed run: keep the intervals of the interrupted run
+      self.rollups.extend(rollups)
+    self._last = self._totals()
+    self._thread.start()
+    return self
+
+  def stop(self, final=True):
+    """Close the last interval, and judge the run unless it is only interrupted"""
+    self._stop.set()
+    self._thread.join()
+    self.rollup()
+    return self.verdict() if final else None
+
+  def _totals(self):
+    realticket = self.realticket
+    return {
+      'time': time.time(),
+      'cpu': time.process_time(),
+      'submitted': realticket.submittedTickets,
+      'completed': len(realticket.completeTickets),
+      'failed': len(realticket.failedTickets),
+      'matches': realticket.matches,
+      'matchedPlayers': realticket.matchedPlayers,
+      'completedHistogram': realticket.completeTickets.snapshot(),
+      'failedHistogram': realticket.failedTickets.snapshot(),
+    }
+
+  def rollup(self):
+    """Close the current interval, keep its aggregates and append them to the partial report"""
+    totals = self._totals()
+    last, self._last = self._last, totals
+    elapsed = max(totals['time'] - last['time'], 1e-9)
+    completedP50, completedP99 = histogram_percentiles(totals['completedHistogram'] - last['completedHistogram'])
+    rollup = {
+      'start': last['time'],
+      'end': totals['time'],
+      'submitted': totals['submitted'] - last['submitted'],
+      'completed': totals['completed'] - last['completed'],
+      'failed': totals['failed'] - last['failed'],
+      'matchesPerSec': (totals['matches'] - last['matches']) / elapsed,
+      'playersPerSec': (totals['matchedPlayers'] - last['matchedPlayers']) / elapsed,
+      'completedP50': completedP50,
+      'completedP99': completedP99,
+      'inFlight': len(self.realticket.tickets),
+      'rssBytes': current_rss_bytes(),
+      'cpuSeconds': totals['cpu'] - last['cpu'],
+    }
+    self.rollups.append(rollup)
+    with open(self.partialPath, 'a') as partial:
+      partial.write(json.dumps(rollup) + '\n')
+    return rollup
+
+  def verdict(self):
+    """Check memory growth and CPU per ticket after warm-up, write and return the final report"""
+    rollups = list(self.rollups)[int(len(self.rollups) * self.warmup):]
+    report = {
+      'intervals': len(self.rollups),
+      'memoryGrowthMBPerHour': 0.0,
+      'cpuPerTicketGrowth': 0.0,
+      'memoryPassed': True,
+      'cpuPassed': True,
+    }
+    if len(rollups) >= 2:
+      hours = (np.array([rollup['end'] for rollup in rollups]) - rollups[0]['end']) / 3600
+      rss = np.array([rollup['rssBytes'] for rollup in rollups], dtype=np.float64) / 1e6
+      if hours[-1] > 0:
+        report['memoryGrowthMBPerHour'] = float(np.polyfit(hours, rss, 1)[0])
+      report['memoryPassed'] = report['memoryGrowthMBPerHour'] <= self.maxMemoryGrowth
+    if len(rollups) >= 3:
+      third = len(rollups) // 3
+      first = self._cpuPerTicket(rollups[:third])
+      last = self._cpuPerTicket(rollups[-third:])
+      if first > 0:
+        report['cpuPerTicketGrowth'] = last / first - 1
+      report['cpuPassed'] = report['cpuPerTicketGrowth'] <= self.maxCpuGrowth
+    report['passed'] = report['memoryPassed'] and report['cpuPassed']
+    report['rollups'] = list(self.rollups)
+    with open(self.reportPath, 'w') as output:
+      json.dump(report, output, indent=2)
+    return report
+
+  def _cpuPerTicket(self, rollups):
+    tickets = sum(rollup['completed'] + rollup['failed'] for rollup in rollups)
+    return sum(rollup['cpuSeconds'] for rollup in rollups) / tickets if tickets else 0
+
+  def _run(self):
+    while not self._stop.wait(self.interval):
+      self.rollup()
@@ -0,0 +1,108 @@
+"""
+This module provides the containers RealTicket uses for the elapsed times of finished tickets.
+
+ElapsedTimes keeps every value and is used for regular runs. ElapsedHistogram keeps exact
+count, sum, min and max plus log-spaced bins, so memory stays constant however long the run
+is; its percentiles are accurate to about one bin width (~2%). Both expose the same
+append / len / mean / percentiles interface.
+
+LiveHistogram serves displays that ask for the percentiles over and over while a run goes on:
+it bins only the values appended since the previous call, instead of sorting them all again.
+"""
+
+import threading
+import numpy as np
+
+HISTOGRAM_EDGES = np.geomspace(0.01, 100000, 1025)
+
+class ElapsedTimes(list):
+
+  def mean(self):
+    return sum(self) / len(self) if len(self) else 0
+
+  def percentiles(self, q=(50, 99)):
+    if len(self) == 0:
+      return [0.0 for _ in q]
+    return np.percentile(np.asarray(self, dtype=np.float64), q).tolist()
+
+class ElapsedHistogram():
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self.counts = np.zeros(len(HISTOGRAM_EDGES) - 1, dtype=np.int64)
+    self.count = 0
+    self.total = 0.0
+    self.min = None
+    self.max = None
+
+  def __len__(self):
+    return self.count
+
+  def __getstate__(self):
+    state = self.__dict__.copy()
+    del state['_lock']
+    return state
+
+  def __setstate__(self, state):
+    self.__dict__.update(state)
+    self._lock = threading.Lock()
+
+  def append(self, value):
+    index = int(np.searchsorted(HISTOGRAM_EDGES, value, side='right')) - 1
+    with self._lock:
+      self.counts[min(max(index, 0), len(self.counts) - 1)] += 1
+      self.count += 1
+      self.total += value
+      self.min = value if self.min is None else min(self.min, value)
+      self.max = value if self.max is None else max(self.max, value)
+
+  def mean(self):
+    return self.total / self.count if self.count else 0
+
+  def snapshot(self):
+    """Copy of the bin counts, subtract two snapshots to get the histogram of an interval"""
+    with self._lock:
+      return self.counts.copy()
+
+  def percentiles(self, q=(50, 99), counts=None):
+    counts = self.snapshot() if counts is None else counts
+    return histogram_percentiles(counts, q, self.min, self.max)
+
+class LiveHistogram():
+
+  def __init__(self):
+    self.elapsed = None
+
+  def percentiles(self, elapsed, q=(50, 99)):
+    """Percentiles of elapsed (ElapsedTimes or ElapsedHistogram), to about one bin width"""
+    if isinstance(elapsed, ElapsedHistogram):
+      return elapsed.percentiles(q)
+    if elapsed is not self.elapsed:
+      # First call, or the pool swapped its container (resume, soak)
+      self.elapsed = elapsed
+      self.seen = 0
+      self.counts = np.zeros(len(HISTOGRAM_EDGES) - 1, dtype=np.int64)
+      self.min = self.max = None
+    end = len(elapsed)
+    if end > self.seen:
+      values = np.asarray(elapsed[self.seen:end], dtype=np.float64)
+      indexes = np.clip(np.searchsorted(HISTOGRAM_EDGES, values, side='right') - 1, 0, len(self.counts) - 1)
+      self.counts += np.bincount(indexes, minlength=len(self.counts))
+      low, high = float(values.min()), float(values.max())
+      self.min = low if self.min is None else min(self.min, low)
+      self.max = high if self.max is None else max(self.max, high)
+      self.seen = end
+    return histogram_percentiles(self.counts, q, self.min, self.max)
+
+def histogram_percentiles(counts, q=(50, 99), low=None, high=None):
+  """Percentiles of a HISTOGRAM_EDGES histogram, taken at the geometric middle of the bin"""
+  total = counts.sum()
+  if total == 0:
+    return [0.0 for _ in q]
+  cumulative = np.cumsum(counts)
+  indexes = np.searchsorted(cumulative, np.asarray(q, dtype=np.float64) / 100 * total)
+  indexes = np.minimum(indexes, len(counts) - 1)
+  values = np.sqrt(HISTOGRAM_EDGES[indexes] * HISTOGRAM_EDGES[indexes + 1])
+  if low is not None:
+    values = np.clip(values, low, high)
+  return values.tolist()
@@ -0,0 +1,93 @@
+"""
+Shared setup of the tests: Multi-pools on the import path, and stand-ins for the state the
+simulator keeps relative to the working directory (tempdb.ini, checkpoints).
+"""
+
+import json, os, shutil, sys
+from types import SimpleNamespace
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MULTI_POOLS = os.path.join(REPO, 'Multi-pools')
+sys.path.insert(0, MULTI_POOLS)
+
+@pytest.fixture
+def tempdb(tmp_path, monkeypatch):
+  """A copy of tempdb.ini under tmp_path that the helpers read and write instead of the repo's"""
+  from ticket import helpers
+  import deployment
+  path = tmp_path / 'tempdb.ini'
+  shutil.copy(os.path.join(MULTI_POOLS, 'tempdb.ini'), path)
+  monkeypatch.setattr(helpers, 'TempDbFilePath', str(path))
+  monkeypatch.setattr(deployment, 'TempDbFilePath', str(path))
+  helpers.TempDbParser.clear()
+  yield path
+  helpers.TempDbParser.clear()
+
+@pytest.fixture
+def config():
+  with open(os.path.join(MULTI_POOLS, 'Configs', 'config.json')) as configFile:
+    return json.load(configFile)
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+  """tmp_path as the working directory: rulesets are read relative to it, results are written there"""
+  os.makedirs(tmp_path / 'Multi-pools', exist_ok=True)
+  os.symlink(os.path.join(MULTI_POOLS, 'Configs'), tmp_path / 'Multi-pools' / 'Configs')
+  monkeypatch.chdir(tmp_path)
+  return tmp_path
+
+class LocalResults():
+  """LocalDynamoDB behind the resource interface -result uses, filled by the lambda's own writer"""
+
+  def __init__(self, tableName, shards):
+    from local.dynamodb import LocalDynamoDB, load_lambda
+    self.table = LocalDynamoDB(tableName, {'billingMode': 'PAY_PER_REQUEST', 'warmWriteUnits': None})
+    self.lambda_function = load_lambda()
+    self.shards = shards
+    self.queries = 0
+    self.meta = SimpleNamespace(client=self)
+    self.tables = SimpleNamespace(all=lambda: [SimpleNamespace(name=tableName)])
+
+  def query(self, **kwargs):
+    self.queries += 1
+    return self.table.query(**kwargs)
+
+  def batch_write_item(self, RequestItems):
+    return self.table.batch_write_item(RequestItems)
+
+  def store(self, ticketIds, event, eventTime, startTime='2024-01-01T00:00:00.000Z', matchId=None):
+    """Write the notification of ticketIds as the deployed lambda does"""
+    tickets = [{'ticketId': ticketId, 'startTime': startTime, 'players': [{'playerId': f"player-{ticketId}"}]} for ticketId in ticketIds]
+    items = self.lambda_function.result_items(tickets, eventTime, event, self.shards, matchId)
+    self.lambda_function.write_items(self, self.table.tableName, items, sleep=self.table.sleep)
+    return items
+
+@pytest.fixture
+def local_results(tempdb):
+  """A sharded LocalResults table, recorded in tempdb.ini as the result table of the benchmark"""
+  from ticket.helpers import wrtieTempDb
+  results = LocalResults('local-results', 4)
+  wrtieTempDb('dynamodb', 'table', results.table.tableName)
+  wrtieTempDb('dynamodb', 'shards', str(results.shards))
+  return results
+
+@pytest.fixture
+def simulate(tempdb, workdir, config):
+  """Run a benchmark of the given pools against LocalGameLift on a virtual clock, in tmp_path"""
+  from ticket.clock import Simulation
+  from ticket.main_ticket import MainTicket
+  from local.gamelift import LocalGameLift
+
+  def run(names, players, population=None, **benchmark):
+    benchmark = dict(config['benchmark'], console='quiet', **benchmark)
+    if population is not None:
+      benchmark['population'] = dict(benchmark['population'], enabled=True, **population)
+    clock = Simulation(benchmark['simulation'].get('seed', 0))
+    mainTicket = MainTicket()
+    for name in names:
+      mainTicket.loadMatchMaking(name)
+    gamelift = LocalGameLift(clock, config['flexmatch'], benchmark['simulation'])
+    mainTicket.startMatchmaking(players, gamelift, None, 'polling', config['sample'], benchmark, clock=clock)
+    return mainTicket
+  return run
@@ -0,0 +1,46 @@
+"""
+A burst benchmark on the real clock against a GameLift stand-in that completes every ticket
+shortly after it is described, run as `python resume_job.py start|resume` from a scratch
+working directory by test_checkpoint.py, which kills it halfway and resumes it.
+"""
+
+import json, os, sys, time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Multi-pools'))
+from ticket import real_ticket
+from ticket.main_ticket import main_ticket
+
+CONFIGURATION = 'Radiant-Dire-Classic-1'
+PLAYERS = 60
+MATCH_TIME = 0.3
+
+class StatelessGameLift():
+  """Tickets it does not know (submitted by a killed process) are completed right away"""
+
+  def __init__(self):
+    self.started = {}
+
+  def start_matchmaking(self, TicketId, ConfigurationName, Players):
+    self.started[TicketId] = (time.time(), Players)
+    return {'MatchmakingTicket': {'TicketId': TicketId, 'Status': 'QUEUED'}}
+
+  def describe_matchmaking(self, TicketIds):
+    tickets = []
+    for ticketId in TicketIds:
+      start, players = self.started.get(ticketId, (time.time() - MATCH_TIME, [{'PlayerId': f'{ticketId}-0'}]))
+      done = time.time() - start >= MATCH_TIME
+      ticket = {'TicketId': ticketId, 'ConfigurationName': CONFIGURATION, 'Status': 'COMPLETED' if done else 'SEARCHING',
+                'StartTime': datetime.fromtimestamp(start, timezone.utc), 'Players': players}
+      if done:
+        ticket['EndTime'] = datetime.fromtimestamp(start + MATCH_TIME, timezone.utc)
+      tickets.append(ticket)
+    return {'TicketList': tickets}
+
+if __name__ == '__main__':
+  config = json.load(open(sys.argv[2]))
+  benchmark = dict(config['benchmark'], console='quiet', checkpoint={'interval': 0.2}, sampler={'interval': 1, 'capacity': 16})
+  # Parties every 0.1 seconds instead of seconds apart
+  real_ticket.RealTicket.pause = lambda self, seconds: self.stopEvent.wait(0.1)
+  main_ticket.loadMatchMaking(CONFIGURATION)
+  main_ticket.startMatchmaking(PLAYERS, StatelessGameLift(), None, 'polling', config['sample'], benchmark, resume=sys.argv[1] == 'resume')
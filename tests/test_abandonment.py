@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+from ticket.abandonment import AbandonmentLoad, HORIZON_TIMEOUTS
+from ticket.counters import ShardedCounters
+from ticket.registry import TicketRegistry
+from ticket.stats import ElapsedHistogram
+
+class StoppingGameLift():
+
+  def __init__(self):
+    self.stopped = []
+
+  def stop_matchmaking(self, TicketId):
+    self.stopped.append(TicketId)
+    return {}
+
+def _realticket():
+  return SimpleNamespace(tickets=TicketRegistry(), counters=ShardedCounters(), gamelift=StoppingGameLift(),
+                         poller=SimpleNamespace(requestTimeout=100), acceptance={'timeout': 10},
+                         machmakingConfigurationName='pool')
+
+def _ticket(ticketId, start, end):
+  return {'TicketId': ticketId, 'StartTime': f'2024-01-01T00:00:{start:02d}+00:00', 'EndTime': f'2024-01-01T00:00:{end:02d}+00:00'}
+
+def test_only_searching_tickets_are_stopped():
+  realticket = _realticket()
+  load = AbandonmentLoad(realticket, {'share': 1, 'patience': {'default': {'median': 10, 'sigma': 0.01, 'min': 1}}})
+  for ticketId, status in (('searching', 'SEARCHING'), ('offered', 'REQUIRES_ACCEPTANCE')):
+    realticket.tickets.add(ticketId, 1, [], status, 0)
+    load.submitted(ticketId, 1, 0)
+  load.cancelDue(5)
+  assert realticket.gamelift.stopped == []
+  load.cancelDue(20)
+  assert realticket.gamelift.stopped == ['searching']
+  assert realticket.counters.get('abandonment.spared') == 1
+  load.failed('searching', 'CANCELLED', 12.0)
+  assert load.summary()['cancelledTickets'] == 1
+  assert load.requested == {}
+
+def test_remaining_tickets_are_split_by_overlapping_cancellations():
+  realticket = _realticket()
+  load = AbandonmentLoad(realticket, {})
+  start = 1704067200.0
+  load.cancelTimes = [start + 10]
+  load.completed(_ticket('during', 5, 15), 10.0)
+  load.completed(_ticket('after', 11, 20), 9.0)
+  assert list(load.remainingUnderCancels) == [10.0]
+  assert list(load.remainingWithoutCancels) == [9.0]
+
+def test_cancel_times_stay_within_the_horizon():
+  realticket = _realticket()
+  load = AbandonmentLoad(realticket, {'share': 1}, bounded=True)
+  horizon = HORIZON_TIMEOUTS * 100 + 10
+  for second in range(20000):
+    ticketId = f't{second}'
+    realticket.tickets.add(ticketId, 1, [], 'SEARCHING', second)
+    load.due.append((second, second, ticketId))
+    load.cancelDue(second)
+    realticket.tickets.remove(ticketId)
+  assert len(load.cancelTimes) <= 2 * horizon + 1
+  assert load.cancelTimes[-1] == 19999
+  # Stopped tickets that matched or timed out anyway are forgotten as well
+  assert len(load.requested) == 20000
+  for second in range(20000):
+    load.failed(f't{second}', 'TIMED_OUT', 1.0)
+  assert load.requested == {} and isinstance(load.cancelledTimes, ElapsedHistogram)
+
+def test_simulated_parties_give_up(simulate):
+  patience = {'default': {'median': 30, 'sigma': 0.5, 'min': 5}}
+  mainTicket = simulate(['Radiant-Dire-Classic-1'], 600, abandonment={'enabled': True, 'share': 0.5, 'patience': patience})
+  summary = mainTicket.realtickets[0].abandonment.summary()
+  statuses = mainTicket.realtickets[0].counters.values()
+  assert summary['cancelledTickets'] > 0
+  assert summary['cancelledTickets'] == statuses.get('status.CANCELLED', 0)
+  assert 0 < summary['cancellationRate'] < 1
+  assert summary['remainingUnderCancels']['count'] + summary['remainingWithoutCancels']['count'] == statuses['status.COMPLETED']
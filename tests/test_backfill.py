@@ -0,0 +1,92 @@
+import pickle, random
+from types import SimpleNamespace
+from ticket import backfill as backfill_module
+from ticket.backfill import BackfillLoad
+from ticket.counters import ShardedCounters
+from ticket.helpers import match_key
+from ticket.registry import TicketRegistry
+
+class BackfillGameLift():
+
+  def __init__(self):
+    self.requests = []
+
+  def start_match_backfill(self, TicketId, ConfigurationName, Players, GameSessionArn=None):
+    self.requests.append((TicketId, GameSessionArn, Players))
+    return {'MatchmakingTicket': {'TicketId': TicketId, 'Status': 'QUEUED'}}
+
+def _realticket():
+  return SimpleNamespace(tickets=TicketRegistry(), counters=ShardedCounters(), gamelift=BackfillGameLift(),
+                         clock=SimpleNamespace(time=lambda: 100.0), end_time=None, ticketPrefix='bench', benchmarkId='0001',
+                         machmakingConfigurationName='pool', firstPoll=lambda now: now + 1)
+
+def _ticket(ticketId, matched, players):
+  """A COMPLETED ticket as STANDALONE FlexMatch describes it: its matched players, no game session ARN"""
+  return {'TicketId': ticketId, 'Status': 'COMPLETED', 'Players': players,
+          'GameSessionConnectionInfo': {'MatchedPlayerSessions': [{'PlayerId': playerId} for playerId in matched]}}
+
+def _players(team, *ids):
+  return [{'PlayerId': playerId, 'Team': team} for playerId in ids]
+
+def test_completed_sessions_are_backfilled_with_the_players_who_stayed():
+  random.seed(0)
+  realticket = _realticket()
+  load = BackfillLoad(realticket, {'rate': 1, 'departed': {'min': 1, 'max': 1}, 'delay': {'min': 10, 'max': 10}})
+  first = ('p1', 'p2', 'p3', 'p4')
+  load.completed(_ticket('a', first, _players('red', 'p1', 'p2')), 30.0)
+  load.completed(_ticket('b', first, _players('blue', 'p3', 'p4')), 31.0)
+  matchId = match_key(_ticket('a', first, []))
+  assert len(load.due) == 1 and len(load.sessions[matchId]) == 4
+  load.submitDue(105)
+  assert realticket.gamelift.requests == []
+  load.submitDue(110)
+  [(ticketId, arn, staying)] = realticket.gamelift.requests
+  assert arn is None and len(staying) == 3
+  assert ticketId.startswith('bench-0001-backfill-') and load.owns(ticketId) and ticketId in realticket.tickets
+  assert load.sessions[matchId] is None and realticket.counters.get('backfill.departedPlayers') == 1
+  # New tickets completing now are measured under backfill load
+  load.completed(_ticket('c', ('p5', 'p6'), _players('red', 'p5')), 40.0)
+  load.handle({'Status': 'SEARCHING'}, ticketId)
+  assert realticket.tickets.get(ticketId).status == 'SEARCHING'
+  refilled = tuple(player['PlayerId'] for player in staying) + ('p7',)
+  load.handle(dict(_ticket(ticketId, refilled, staying), ConfigurationName='pool', StartTime='2024-01-01T00:00:00.000Z',
+                   EndTime='2024-01-01T00:00:12.000Z'), ticketId)
+  # The player who joined is in the refilled match, which is not backfilled again
+  load.completed(_ticket('d', refilled, _players('red', 'p7')), 12.0)
+  assert load.sessions[match_key(_ticket('d', refilled, []))] is None
+  summary = load.summary()
+  assert summary['filled'] == 1 and summary['timeToFill']['mean'] == 12.0
+  assert summary['newTicketsUnderBackfill']['count'] == 1 and summary['newTicketsWithoutBackfill']['count'] == 3
+  assert not load.owns(ticketId) and ticketId not in realticket.tickets
+
+def test_no_backfill_after_the_submissions_are_over():
+  realticket = _realticket()
+  load = BackfillLoad(realticket, {'rate': 1})
+  load.completed(_ticket('a', ('p1', 'p2'), _players('red', 'p1', 'p2')), 30.0)
+  # Tickets without matched players or teams are only measured
+  load.completed({'TicketId': 'b', 'Players': _players('red', 'p3')}, 30.0)
+  load.completed(_ticket('c', ('p4',), [{'PlayerId': 'p4'}]), 30.0)
+  # A game session ARN, when there is one, identifies the match as well
+  load.completed({'TicketId': 'e', 'Players': _players('red', 'p5'), 'GameSessionConnectionInfo': {'GameSessionArn': 'arn:session/5'}}, 30.0)
+  assert list(load.sessions) == [match_key(_ticket('a', ('p1', 'p2'), [])), match_key({'GameSessionConnectionInfo': {'GameSessionArn': 'arn:session/5'}})]
+  realticket.end_time = 50
+  load.submitDue(10000)
+  assert load.due == [] and realticket.gamelift.requests == []
+
+def test_sessions_are_bounded_and_pickle(monkeypatch):
+  monkeypatch.setattr(backfill_module, 'RECENT_SESSIONS', 10)
+  load = BackfillLoad(_realticket(), {'rate': 0})
+  for index in range(25):
+    load.completed(_ticket(f't{index}', (f'p{index}',), _players('red', f'p{index}')), 1.0)
+  assert list(load.sessions) == [match_key(_ticket('', (f'p{index}',), [])) for index in range(15, 25)]
+  restored = pickle.loads(pickle.dumps(load))
+  assert restored.realticket is None and list(restored.sessions) == list(load.sessions)
+
+def test_simulated_backfill(simulate, config):
+  settings = dict(config['benchmark']['backfill'], enabled=True, rate=1, delay={'min': 5, 'max': 10})
+  mainTicket = simulate(['Radiant-Dire-Classic-1'], 600, backfill=settings)
+  realticket = mainTicket.realtickets[0]
+  summary = realticket.backfill.summary()
+  assert realticket.counters.get('backfill.submitted') > 0
+  assert summary['filled'] + summary['failed'] == realticket.counters.get('backfill.submitted')
+  assert summary['filled'] > 0
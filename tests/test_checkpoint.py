@@ -0,0 +1,79 @@
+import os, shutil, signal, subprocess, sys, time
+import numpy as np
+from conftest import MULTI_POOLS
+from ticket.result_writer import ResultWriter, load_results
+
+JOB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resume_job.py')
+
+def _write(writer, ticketIds):
+  for ticketId in ticketIds:
+    writer.write(ticketId, 'pool', ['Classic'], 1, 0.0, 1.0, 'COMPLETED', 1.0)
+
+def test_append_keeps_checkpointed_rows_only(tmp_path):
+  basePath = str(tmp_path / 'results')
+  writer = ResultWriter(basePath).start()
+  _write(writer, ['a', 'b', 'c'])
+  writer.sync()
+  checkpointed = writer.queued
+  _write(writer, ['d', 'e'])
+  writer.sync()
+  # Killed before close: the header still counts 0 rows, and d, e are reported again by the resumed run
+  with open(writer.npyPath, 'rb') as npyFile:
+    np.lib.format.read_magic(npyFile)
+    assert np.lib.format.read_array_header_1_0(npyFile)[0] == (0,)
+
+  resumed = ResultWriter(basePath, append=True, rows=checkpointed).start()
+  assert resumed.queued == 3
+  _write(resumed, ['d', 'e', 'f'])
+  resumed.close()
+  assert load_results(resumed.npyPath)['ticket_id'].tolist() == [b'a', b'b', b'c', b'd', b'e', b'f']
+  with open(resumed.csvPath) as csvFile:
+    assert [line.split(',')[0] for line in csvFile.read().splitlines()] == ['ticket_id', 'a', 'b', 'c', 'd', 'e', 'f']
+
+def test_append_without_count_drops_partial_rows(tmp_path):
+  basePath = str(tmp_path / 'events')
+  writer = ResultWriter(basePath).start()
+  _write(writer, ['a', 'b'])
+  writer.close()
+  with open(writer.npyPath, 'ab') as npyFile:
+    npyFile.write(b'\0' * 7)
+  with open(writer.csvPath, 'a') as csvFile:
+    csvFile.write('c,po')
+  resumed = ResultWriter(basePath, append=True).start()
+  _write(resumed, ['c'])
+  resumed.close()
+  assert load_results(resumed.npyPath)['ticket_id'].tolist() == [b'a', b'b', b'c']
+  with open(resumed.csvPath) as csvFile:
+    assert len(csvFile.read().splitlines()) == 4
+
+def test_killed_run_resumes_with_every_ticket_once(tmp_path):
+  os.makedirs(tmp_path / 'Multi-pools')
+  shutil.copy(os.path.join(MULTI_POOLS, 'tempdb.ini'), tmp_path / 'Multi-pools' / 'tempdb.ini')
+  config = os.path.join(MULTI_POOLS, 'Configs', 'config.json')
+  state = tmp_path / 'Multi-pools' / 'checkpoints' / 'Radiant-Dire-Classic-1.state.pkl'
+
+  job = subprocess.Popen([sys.executable, JOB, 'start', config], cwd=tmp_path, stdout=subprocess.DEVNULL)
+  deadline = time.time() + 30
+  while not state.exists() and time.time() < deadline:
+    time.sleep(0.05)
+  assert state.exists(), "no checkpoint was written"
+  # Let tickets finish after the checkpoint, their rows must not be counted twice
+  time.sleep(0.7)
+  assert job.poll() is None, "the run ended before it could be killed"
+  job.send_signal(signal.SIGKILL)
+  job.wait()
+
+  subprocess.run([sys.executable, JOB, 'resume', config], cwd=tmp_path, stdout=subprocess.DEVNULL, check=True, timeout=120)
+  stem = [name for name in os.listdir(tmp_path) if name.endswith('-players.npy')][0][:-len('-players.npy')]
+  results = np.load(tmp_path / f'{stem}.npy')
+  players = np.load(tmp_path / f'{stem}-players.npy')
+  matches = np.load(tmp_path / f'{stem}-matches.npy')
+  ticketIds = results['ticket_id'].tolist()
+  assert len(ticketIds) == len(set(ticketIds))
+  # Every submitted party once, every player once, and every ticket finished once
+  assert len(players) == 60
+  assert len(set(players['player_id'].tolist())) == 60
+  assert set(ticketIds) == set(players['ticket_id'].tolist())
+  assert len(matches) == len(set(zip(matches['ticket_id'].tolist(), matches['player_id'].tolist())))
+  with open(tmp_path / f'{stem}.csv') as csvFile:
+    assert len(csvFile.read().splitlines()) == len(ticketIds) + 1
@@ -0,0 +1,73 @@
+import logging, random
+import numpy as np
+import pytest
+from ticket.console import Dashboard, setup_logging, stop_logging
+from ticket.stats import ElapsedTimes, ElapsedHistogram, LiveHistogram
+from ticket.registry import TicketRegistry
+
+class _Pool():
+  machmakingConfigurationName = 'pool'
+  submittedTickets = 0
+
+  def __init__(self):
+    self.tickets = TicketRegistry()
+    self.completeTickets = ElapsedTimes()
+    self.failedTickets = ElapsedTimes()
+
+def test_detail_goes_to_the_file_and_warnings_to_the_console(tmp_path, monkeypatch, capsys):
+  monkeypatch.chdir(tmp_path)
+  detailPath = setup_logging({'logs': 'results.log', 'console': 'dashboard'})
+  logger = logging.getLogger('ticket.pool')
+  logger.info('ticket t-1 COMPLETED')
+  logger.warning('ticket t-2 TIMED_OUT')
+  stop_logging()
+  with open(detailPath) as detail:
+    lines = detail.read().splitlines()
+  assert detailPath == f"{tmp_path}/results-detail.log"
+  assert len(lines) == 2 and lines[0].endswith('ticket t-1 COMPLETED')
+  assert capsys.readouterr().out == 'ticket t-2 TIMED_OUT\n'
+
+def test_dashboard_line_per_pool():
+  pool = _Pool()
+  pool.submittedTickets = 1003
+  pool.completeTickets.extend(np.linspace(1, 100, 1000).tolist())
+  pool.failedTickets.append(120.0)
+  pool.tickets.add('t-1', 1, [], 'SEARCHING', 0)
+  pool.tickets.add('t-2', 1, [], 'PLACING', 0)
+  lines = Dashboard([pool], {'console': 'quiet'}).lines()
+  assert lines[0].split() == ['pool', 'submitted', 'searching', 'placing', 'completed', 'failed', 'p50', 'p99']
+  assert lines[1].split()[:6] == ['pool', '1003', '1', '1', '1000', '1']
+
+def test_live_histogram_follows_appends():
+  rng = random.Random(7)
+  elapsed = ElapsedTimes()
+  histogram = LiveHistogram()
+  for _ in range(5):
+    elapsed.extend(rng.lognormvariate(3, 1) for _ in range(2000))
+    p50, p99 = histogram.percentiles(elapsed)
+    exact = elapsed.percentiles()
+    assert p50 == pytest.approx(exact[0], rel=0.03)
+    assert p99 == pytest.approx(exact[1], rel=0.03)
+  assert histogram.seen == len(elapsed) and histogram.counts.sum() == len(elapsed)
+
+def test_live_histogram_restarts_on_a_new_container():
+  histogram = LiveHistogram()
+  assert histogram.percentiles(ElapsedTimes()) == [0.0, 0.0]
+  histogram.percentiles(ElapsedTimes([1.0] * 10))
+  replaced = ElapsedTimes([50.0])
+  assert histogram.percentiles(replaced) == [50.0, 50.0]
+  bounded = ElapsedHistogram()
+  bounded.append(3.0)
+  assert histogram.percentiles(bounded) == bounded.percentiles()
+
+def test_dashboard_lines_do_not_sort_on_redraw(monkeypatch):
+  pool = _Pool()
+  pool.completeTickets.extend(np.linspace(1, 100, 1000).tolist())
+  dashboard = Dashboard([pool], {'console': 'quiet'})
+  monkeypatch.setattr(ElapsedTimes, 'percentiles', lambda self, q=(50, 99): pytest.fail('sorted on redraw'))
+  first = dashboard.lines()[1].split()
+  pool.completeTickets.append(100.0)
+  second = dashboard.lines()[1].split()
+  assert first[4] == '1000' and second[4] == '1001'
+  assert float(second[-2]) == pytest.approx(50.5, rel=0.03)
+  assert float(second[-1]) == pytest.approx(99, rel=0.03)
@@ -0,0 +1,48 @@
+import glob, json, pickle, threading
+from ticket.counters import ShardedCounters, error_name, RUN_SUMMARY_VERSION
+
+def test_threads_count_without_losing_updates():
+  counters = ShardedCounters()
+  def worker():
+    for _ in range(20000):
+      counters.add('submitted')
+      counters.add('status.COMPLETED', 2)
+  threads = [threading.Thread(target=worker) for _ in range(8)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  assert counters.get('submitted') == 160000
+  assert counters.values() == {'submitted': 160000, 'status.COMPLETED': 320000}
+  # One shard per thread, plus the one of restored values
+  assert len(counters._shards) == 9
+
+def test_counters_survive_a_checkpoint():
+  counters = ShardedCounters({'submitted': 5})
+  counters.add('submitted')
+  restored = pickle.loads(pickle.dumps(counters))
+  restored.add('submitted', 4)
+  assert restored.get('submitted') == 10 and restored.get('missing') == 0
+
+def test_error_names():
+  throttled = Exception('slow down')
+  throttled.response = {'Error': {'Code': 'ThrottlingException'}}
+  assert error_name(throttled) == 'ThrottlingException'
+  assert error_name(ValueError('bad')) == 'ValueError'
+
+def test_run_summary_merges_the_pools(simulate):
+  mainTicket = simulate(['Radiant-Dire-Classic-1', 'Radiant-Dire-All'], 300)
+  [path] = glob.glob('output-run-*-summary.json')
+  with open(path) as output:
+    summary = json.load(output)
+  assert summary['version'] == RUN_SUMMARY_VERSION and summary['simulation']['events'] > 0
+  pools = summary['pools']
+  assert set(pools) == {'Radiant-Dire-Classic-1', 'Radiant-Dire-All'}
+  for key in ('submitted', 'completed', 'failed', 'matches', 'matchedPlayers'):
+    assert summary['totals'][key] == sum(pool[key] for pool in pools.values())
+  for realticket in mainTicket.realtickets:
+    pool = pools[realticket.machmakingConfigurationName]
+    assert pool['completed'] == len(realticket.completeTickets) and pool['digest'] == realticket.digest.hexdigest()
+    assert sum(pool['statuses'].get(status, 0) for status in ('COMPLETED', 'FAILED', 'CANCELLED', 'TIMED_OUT')) == pool['completed'] + pool['failed']
+    assert pool['timeToMatch']['count'] == pool['completed'] and pool['timeToMatch']['p50'] <= pool['timeToMatch']['p99']
+    assert pool['polling']['calls'] > 0
@@ -0,0 +1,56 @@
+import json, os, subprocess, sys, threading, time
+from conftest import MULTI_POOLS
+from resume_job import StatelessGameLift
+from daemon import Job, parse_option
+import ticket.main_ticket as main_ticket_module
+from ticket.main_ticket import MainTicket
+
+def test_parse_option():
+  assert parse_option('-benchmark=200') == ('benchmark', '200')
+  assert parse_option('-result') == ('result', None)
+  assert parse_option('-flexmatch=a=b') == ('flexmatch', 'a=b')
+
+def test_cancel_stops_the_party_router(tempdb, tmp_path, monkeypatch):
+  monkeypatch.chdir(tmp_path)
+  config = json.load(open(os.path.join(MULTI_POOLS, 'Configs', 'config.json')))
+  # A stream that would take hours: one party every 5 seconds
+  benchmark = dict(config['benchmark'], console='quiet', router={'enabled': True, 'interval': {'min': 5, 'max': 5}})
+  mainTicket = MainTicket()
+  monkeypatch.setattr(main_ticket_module, 'main_ticket', mainTicket)
+  for name in ('Radiant-Dire-Classic-1', 'Radiant-Dire-All'):
+    mainTicket.loadMatchMaking(name)
+
+  job = Job(['-benchmark=1000'])
+  threading.Timer(1, job.cancel).start()
+  start = time.time()
+  mainTicket.startMatchmaking(1000, StatelessGameLift(), None, 'polling', config['sample'], benchmark)
+  assert time.time() - start < 15
+  assert mainTicket.router is None
+  assert all(realticket.stopEvent.is_set() for realticket in mainTicket.realtickets)
+
+def test_jobs_run_in_a_warm_daemon(workdir, capsys):
+  from daemon import request
+  socketPath = str(workdir / 'Multi-pools' / 'daemon.sock')
+  server = subprocess.Popen([sys.executable, os.path.join(MULTI_POOLS, 'main.py'), '-daemon'], cwd=workdir,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+  try:
+    deadline = time.time() + 30
+    while request(socketPath, {'command': 'status'}, quiet=True) is None:
+      assert time.time() < deadline and server.poll() is None, "the daemon did not start"
+      time.sleep(0.1)
+    for _ in range(2):
+      reply = request(socketPath, {'command': 'run', 'args': ['-print', 'oops', '-nothing']})
+      assert reply['status'] == 'ok'
+    output = capsys.readouterr().out
+    assert output.count("'benchmark'") == 2
+    assert 'Invalid Argument: oops' in output and 'Unknown option for the daemon: -nothing' in output
+    status = request(socketPath, {'command': 'status'}, quiet=True)
+    assert status['completed'] == 2 and status['running'] is None
+    # Clients are created once, when the daemon warms up
+    assert 'client gamelift' in status['clients']
+    assert request(socketPath, {'command': 'stop'}, quiet=True)['status'] == 'ok'
+    server.wait(timeout=15)
+  finally:
+    if server.poll() is None:
+      server.kill()
+  assert not os.path.exists(socketPath)
@@ -0,0 +1,108 @@
+import zipfile
+import pytest
+import deployment
+from deployment import content_hash, package_hash, load_deployment, save_deployment, drop_deployment, changed_parts
+
+class RecordingGameLift():
+  """The matchmaking configuration calls of -flexmatch, answered from memory and recorded"""
+
+  def __init__(self):
+    self.calls = []
+    self.configurations = {}
+
+  def describe_matchmaking_configurations(self, Names):
+    self.calls.append('describe')
+    return {'Configurations': [self.configurations[name] for name in Names if name in self.configurations]}
+
+  def create_matchmaking_rule_set(self, Name, RuleSetBody, Tags):
+    self.calls.append('create_rule_set')
+    return {'RuleSet': {'RuleSetArn': f"arn:aws:gamelift:local::matchmakingruleset/{Name}"}}
+
+  def delete_matchmaking_rule_set(self, Name):
+    self.calls.append('delete_rule_set')
+
+  def create_matchmaking_configuration(self, Name, RuleSetName, CustomEventData, **kwargs):
+    self.calls.append('create_configuration')
+    return self._store(Name, RuleSetName, CustomEventData)
+
+  def update_matchmaking_configuration(self, Name, RuleSetName, CustomEventData, **kwargs):
+    self.calls.append('update_configuration')
+    return self._store(Name, RuleSetName, CustomEventData)
+
+  def _store(self, name, rulesetName, customEventData):
+    configuration = {'Name': name, 'RuleSetName': rulesetName, 'CustomEventData': customEventData,
+                     'ConfigurationArn': f"arn:aws:gamelift:local::matchmakingconfiguration/{name}"}
+    self.configurations[name] = configuration
+    return {'Configuration': configuration}
+
+@pytest.fixture
+def deploy(tempdb, workdir, config):
+  """-flexmatch of one polling configuration against a RecordingGameLift, returns the calls it made"""
+  from infra import Infra
+  gamelift = RecordingGameLift()
+
+  def run(surffix, **changes):
+    configuration = dict(next(c for c in config['flexmatch']['configurations'] if c['name'] == 'Radiant-Dire-Classic-1'), **changes)
+    gamelift.calls = []
+    Infra(configuration, 'polling', gamelift, None, None, None, None, config['benchmark']).matchmaking_configurations('polling', surffix)
+    return gamelift.calls
+  run.gamelift = gamelift
+  return run
+
+def test_content_hash_ignores_key_order():
+  assert content_hash({'a': 1, 'b': [1, 2]}) == content_hash({'b': [1, 2], 'a': 1})
+  assert content_hash({'a': 1}) != content_hash({'a': 2})
+  assert len(content_hash({})) == 16
+
+def test_package_hash_ignores_timestamps(tmp_path):
+  def package(name, date_time, body):
+    path = tmp_path / name
+    with zipfile.ZipFile(path, 'w') as archive:
+      archive.writestr(zipfile.ZipInfo('lambda_function.py', date_time), body)
+    return path
+  first = package_hash(package('first.zip', (2024, 1, 1, 0, 0, 0), 'print(1)'))
+  assert package_hash(package('rebuilt.zip', (2025, 6, 1, 12, 0, 0), 'print(1)')) == first
+  assert package_hash(package('changed.zip', (2024, 1, 1, 0, 0, 0), 'print(2)')) != first
+
+def test_entries_round_trip_through_tempdb(tempdb):
+  assert load_deployment('Radiant-Dire-Classic-1') == {}
+  save_deployment('Radiant-Dire-Classic-1', {'ruleset': 'abc', 'arns': ['arn:1']})
+  deployment.TempDbParser.clear()
+  assert load_deployment('Radiant-Dire-Classic-1') == {'ruleset': 'abc', 'arns': ['arn:1']}
+  assert '[deployment]' in tempdb.read_text()
+  drop_deployment('Radiant-Dire-Classic-1')
+  assert load_deployment('Radiant-Dire-Classic-1') == {}
+  # Dropping what is not there is a no-op
+  drop_deployment('Radiant-Dire-Classic-1')
+
+def test_changed_parts():
+  hashes = {'ruleset': 'r1', 'configuration': 'c1', 'table': None, 'lambda': None}
+  assert changed_parts(hashes, {}) == ['ruleset', 'configuration']
+  assert changed_parts(hashes, {'ruleset': 'r1', 'configuration': 'c1'}) == []
+  assert changed_parts(dict(hashes, ruleset='r2'), {'ruleset': 'r1', 'configuration': 'c1'}) == ['ruleset']
+
+def test_unchanged_configuration_costs_one_describe(deploy):
+  assert deploy(1) == ['describe', 'create_rule_set', 'create_configuration']
+  entry = load_deployment('Radiant-Dire-Classic-1')
+  assert entry['rulesetName'] == 'RadiantDire-Classic-1-1' and entry['table'] is None
+  assert deploy(2) == ['describe']
+  assert load_deployment('Radiant-Dire-Classic-1') == entry
+
+def test_only_the_changed_parts_are_deployed(deploy):
+  deploy(1)
+  # New acceptance settings update the configuration, the ruleset is kept
+  assert deploy(2, acceptance=40) == ['describe', 'update_configuration']
+  entry = load_deployment('Radiant-Dire-Classic-1')
+  assert entry['rulesetName'] == 'RadiantDire-Classic-1-1'
+  assert any(arn.endswith('matchmakingruleset/RadiantDire-Classic-1-1') for arn in entry['arns'])
+  # Another ruleset body creates a ruleset and deletes the one it replaces
+  assert deploy(3, acceptance=40, ruleset='RadiantDire-Practice') == ['describe', 'create_rule_set', 'update_configuration', 'delete_rule_set']
+  entry = load_deployment('Radiant-Dire-Classic-1')
+  assert entry['rulesetName'] == 'RadiantDire-Practice-3'
+  assert not any(arn.endswith('matchmakingruleset/RadiantDire-Classic-1-1') for arn in entry['arns'])
+
+def test_drift_deploys_everything(deploy):
+  deploy(1)
+  deploy.gamelift.configurations['Radiant-Dire-Classic-1']['RuleSetName'] = 'edited-in-the-console'
+  assert deploy(2) == ['describe', 'create_rule_set', 'update_configuration', 'delete_rule_set']
+  assert load_deployment('Radiant-Dire-Classic-1')['rulesetName'] == 'RadiantDire-Classic-1-2'
@@ -0,0 +1,53 @@
+import importlib.util, json, os
+import pytest
+from conftest import MULTI_POOLS
+
+@pytest.fixture
+def hotpaths(tmp_path, monkeypatch):
+  spec = importlib.util.spec_from_file_location('hotpaths', os.path.join(MULTI_POOLS, 'benchmarks', 'hotpaths.py'))
+  module = importlib.util.module_from_spec(spec)
+  spec.loader.exec_module(module)
+  monkeypatch.setattr(module, 'BASELINES_PATH', str(tmp_path / 'baselines.json'))
+  return module
+
+def _result(throughput):
+  return {'throughput': throughput, 'unit': 'players/s', 'seconds': 1 / throughput}
+
+def test_baselines_are_kept_per_host(hotpaths):
+  hotpaths.write_baselines('fast', {'case/1k': _result(1000)}, 0.3)
+  hotpaths.write_baselines('slow', {'case/1k': _result(100)}, 0.3)
+  assert hotpaths.read_baselines('fast')['case/1k']['throughput'] == 1000
+  assert hotpaths.read_baselines('slow')['case/1k']['throughput'] == 100
+  assert hotpaths.read_baselines('new') == {}
+  # The slow host is not a regression of the fast one
+  _, regressions = hotpaths.compare({'case/1k': _result(110)}, hotpaths.read_baselines('slow'), 0.3)
+  assert regressions == []
+  _, regressions = hotpaths.compare({'case/1k': _result(110)}, hotpaths.read_baselines('fast'), 0.3)
+  assert regressions == ['case/1k']
+
+def test_single_host_baselines_are_not_compared(hotpaths):
+  with open(hotpaths.BASELINES_PATH, 'w') as baselines:
+    json.dump({'version': 1, 'threshold': 0.2, 'results': {'case/1k': _result(1000)}}, baselines)
+  assert hotpaths.read_baselines(hotpaths.host_key()) == {}
+  hotpaths.write_baselines('host', {'case/1k': _result(10)}, 0.2)
+  with open(hotpaths.BASELINES_PATH) as baselines:
+    document = json.load(baselines)
+  assert document['version'] == hotpaths.BASELINES_VERSION and list(document['hosts']) == ['host']
+
+def test_stored_baselines_have_this_layout(hotpaths):
+  with open(os.path.join(MULTI_POOLS, 'benchmarks', 'baselines.json')) as baselines:
+    document = json.load(baselines)
+  assert document['version'] == hotpaths.BASELINES_VERSION
+  assert all('results' in host for host in document['hosts'].values())
+
+def test_every_case_runs(hotpaths, config, workdir, monkeypatch):
+  from ticket import real_ticket
+  # lambdaResult swaps these module functions for stubs, restored after the test
+  monkeypatch.setattr(real_ticket, 'getTempDb', real_ticket.getTempDb)
+  monkeypatch.setattr(real_ticket, 'shared_result_cache', real_ticket.shared_result_cache)
+  monkeypatch.setattr(hotpaths, 'SCALES', {'tiny': 200})
+  monkeypatch.setattr(hotpaths, 'REPEATS', {'tiny': 1})
+  monkeypatch.setattr(hotpaths, 'MIN_SAMPLE_SECONDS', 0)
+  for name in hotpaths.CASES:
+    result = hotpaths.measure(name, 'tiny', config)
+    assert result['throughput'] > 0 and result['unit'].endswith('/s'), name
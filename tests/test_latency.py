@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from ticket.helpers import generate_latency_matrix, latency_correlation, encode_latencies, validate_benchmark
+
+def _regions(config, correlation):
+  return dict(config['sample']['regions'], correlation=correlation)
+
+def test_matrix_follows_home_and_remote_distributions(config):
+  regions = config['sample']['regions']
+  np.random.seed(3)
+  names, latency, home = generate_latency_matrix(20000, regions)
+  locations = regions['locations']
+  assert names == [location['name'] for location in locations]
+  assert latency.shape == (20000, len(locations)) and latency.dtype == np.int32 and latency.min() >= 1
+  weights = np.array([location['weight'] for location in locations])
+  assert np.allclose(np.bincount(home, minlength=len(locations)) / 20000, weights / weights.sum(), atol=0.02)
+  for index, location in enumerate(locations):
+    atHome = latency[home == index, index]
+    assert atHome.mean() == pytest.approx(location['home']['median'], rel=0.1)
+    assert latency[home != index, index].mean() == pytest.approx(location['remote']['median'], rel=0.1)
+
+def test_noise_is_correlated_across_regions(config):
+  np.random.seed(4)
+  _, latency, home = generate_latency_matrix(20000, _regions(config, 0.6))
+  # Remote latencies of two regions, for players at home elsewhere
+  first, second = 0, 1
+  others = (home != first) & (home != second)
+  correlation = np.corrcoef(latency[others, first], latency[others, second])[0, 1]
+  assert correlation == pytest.approx(0.6, abs=0.05)
+
+@pytest.mark.parametrize('correlation', [1.0, 0.0, -0.5])
+def test_edges_of_the_correlation_range(config, correlation):
+  regions = _regions(config, correlation)
+  count = len(regions['locations'])
+  factor = latency_correlation(regions)
+  expected = np.full((count, count), correlation)
+  np.fill_diagonal(expected, 1.0)
+  assert np.allclose(factor @ factor.T, expected)
+  generate_latency_matrix(10, regions)
+
+@pytest.mark.parametrize('correlation', [1.01, -0.6])
+def test_out_of_range_correlation_is_rejected(config, correlation):
+  with pytest.raises(ValueError, match='sample.regions.correlation'):
+    validate_benchmark(dict(config['sample'], regions=_regions(config, correlation)), {})
+
+def test_encode_latencies():
+  players = [{'PlayerId': 'a'}, {'PlayerId': 'b'}]
+  encode_latencies(players, ['us', 'eu'], np.array([[10, 90], [80, 20]], dtype=np.int32))
+  assert players[1]['LatencyInMs'] == {'us': 80, 'eu': 20}
+  assert type(players[0]['LatencyInMs']['us']) is int
@@ -0,0 +1,124 @@
+import json, os
+import numpy as np
+import pytest
+from ticket.result_writer import MATCH_DTYPE, PLAYER_DTYPE
+from ticket.match_quality import join_players, match_quality, match_rows, quality_summary, rank_correlation, QUALITY_DTYPE
+
+# Two 2v2 matches: m1 pairs a party of two with two solos, m2 has four solos
+PLAYERS = np.array([
+  (b't1', b'p1', 1000, 40, 2, 0b011),
+  (b't1', b'p2', 1200, 60, 2, 0b011),
+  (b't2', b'p3', 1100, 20, 1, 0b001),
+  (b't3', b'p4', 1300, 80, 1, 0b111),
+  (b't4', b'p5', 900, 30, 1, 0b100),
+  (b't5', b'p6', 950, 30, 1, 0b100),
+  (b't6', b'p7', 1000, 50, 1, 0b110),
+  (b't7', b'p8', 1050, 70, 1, 0b100),
+  # Submitted but never matched
+  (b't8', b'p9', 2000, 10, 1, 0b001),
+], dtype=PLAYER_DTYPE)
+MATCHES = np.array([
+  (b'm1', b't4', b'p5', b'blue', 10.0),
+  (b'm2', b't3', b'p4', b'red', 8.0),
+  (b'm1', b't1', b'p1', b'red', 4.0),
+  (b'm2', b't2', b'p3', b'red', 8.0),
+  (b'm1', b't1', b'p2', b'red', 4.0),
+  (b'm1', b't5', b'p6', b'blue', 10.0),
+  (b'm2', b't6', b'p7', b'blue', 8.0),
+  (b'm2', b't7', b'p8', b'blue', 8.0),
+  # A player of another run, without a player row
+  (b'm3', b'tx', b'px', b'red', 1.0),
+], dtype=MATCH_DTYPE)
+
+def test_join_keeps_the_rows_with_a_player():
+  matches, players = join_players(MATCHES, PLAYERS)
+  assert len(matches) == len(players) == 8
+  assert list(matches['player_id']) == list(players['player_id'])
+  assert list(matches['ticket_id']) == list(players['ticket_id'])
+  empty, none = join_players(MATCHES, PLAYERS[:0])
+  assert len(empty) == len(none) == 0
+
+def test_measures_per_match():
+  quality = match_quality(*join_players(MATCHES, PLAYERS))
+  assert quality.dtype == QUALITY_DTYPE and list(quality['match_id']) == [b'm1', b'm2']
+  m1, m2 = quality
+  assert (m1['players'], m1['parties'], m1['teams']) == (4, 3, 2)
+  assert (m2['players'], m2['parties'], m2['teams']) == (4, 4, 2)
+  assert m1['time_to_match'] == pytest.approx(7.0) and m2['time_to_match'] == pytest.approx(8.0)
+  # Team means 1100 vs 925, and 1200 vs 1025
+  assert m1['skill_difference'] == pytest.approx(175) and m2['skill_difference'] == pytest.approx(175)
+  assert m1['skill_spread'] == pytest.approx(300) and m2['skill_spread'] == pytest.approx(300)
+  assert m1['latency_spread'] == pytest.approx(30) and m2['latency_spread'] == pytest.approx(60)
+  assert m1['solo_share'] == pytest.approx(0.5) and m2['solo_share'] == pytest.approx(1.0)
+  assert m1['party_size_gap'] == 1 and m2['party_size_gap'] == 0
+  # Neither match has a mode every player asked for, out of three asked for
+  assert m1['mode_overlap'] == 0 and m2['mode_overlap'] == 0
+
+def test_matches_a_loop_over_random_matches():
+  rng = np.random.default_rng(7)
+  players = np.zeros(600, dtype=PLAYER_DTYPE)
+  players['ticket_id'] = [f"t{index // 2}".encode() for index in range(600)]
+  players['player_id'] = [f"p{index}".encode() for index in range(600)]
+  players['skill'] = rng.normal(1000, 200, 600)
+  players['latency'] = rng.uniform(10, 150, 600)
+  players['party_size'] = 2
+  players['game_modes'] = rng.integers(1, 8, 600)
+  matches = np.zeros(600, dtype=MATCH_DTYPE)
+  matches['match_id'] = [f"m{index // 6}".encode() for index in range(600)]
+  matches['ticket_id'], matches['player_id'] = players['ticket_id'], players['player_id']
+  matches['team'] = [(b'red', b'blue')[(index // 2) % 2] for index in range(600)]
+  matches['elapsed_time'] = rng.uniform(1, 60, 600)
+  shuffle = rng.permutation(600)
+  quality = match_quality(*join_players(matches[shuffle], players[::-1]))
+  assert len(quality) == 100
+  for row in quality:
+    group = np.flatnonzero(matches['match_id'] == row['match_id'])
+    skill = players['skill'][group].astype(np.float64)
+    red = skill[matches['team'][group] == b'red'].mean()
+    blue = skill[matches['team'][group] == b'blue'].mean()
+    assert row['skill_difference'] == pytest.approx(abs(red - blue), rel=1e-5)
+    assert row['latency_spread'] == pytest.approx(np.ptp(players['latency'][group]), rel=1e-5)
+    assert row['time_to_match'] == pytest.approx(matches['elapsed_time'][group].mean(), rel=1e-5)
+    modes = players['game_modes'][group]
+    common, union = np.bitwise_and.reduce(modes), np.bitwise_or.reduce(modes)
+    assert row['mode_overlap'] == pytest.approx(bin(common).count('1') / bin(union).count('1'))
+
+def test_single_team_matches_have_no_skill_difference():
+  matches = MATCHES[:8].copy()
+  matches['team'] = b'red'
+  quality = match_quality(*join_players(matches, PLAYERS))
+  assert np.isnan(quality['skill_difference']).all()
+  assert quality_summary(quality)['skillDifference'] == {'count': 0}
+
+def test_rows_of_the_lambda_items():
+  items = [{'match_id': 'abc', 'matchevent_time': '2024-01-01T00:00:10.000Z', 'ticket_id': 't1', 'elapsed_time': '4.5',
+            'players': json.dumps([{'playerId': 'p1', 'team': 'red'}, {'playerId': 'p2', 'team': 'red'}])},
+           {'matchevent_time': '2024-01-01T00:00:10.000Z', 'ticket_id': 't2', 'elapsed_time': '6',
+            'players': json.dumps([{'playerId': 'p3'}])}]
+  rows = match_rows(items)
+  assert rows.dtype == MATCH_DTYPE and list(rows['player_id']) == [b'p1', b'p2', b'p3']
+  # Older items without a match id are grouped on their event time
+  assert rows['match_id'][0] == rows['match_id'][1] != rows['match_id'][2]
+  assert list(rows['elapsed_time']) == [4.5, 4.5, 6.0]
+
+def test_rank_correlation():
+  assert rank_correlation([1, 2, 3, 4], [10, 20, 30, 40]) == pytest.approx(1)
+  assert rank_correlation([1, 2, 3, 4], [4, 3, 2, 1]) == pytest.approx(-1)
+  assert rank_correlation([1, 2], [1, 2]) is None
+  assert rank_correlation([1, 2, 3, np.nan], [5, 5, 5, 1]) is None
+  # Ties share their mean rank
+  expected = np.corrcoef([0.5, 0.5, 2, 3], [0, 1.5, 1.5, 3])[0, 1]
+  assert rank_correlation([1, 1, 2, 3], [1, 2, 2, 3]) == pytest.approx(expected)
+
+def test_simulated_run_compares_the_pools(simulate, config, workdir, capsys):
+  mainTicket = simulate(['Radiant-Dire-Classic-1', 'Radiant-Dire-All'], 300)
+  benchmarkId = mainTicket.realtickets[0].benchmarkId
+  mainTicket.getMatchQuality(benchmarkId, None, 'polling', config['benchmark'])
+  output = capsys.readouterr().out
+  assert 'Radiant-Dire-Classic-1' in output and 'Radiant-Dire-All' in output
+  paths = [os.path.join(root, name) for root, _, names in os.walk(workdir) for name in names if name.endswith('-quality.json')]
+  assert len(paths) == 1
+  with open(paths[0]) as summary:
+    pools = json.load(summary)['pools']
+  for pool in pools.values():
+    assert pool['matches'] > 0 and pool['timeToMatch']['count'] == pool['matches']
@@ -0,0 +1,41 @@
+import tracemalloc
+from ticket.memory import MemoryProfiler, describe_pool
+from ticket.registry import TicketRegistry
+
+def test_phases_account_players_and_tickets():
+  profiler = MemoryProfiler({'topSites': 3}).start()
+  try:
+    profiler.phase('pool', 'parties')
+    players = [{'PlayerId': f'player-{index}', 'skill': index} for index in range(2000)]
+    profiler.phase('pool', 'players', players=len(players))
+    registry = TicketRegistry()
+    for index in range(1000):
+      registry.add(f'ticket-{index}', 1, ['Classic'], 'QUEUED', 0)
+    profiler.phase('pool', 'monitoring', inFlight=len(registry))
+  finally:
+    summary = profiler.stop()
+  pool = profiler.pool('pool')
+  assert [phase['phase'] for phase in pool['phases']] == ['parties', 'players', 'monitoring']
+  # A player dict with its strings is a few hundred bytes, a ticket record and its index entries a few hundred more
+  assert 100 < pool['bytesPerPlayer'] < 2000
+  assert 50 < pool['bytesPerTicket'] < 2000
+  assert len(pool['phases'][1]['topSites']) == 3 and pool['phases'][1]['topSites'][0]['growth'] > 0
+  assert [phase['phase'] for phase in summary['phases']] == ['start', 'summary']
+  assert summary['tracedPeakBytes'] >= pool['tracedPeakBytes'] > 0
+  assert not tracemalloc.is_tracing()
+  lines = describe_pool(pool)
+  assert 'bytes per player' in lines[0] and len(lines) == 4
+
+def test_phases_are_skipped_without_tracing():
+  profiler = MemoryProfiler({})
+  assert profiler.phase('pool', 'players', players=10) is None
+  pool = profiler.pool('pool')
+  assert pool['bytesPerPlayer'] is None and pool['bytesPerTicket'] is None
+  assert describe_pool(pool)[0].endswith('n/a bytes per player, n/a bytes per in-flight ticket')
+
+def test_simulated_run_with_memory_accounting(simulate):
+  mainTicket = simulate(['Radiant-Dire-Classic-1'], 100, memory={'enabled': True, 'topSites': 2})
+  pool = mainTicket.realtickets[0].memory.pool('Radiant-Dire-Classic-1')
+  names = [phase['phase'] for phase in pool['phases']]
+  assert names[:3] == ['start', 'parties', 'players'] and names[-1] == 'summary'
+  assert pool['bytesPerPlayer'] > 0 and pool['bytesPerTicket'] > 0
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from ticket.helpers import partition_parties, party_size_distribution, generate_scores
+
+def test_distribution_per_mode(config):
+  benchmark = config['benchmark']
+  sizes, probabilities = party_size_distribution(benchmark, 'Radiant-Dire-Survival-1')
+  assert sizes.tolist() == [1, 2] and probabilities.tolist() == [0.6, 0.4]
+  sizes, probabilities = party_size_distribution(benchmark, 'Radiant-Dire-Classic-1')
+  assert sizes.tolist() == [1, 2, 3, 4, 5] and probabilities.sum() == pytest.approx(1)
+  # Without partySizes: uniform up to the team size, small for Survival
+  plain = {key: value for key, value in benchmark.items() if key != 'partySizes'}
+  assert party_size_distribution(plain, 'Radiant-Dire-Survival-1')[0].tolist() == [1, 2]
+  assert party_size_distribution(plain, 'Radiant-Dire-All')[1].tolist() == [0.2] * 5
+  # Zero weights drop a size
+  assert party_size_distribution({'partySizes': {'default': {'1': 0, '3': 2}}}, 'pool')[0].tolist() == [3]
+
+@pytest.mark.parametrize('count', [1, 7, 1000, 100003])
+def test_parties_cover_the_batch_exactly(config, count):
+  np.random.seed(count)
+  sizes, probabilities = party_size_distribution(config['benchmark'], 'Radiant-Dire-Classic-1')
+  offsets, lengths = partition_parties(count, sizes, probabilities)
+  assert lengths.sum() == count and (lengths >= 1).all() and lengths.max() <= sizes.max()
+  assert offsets[0] == 0 and np.array_equal(offsets[1:], np.cumsum(lengths)[:-1])
+
+def test_party_sizes_follow_the_distribution(config):
+  np.random.seed(2)
+  sizes, probabilities = party_size_distribution(config['benchmark'], 'Radiant-Dire-Classic-1')
+  _, lengths = partition_parties(200000, sizes, probabilities)
+  # The last party is cut to fit, the others are drawn
+  frequencies = np.bincount(lengths[:-1], minlength=sizes.max() + 1)[sizes] / (len(lengths) - 1)
+  assert np.allclose(frequencies, probabilities, atol=0.01)
+
+def test_empty_batch():
+  offsets, lengths = partition_parties(0, np.array([1, 2]), np.array([0.5, 0.5]))
+  assert len(offsets) == 0 and len(lengths) == 0
+
+def test_party_members_have_correlated_skills():
+  np.random.seed(3)
+  lengths = np.full(20000, 2)
+  scores = np.array(generate_scores(40000, 1000, 200, lengths, 0.8)).reshape(-1, 2)
+  assert np.corrcoef(scores[:, 0], scores[:, 1])[0, 1] == pytest.approx(0.8, abs=0.03)
+  independent = np.array(generate_scores(40000, 1000, 200, lengths, 0.0)).reshape(-1, 2)
+  assert abs(np.corrcoef(independent[:, 0], independent[:, 1])[0, 1]) < 0.03
+  assert min(generate_scores(1000, 10, 100)) >= 1
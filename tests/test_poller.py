@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+import pytest
+from ticket.poller import (CallBudget, PollScheduler, DEFAULT_INTERVAL, MIN_SAMPLES, TIMEOUT_SLACK, REFRESH_GROWTH)
+from ticket.stats import ElapsedTimes
+
+class _Clock():
+
+  def __init__(self):
+    self.now = 1000.0
+
+  def time(self):
+    return self.now
+
+def _scheduler(completeTickets, **config):
+  config = dict({'minInterval': 1, 'maxInterval': 10, 'resolution': 2}, **config)
+  return PollScheduler(config, completeTickets, 120)
+
+def test_budget_refills_at_its_rate_and_caps_bursts():
+  clock = _Clock()
+  budget = CallBudget(clock, 5)
+  assert [budget.take() for _ in range(6)] == [True] * 5 + [False]
+  assert budget.wait() == pytest.approx(0.2)
+  clock.now += 0.5
+  assert [budget.take() for _ in range(3)] == [True, True, False]
+  # An idle minute does not buy more than one second of calls
+  clock.now += 60
+  assert sum(budget.take() for _ in range(20)) == 5
+
+def test_fixed_interval_until_enough_matches():
+  scheduler = _scheduler(ElapsedTimes([30.0] * (MIN_SAMPLES - 1)))
+  assert scheduler.delay('SEARCHING', 5) == DEFAULT_INTERVAL
+  assert scheduler.delay('REQUIRES_ACCEPTANCE', 5) == 1 and scheduler.delay('PLACING', 50) == 1
+
+def test_polls_are_dense_where_tickets_match():
+  # Most tickets match between 20 and 25 seconds, the rest spread up to 100
+  scheduler = _scheduler(ElapsedTimes([20 + index / 16 for index in range(80)] + [25 + index * 3.75 for index in range(20)]))
+  early, dense, sparse = scheduler.delay('SEARCHING', 5), scheduler.delay('SEARCHING', 22), scheduler.delay('SEARCHING', 60)
+  assert dense == 1 and early == 10 and 1 < sparse <= 10
+  # Past the request timeout the ticket is about to end
+  assert scheduler.delay('SEARCHING', 125) == 1
+
+def test_timed_out_tickets_are_polled_right_after_the_timeout():
+  scheduler = _scheduler(ElapsedTimes([5.0] * 10 + [float(value) for value in range(10, 110, 5)]), minInterval=1, maxInterval=30)
+  assert scheduler.delay('SEARCHING', 115) == pytest.approx(5 + TIMEOUT_SLACK)
+  record = SimpleNamespace(status='SEARCHING', submitTime=0)
+  assert scheduler.next(record, 115) == pytest.approx(120 + TIMEOUT_SLACK)
+
+def test_deciles_are_refreshed_as_matches_grow():
+  completeTickets = ElapsedTimes([10.0] * 100)
+  scheduler = _scheduler(completeTickets)
+  first = scheduler._bins()
+  completeTickets.extend([90.0] * int(100 * REFRESH_GROWTH / 2))
+  assert scheduler._bins() is first
+  completeTickets.extend([90.0] * 100)
+  assert scheduler._bins() is not first and scheduler._bins()[-2] == 90.0
+
+def test_simulated_pools_share_the_call_budget(simulate, config):
+  polling = dict(config['benchmark'].get('polling', {}), callsPerSecond=2)
+  mainTicket = simulate(['Radiant-Dire-Classic-1', 'Radiant-Dire-All'], 600, polling=polling)
+  calls = sum(realticket.counters.get('polls.calls') for realticket in mainTicket.realtickets)
+  duration = max((realticket.finish_time or realticket.end_time) - realticket.start_time for realticket in mainTicket.realtickets).total_seconds()
+  assert calls <= 2 * duration + 2
+  assert sum(realticket.counters.get('polls.deferred') for realticket in mainTicket.realtickets) > 0
+  for realticket in mainTicket.realtickets:
+    assert realticket.counters.get('polls.tickets') / realticket.counters.get('polls.calls') > 1
@@ -0,0 +1,66 @@
+import pickle
+import numpy as np
+import pytest
+from ticket.helpers import validate_benchmark
+from ticket.population import Population, IDLE, QUEUED, PLAYING
+
+def _population(config, size=1000, **settings):
+  np.random.seed(5)
+  settings = dict({'sessionLength': {'median': 300, 'std_dev': 0}, 'requeueDelay': {'median': 5, 'std_dev': 0}}, **settings)
+  return Population(size, config['sample']['playerData'], config['sample']['regions'], settings, 0)
+
+def test_players_queue_play_and_queue_again(config):
+  population = _population(config, skillDrift=10)
+  ready = population.ready(300)
+  assert len(ready) == 1000 and (population.state == QUEUED).all()
+  # Queued players are not handed out twice
+  assert len(population.ready(1000)) == 0
+  skill = population.skill.copy()
+  population.matched(ready[:600], 400)
+  population.released(ready[600:], 400)
+  assert population.counts(401) == {'queued': 0, 'playing': 600, 'idle': 400}
+  assert (population.games[ready[:600]] == 1).all() and not np.array_equal(population.skill, skill)
+  assert population.skill.min() >= 1
+  # The failed ones are back after the requeue delay, the matched ones after their session
+  assert sorted(population.ready(405).tolist()) == sorted(ready[600:].tolist())
+  assert population.counts(700)['playing'] == 0 and len(population.ready(700)) == 600
+
+def test_arrivals_are_staggered_over_one_session(config):
+  population = _population(config)
+  assert 0 < len(population.ready(150)) < 1000
+
+def test_party_order_follows_skill_correlation(config):
+  population = _population(config, size=5000)
+  indexes = population.ready(300)
+  assert population.partyOrder(indexes, 0) is indexes
+  ordered = population.partyOrder(indexes, 1.0)
+  assert (np.diff(population.skill[ordered]) >= 0).all()
+  neighbours = population.skill[population.partyOrder(indexes, 0.5)]
+  assert 0.3 < np.corrcoef(neighbours[:-1], neighbours[1:])[0, 1] < 0.7
+
+def test_players_payload(config):
+  population = _population(config, size=3)
+  players = population.players(np.array([2]), ['Classic'])
+  assert players[0]['PlayerId'] == 'player-2'
+  assert players[0]['PlayerAttributes']['GameMode'] == {'SL': ['Classic']}
+  assert list(players[0]['LatencyInMs']) == population.latencyRegions
+
+def test_population_survives_a_checkpoint(config):
+  population = _population(config, size=10)
+  population.matched(population.ready(300), 300)
+  restored = pickle.loads(pickle.dumps(population))
+  assert np.array_equal(restored.state, population.state) and restored.counts(301)['playing'] == 10
+  restored.released(np.array([0]), 301)
+
+@pytest.mark.parametrize('ccu', [None, 0, '1000'])
+def test_population_runs_need_a_ccu(ccu):
+  with pytest.raises(ValueError, match='population.ccu'):
+    validate_benchmark({}, {'soak': {'enabled': True}, 'population': {'ccu': ccu}})
+
+def test_simulated_population_keeps_players_coming_back(simulate):
+  mainTicket = simulate(['Radiant-Dire-Classic-1'], 0, population={'ccu': 200, 'duration': 900,
+                                                                  'sessionLength': {'median': 60, 'std_dev': 10}})
+  population = mainTicket.realtickets[0].population
+  assert population.size == 200
+  assert population.games.max() > 1
+  assert population.games.sum() == mainTicket.realtickets[0].matchedPlayers
@@ -0,0 +1,63 @@
+import threading
+from ticket.registry import TicketRegistry, TicketRecord
+
+def test_status_index_follows_transitions():
+  registry = TicketRegistry()
+  registry.add('a', 1, ['Classic'], 'QUEUED', 0)
+  registry.add('b', 2, ['Classic'], 'QUEUED', 0)
+  assert registry.transition('a', 'SEARCHING', 5) == 'QUEUED'
+  assert registry.transition('missing', 'SEARCHING', 5) is None
+  assert registry.ids('QUEUED') == ['b'] and registry.ids('SEARCHING') == ['a']
+  assert registry.counts() == {'QUEUED': 1, 'SEARCHING': 1}
+  assert registry.get('a').statusTime == 5 and registry.get('a').gameModes == ('Classic',)
+  record = registry.remove('a', 'COMPLETED')
+  assert record.status == 'COMPLETED' and registry.remove('a') is None
+  assert 'a' not in registry and len(registry) == 1 and registry.count('SEARCHING') == 0
+
+def test_due_tickets_come_in_poll_order_and_skip_stale_entries():
+  registry = TicketRegistry()
+  for ticketId, nextPoll in (('late', 30), ('early', 10), ('gone', 5)):
+    registry.add(ticketId, 1, [], 'QUEUED', 0, nextPoll=nextPoll)
+  registry.remove('gone')
+  # Rescheduled: the entry at 10 is stale
+  registry.schedule('early', 40, now=1)
+  assert registry.nextPoll() == 30
+  assert registry.due(35) == ['late']
+  assert registry.due(35) == []
+  assert registry.due(100, limit=1) == ['early']
+  assert registry.get('early').nextPoll is None and registry.nextPoll() is None
+
+def test_expired_by_time_in_status():
+  registry = TicketRegistry()
+  registry.add('old', 1, [], 'REQUIRES_ACCEPTANCE', 0)
+  registry.add('new', 1, [], 'REQUIRES_ACCEPTANCE', 8)
+  assert registry.expired('REQUIRES_ACCEPTANCE', 5, now=10) == ['old']
+
+def test_snapshot_restores_records():
+  registry = TicketRegistry()
+  record = registry.add('a', 3, ['Classic'], 'QUEUED', 1, players=[4, 5, 6], nextPoll=50)
+  registry.transition('a', 'SEARCHING', 7)
+  record.acceptance = 2
+  restored = TicketRegistry()
+  restored.restore(registry.snapshot())
+  copy = restored.get('a')
+  assert [getattr(copy, field) for field in TicketRecord.__slots__ if field not in ('nextPoll', 'lastPoll')] == \
+         [getattr(record, field) for field in TicketRecord.__slots__ if field not in ('nextPoll', 'lastPoll')]
+  # Due right away after a resume
+  assert restored.due(0) == ['a']
+
+def test_concurrent_submit_and_complete():
+  registry = TicketRegistry()
+  def worker(prefix):
+    for index in range(2000):
+      ticketId = f"{prefix}-{index}"
+      registry.add(ticketId, 1, [], 'QUEUED', 0)
+      registry.transition(ticketId, 'SEARCHING', 1)
+      if index % 2:
+        registry.remove(ticketId, 'COMPLETED')
+  threads = [threading.Thread(target=worker, args=(prefix,)) for prefix in 'abcd']
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  assert len(registry) == 4000 and registry.counts() == {'SEARCHING': 4000}
@@ -0,0 +1,57 @@
+import time
+from ticket import real_ticket
+from ticket.real_ticket import RealTicket
+from ticket.result_cache import ResultCache, SETTLE_SECONDS
+from ticket.result_writer import load_results
+
+POOL = 'Radiant-Dire-Classic-1'
+
+def _item(ticketId, event, eventTime, elapsed=30):
+  return {'ticket_id': ticketId, 'ticket_event': event, 'matchevent_time': eventTime, 'elapsed_time': elapsed}
+
+def test_events_are_counted_once_across_reads(tmp_path):
+  cache = ResultCache(str(tmp_path / 'resultcache.json'))
+  entry = cache.get('table', '0001', POOL)
+  assert cache.merge(entry, _item('a', 'MatchmakingSucceeded', '2024-01-01T00:10:00.000Z'))
+  assert cache.merge(entry, _item('b', 'MatchmakingTimedOut', '2024-01-01T00:09:30.000Z', 120))
+  cache.finish_fetch(entry, fetchTime=0)
+  # The mark trails the newest event, the events since then are remembered
+  assert entry['mark'] == '2024-01-01T00:09:00.000Z' and set(entry['window']) == {'a/MatchmakingSucceeded', 'b/MatchmakingTimedOut'}
+  assert not cache.merge(entry, _item('a', 'MatchmakingSucceeded', '2024-01-01T00:10:00.000Z'))
+  assert not cache.merge(entry, _item('c', 'MatchmakingSucceeded', '2024-01-01T00:08:00.000Z'))
+  assert cache.merge(entry, _item('a', 'AcceptMatchCompleted', '2024-01-01T00:10:00.000Z'))
+  assert entry['succeeded'] == {'count': 1, 'total': 30.0} and entry['failed'] == {'count': 2, 'total': 150.0}
+
+def test_entry_completes_after_the_run_settled(tmp_path):
+  cache = ResultCache(str(tmp_path / 'resultcache.json'))
+  entry = cache.get('table', '0001', POOL)
+  entry['runEnd'] = 1000
+  cache.finish_fetch(entry, fetchTime=1000 + SETTLE_SECONDS)
+  assert not entry['complete']
+  cache.finish_fetch(entry, fetchTime=1001 + SETTLE_SECONDS)
+  cache.save()
+  assert ResultCache(cache.path).get('table', '0001', POOL)['complete']
+
+def test_result_merges_new_events_and_stops_reading_when_complete(workdir, local_results, config, monkeypatch, capsys):
+  cache = ResultCache(str(workdir / 'resultcache.json'))
+  monkeypatch.setattr(real_ticket, 'shared_result_cache', lambda: cache)
+  group = f"{config['benchmark']['ticketPrefix']}-0007"
+  benchmark = dict(config['benchmark'], logs='output.txt')
+  realticket = RealTicket(POOL)
+  local_results.store([f"{group}-{index:04d}" for index in range(50)], 'MatchmakingSucceeded', '2024-01-01T00:01:00.000Z')
+  realticket.lambdaResult(7, local_results, 'lambda', benchmark)
+  entry = cache.get('local-results', '0007', POOL)
+  assert entry['succeeded']['count'] == 50 and local_results.queries == local_results.shards
+
+  # Events of the first read are in the window of the second one, they are not counted again
+  local_results.store([f"{group}-{index:04d}" for index in range(50, 60)], 'MatchmakingTimedOut', '2024-01-01T00:01:30.000Z')
+  entry['runEnd'] = time.time() - SETTLE_SECONDS - 1
+  realticket.lambdaResult(7, local_results, 'lambda', benchmark)
+  assert entry['succeeded']['count'] == 50 and entry['failed']['count'] == 10 and entry['complete']
+  events = load_results(str(workdir / f'output-{POOL}-0007-events.npy'))
+  assert len(events) == 60 and len(set(events['ticket_id'].tolist())) == 60
+
+  queries = local_results.queries
+  realticket.lambdaResult(7, local_results, 'lambda', benchmark)
+  assert local_results.queries == queries
+  assert 'cached, benchmark finished' in capsys.readouterr().out
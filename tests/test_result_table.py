@@ -0,0 +1,69 @@
+import collections, os, zipfile
+import pytest
+from conftest import MULTI_POOLS
+from local.dynamodb import validate_ingestion
+from ticket.result_table import (planned_ticket_rate, plan_result_table, read_shards, PARTITION_WRITE_UNITS,
+                                 ON_DEMAND_WRITE_UNITS, DEFAULT_MIN_SHARDS)
+
+CLASSIC = {'name': 'Radiant-Dire-Classic-1', 'acceptance': 0}
+
+def _benchmark(config, **resultTable):
+  return dict(config['benchmark'], resultTable=dict(config['benchmark']['resultTable'], **resultTable))
+
+def test_planned_rate_by_run_mode(config):
+  benchmark = config['benchmark']
+  assert planned_ticket_rate(benchmark, 'Radiant-Dire-All') == pytest.approx(0.5)
+  assert planned_ticket_rate(benchmark, 'Radiant-Dire-Classic-1') == pytest.approx(0.25)
+  router = dict(benchmark, router={'enabled': True, 'interval': {'min': 1, 'max': 1}})
+  assert planned_ticket_rate(router, 'Radiant-Dire-Classic-1') == pytest.approx(1)
+  population = dict(benchmark, population=dict(benchmark['population'], enabled=True, ccu=10000))
+  assert planned_ticket_rate(population, 'Radiant-Dire-Classic-1') > 10
+  assert planned_ticket_rate(_benchmark(config, ticketsPerSecond=42), 'Radiant-Dire-Classic-1') == 42
+
+def test_small_runs_get_a_provisioned_table(config):
+  plan = plan_result_table(config['benchmark'], CLASSIC)
+  assert plan['billingMode'] == 'PROVISIONED' and plan['shards'] == DEFAULT_MIN_SHARDS
+  assert plan['warmWriteUnits'] is None and plan['writeUnits'] >= 5
+  # Acceptance events double the writes
+  accepted = plan_result_table(_benchmark(config, ticketsPerSecond=10), dict(CLASSIC, acceptance=30))
+  assert accepted['eventsPerTicket'] == 2
+  assert accepted['writeUnits'] == 2 * plan_result_table(_benchmark(config, ticketsPerSecond=10), CLASSIC)['writeUnits']
+
+def test_high_rates_go_on_demand_warm_and_sharded(config):
+  plan = plan_result_table(_benchmark(config, ticketsPerSecond=5000), CLASSIC)
+  assert plan['billingMode'] == 'PAY_PER_REQUEST' and plan['warmWriteUnits'] > ON_DEMAND_WRITE_UNITS
+  assert plan['shards'] * PARTITION_WRITE_UNITS >= plan['writeUnits']
+  assert plan_result_table(_benchmark(config, ticketsPerSecond=1e6), CLASSIC)['shards'] == 64
+
+def test_writes_spread_over_the_shards_and_read_back_in_time_order(local_results):
+  written = []
+  for second in range(50):
+    items = local_results.store([f"bench-0003-{second:02d}{index:02d}" for index in range(20)], 'MatchmakingSucceeded',
+                                f"2024-01-01T00:{second // 60:02d}:{second % 60:02d}.000Z")
+    written.extend(items)
+  perShard = collections.Counter(item['pk'] for item in written)
+  assert sorted(perShard) == [f"bench-0003#{shard}" for shard in range(local_results.shards)]
+  assert max(perShard.values()) < 2 * len(written) / local_results.shards
+  items = list(read_shards(local_results, 'local-results', 'bench-0003', local_results.shards, '', ('MatchmakingSucceeded',)))
+  assert len(items) == 1000 and [item['sk'] for item in items] == sorted(item['sk'] for item in written)
+  # From the high-water mark on, and only the requested events
+  since = list(read_shards(local_results, 'local-results', 'bench-0003', local_results.shards, '2024-01-01T00:00:40', ('MatchmakingSucceeded',)))
+  assert len(since) == 200
+  assert list(read_shards(local_results, 'local-results', 'bench-0003', local_results.shards, '', ('MatchmakingTimedOut',))) == []
+
+def test_planned_table_absorbs_its_peak_rate(config):
+  plan = plan_result_table(_benchmark(config, ticketsPerSecond=800), CLASSIC)
+  result = validate_ingestion(plan, seconds=5)
+  assert result['failed'] == 0 and result['read'] == result['written'] == result['events']
+  assert result['peakPartitionUnits'] <= PARTITION_WRITE_UNITS
+  # The same rate on a single key is throttled by the partition limit
+  result = validate_ingestion(dict(plan, shards=1), seconds=5)
+  assert result['throttledItems'] > 0
+
+def test_lambda_package_ships_the_sharded_writer_only():
+  source = os.path.join(MULTI_POOLS, 'lambda', 'lambda_function.py')
+  with zipfile.ZipFile(os.path.join(MULTI_POOLS, 'lambda', 'lambda_function.zip')) as package, open(source) as code:
+    assert package.read('lambda_function.py').decode() == code.read()
+  from local.dynamodb import load_lambda
+  lambda_function = load_lambda()
+  assert not hasattr(lambda_function, 'put_data_dynamodb') and hasattr(lambda_function, 'write_items')
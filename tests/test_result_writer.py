@@ -0,0 +1,40 @@
+import csv
+import numpy as np
+from ticket import result_writer
+from ticket.result_writer import ResultWriter, PLAYER_DTYPE, load_results
+
+def test_rows_stream_to_csv_and_npy(tmp_path):
+  writer = ResultWriter(str(tmp_path / 'run-pool-0001')).start()
+  writer.write('t-1', 'pool', ['Classic', 'Ranked'], 2, 10.0, 40.5, 'COMPLETED', 30.5, 1)
+  writer.write('t-2', 'pool', ['Classic'], 1, 11.0, 131.0, 'TIMED_OUT', 120.0)
+  writer.close()
+  results = load_results(writer.npyPath)
+  assert isinstance(results, np.memmap) and results.shape == (2,)
+  assert results['ticket_id'].tolist() == [b't-1', b't-2']
+  assert results['game_modes'][0] == b'Classic|Ranked'
+  assert results['elapsed_time'].tolist() == [30.5, 120.0]
+  assert results['acceptance'].tolist() == [1, -1]
+  with open(writer.csvPath, newline='') as csvFile:
+    rows = list(csv.reader(csvFile))
+  assert rows[0] == list(result_writer.RESULT_DTYPE.names)
+  assert [row[0] for row in rows[1:]] == ['t-1', 't-2'] and rows[2][6] == 'TIMED_OUT'
+
+def test_batches_flush_before_close(tmp_path, monkeypatch):
+  monkeypatch.setattr(result_writer, 'FLUSH_ROWS', 10)
+  writer = ResultWriter(str(tmp_path / 'players'), dtype=PLAYER_DTYPE).start()
+  writer.writeRows([(f't-{index}', f'p-{index}', 1000.0 + index, 50.0, 1, 1) for index in range(25)])
+  writer.sync()
+  assert writer.rows == 25 and writer.queued == 25
+  writer.close()
+  players = load_results(writer.npyPath)
+  assert players.dtype == PLAYER_DTYPE and len(players) == 25
+  assert players['skill'][-1] == 1024.0
+  # Closing twice is harmless
+  writer.close()
+
+def test_empty_run_leaves_valid_files(tmp_path):
+  writer = ResultWriter(str(tmp_path / 'nested' / 'empty')).start()
+  writer.close()
+  assert len(load_results(writer.npyPath)) == 0
+  with open(writer.csvPath) as csvFile:
+    assert csvFile.read().splitlines() == [','.join(result_writer.RESULT_DTYPE.names)]
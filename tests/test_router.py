@@ -0,0 +1,67 @@
+import queue
+from types import SimpleNamespace
+import numpy as np
+from ticket.router import PartyRouter, ROUTED_COPY_SUFFIX, topology_summary
+from ticket.stats import ElapsedTimes, ElapsedHistogram
+
+NAMES = ['Radiant-Dire-Classic-1', 'Radiant-Dire-Practice-1', 'Radiant-Dire-Survival-1', 'Radiant-Dire-All']
+
+def _pools():
+  return [SimpleNamespace(machmakingConfigurationName=name, inbox=queue.SimpleQueue()) for name in NAMES]
+
+def _drain(pool):
+  parties = []
+  while True:
+    party = pool.inbox.get_nowait()
+    if party is None:
+      return parties
+    parties.append(party)
+
+def _router(config, pools, totalPlayers=300):
+  np.random.seed(1)
+  benchmark = dict(config['benchmark'], router={'enabled': True, 'interval': {'min': 0, 'max': 0}})
+  return PartyRouter(pools, config['sample'], benchmark, totalPlayers)
+
+def test_every_party_goes_to_its_mode_pool_and_the_all_in_one_pool(config):
+  pools = _pools()
+  router = _router(config, pools)
+  assert set(router.modePools) == {'Classic', 'Practice', 'Survival'} and router.allPools == [pools[3]]
+  router.run()
+  allParties = _drain(pools[3])
+  modeParties = {pool.machmakingConfigurationName: _drain(pool) for pool in pools[:3]}
+  assert len(allParties) == router.routedParties == sum(len(parties) for parties in modeParties.values())
+  assert sum(len(players) for players, _ in allParties) == 300
+  # Same players, skills and latencies on both sides, only the copy's ids differ
+  copies = {player['PlayerId']: player for players, _ in allParties for player in players}
+  for name, parties in modeParties.items():
+    for players, gameModes in parties:
+      assert len(gameModes) == 1 and gameModes[0] in name
+      for player in players:
+        copy = copies[player['PlayerId'] + ROUTED_COPY_SUFFIX]
+        assert dict(copy, PlayerId=player['PlayerId']) == player
+
+def test_stopped_router_still_closes_every_inbox(config):
+  pools = _pools()
+  router = _router(config, pools)
+  router.stop()
+  router.run()
+  assert router.routedParties == 0
+  assert all(_drain(pool) == [] for pool in pools)
+
+def test_topology_summary_side_by_side(config):
+  pools = _pools()
+  router = _router(config, pools)
+  router.routedParties = 4
+  for index, pool in enumerate(pools):
+    pool.submittedTickets, pool.matchedPlayers = 10, 20
+    pool.completeTickets = ElapsedTimes([10.0 * (index + 1)] * 8)
+    pool.failedTickets = ElapsedTimes([1.0] * 2)
+  # Soak pools keep histograms
+  pools[3].completeTickets = ElapsedHistogram()
+  for _ in range(8):
+    pools[3].completeTickets.append(40.0)
+  lines = topology_summary(router, 10)
+  multi = next(line for line in lines if line.startswith('multi-pool')).split()
+  single = next(line for line in lines if line.startswith('all-in-one')).split()
+  assert multi[1:5] == ['3', '30', '24', '6'] and multi[-2] == '20.0'
+  assert single[1:5] == ['1', '10', '8', '2'] and abs(float(single[-1]) - 40) < 1
@@ -0,0 +1,73 @@
+import copy, json, os
+import pytest
+from conftest import MULTI_POOLS
+from ruleset_analyzer import RulesetAnalyzer, parse_statement, statement_depth, statement_leaves, reachable_sizes
+
+def _ruleset(name):
+  with open(os.path.join(MULTI_POOLS, 'Configs', f'{name}.json')) as ruleset:
+    return json.load(ruleset)
+
+def _analyzer(config, **analyzer):
+  context = copy.deepcopy(config)
+  context['flexmatch']['analyzer'] = dict(context['flexmatch'].get('analyzer', {}), **analyzer)
+  return RulesetAnalyzer(context)
+
+def test_statement_parsing():
+  tree = parse_statement('or(and(A, B), not(C-1), D)')
+  assert tree == ('or', [('and', ['A', 'B']), ('not', ['C-1']), 'D'])
+  assert statement_depth(tree) == 2 and statement_leaves(tree) == ['A', 'B', 'C-1', 'D']
+
+def test_reachable_team_sizes():
+  assert reachable_sizes([2, 3], 7) == {0, 2, 3, 4, 5, 6, 7}
+  assert reachable_sizes([5], 9) == {0, 5}
+
+def test_shipped_rulesets_are_feasible(config):
+  analyzer = _analyzer(config)
+  report = analyzer.analyze('Radiant-Dire-Classic-1', _ruleset('RadiantDire-Classic-1'))
+  assert report['errors'] == [] and report['matchPlayers'] == (8, 12)
+  assert report['gameModes'] == ['Classic'] and report['searchWindow'] < analyzer.batchSize
+  assert analyzer.analyze('Radiant-Dire-All', _ruleset('RadiantDire-All'))['errors'] == []
+
+def test_unfillable_teams_and_unmeetable_rules_are_errors(config):
+  analyzer = _analyzer(config)
+  ruleset = _ruleset('RadiantDire-Classic-1')
+  for team in ruleset['teams']:
+    team['minPlayers'] = team['maxPlayers'] = 6
+  classic = next(rule for rule in ruleset['rules'] if rule['name'] == 'Classic-Mode')
+  classic['minCount'] = 40
+  benchmark = dict(config['benchmark'], partySizes={'default': {'4': 1}})
+  analyzer.benchmark = benchmark
+  report = analyzer.analyze('Radiant-Dire-Classic-1', ruleset)
+  assert any('team Radiant can never be filled' in error for error in report['errors'])
+  # Practice players never carry Classic
+  ruleset = _ruleset('RadiantDire-Classic-1')
+  analyzer.benchmark = config['benchmark']
+  report = analyzer.analyze('Radiant-Dire-Practice', ruleset)
+  assert any('rule Classic-Mode can never be met: no player of this pool has Classic' in error for error in report['errors'])
+
+def test_unmeetable_branch_of_an_or_is_a_warning(config):
+  ruleset = _ruleset('RadiantDire-Classic-1')
+  ruleset['rules'].append({'name': 'Survival-Mode', 'type': 'collection', 'operation': 'contains',
+                           'measurements': 'flatten(teams[*].players.attributes[GameMode])', 'referenceValue': 'Survival', 'minCount': 1})
+  ruleset['rules'].append({'name': 'AnyMode', 'type': 'compound', 'statement': 'or(Classic-Mode, Survival-Mode)'})
+  report = _analyzer(config).analyze('Radiant-Dire-Classic-1', ruleset)
+  assert report['errors'] == [] and report['compoundDepth'] == 1
+  assert 'AnyMode: branch Survival-Mode can never be met' in report['warnings']
+
+def test_exhaustive_search_cost_grows_with_the_window(config):
+  ruleset = _ruleset('RadiantDire-All')
+  analyzer = _analyzer(config, batchSize=200)
+  sorted_ = analyzer.analyze('Radiant-Dire-All', ruleset)
+  ruleset['algorithm']['batchingPreference'] = 'random'
+  unsorted = analyzer.analyze('Radiant-Dire-All', ruleset)
+  assert unsorted['searchWindow'] == 200 and unsorted['log10Cost'] > sorted_['log10Cost'] + 5
+  ruleset['algorithm']['strategy'] = 'balanced'
+  assert analyzer.analyze('Radiant-Dire-All', ruleset)['log10Cost'] < sorted_['log10Cost']
+
+@pytest.mark.parametrize('strict, deployed', [(False, True), (True, False)])
+def test_strict_analyzer_rejects_a_blow_up(config, capsys, strict, deployed):
+  ruleset = _ruleset('RadiantDire-All')
+  ruleset['algorithm']['batchingPreference'] = 'random'
+  analyzer = _analyzer(config, strict=strict, batchSize=500)
+  assert analyzer.check({'name': 'Radiant-Dire-All', 'ruleset': 'RadiantDire-All'}, ruleset) is deployed
+  assert 'WARNING: estimated evaluation cost' in capsys.readouterr().out
@@ -0,0 +1,58 @@
+import os, time
+import numpy as np
+import pytest
+from ticket.clock import RealClock, Simulation
+from ticket.registry import TicketRegistry
+from ticket.sampler import RingBuffer, TimeSeriesSampler, SAMPLE_DTYPE
+
+class _Pool():
+
+  def __init__(self):
+    self.clock = RealClock()
+    self.tickets = TicketRegistry()
+    self.submittedTickets = self.matches = self.matchedPlayers = 0
+    self.completeTickets = []
+    self.failedTickets = []
+
+def test_ring_buffer_keeps_the_latest_window():
+  buffer = RingBuffer(3, np.dtype([('value', 'i4')]))
+  for value in range(2):
+    buffer.append((value,))
+  assert buffer.values()['value'].tolist() == [0, 1]
+  for value in range(2, 7):
+    buffer.append((value,))
+  assert buffer.values()['value'].tolist() == [4, 5, 6]
+
+def test_samples_counts_and_rates(tmp_path):
+  pool = _Pool()
+  pool.tickets.add('t-1', 1, [], 'REQUIRES_ACCEPTANCE', 0)
+  sampler = TimeSeriesSampler(pool, {'interval': 0.05, 'capacity': 100}).start()
+  for _ in range(5):
+    time.sleep(0.05)
+    pool.submittedTickets += 10
+    pool.matches += 1
+    pool.matchedPlayers += 10
+  sampler.stop()
+  samples = sampler.samples.values()
+  assert len(samples) >= 3 and np.all(np.diff(samples['time']) > 0)
+  assert samples['acceptance_backlog'][-1] == 1 and samples['submitted'][-1] == 50
+  # The rates integrate back to the totals
+  assert float(samples['submissions_per_sec'][1:] @ np.diff(samples['time'])) == pytest.approx(50, rel=1e-3)
+  assert float(samples['players_per_sec'][1:] @ np.diff(samples['time'])) == pytest.approx(50, rel=1e-3)
+  csvPath, npyPath = sampler.export(str(tmp_path / 'pool-timeseries'))
+  assert np.load(npyPath).dtype == SAMPLE_DTYPE and len(np.load(npyPath)) == len(samples)
+  with open(csvPath) as csvFile:
+    assert csvFile.readline().strip() == ','.join(SAMPLE_DTYPE.names)
+
+def test_simulated_population_run_is_sampled(simulate):
+  mainTicket = simulate(['Radiant-Dire-Classic-1'], 0, population={'ccu': 200, 'duration': 120},
+                        sampler={'interval': 5, 'capacity': 1000})
+  realticket = mainTicket.realtickets[0]
+  samples = realticket.sampler.samples.values()
+  # Virtual timestamps, one every interval from the start of the run
+  assert samples['time'][0] >= Simulation(0).time()
+  assert len(samples) >= 120 // 5
+  assert np.allclose(np.diff(samples['time'])[:-1], 5)
+  assert samples['submitted'][-1] == realticket.counters.get('submitted')
+  assert samples['matches_per_sec'].max() > 0
+  assert os.path.exists(realticket.results.csvPath[:-len('.csv')] + '-timeseries.csv')
@@ -0,0 +1,70 @@
+import threading, time
+import pytest
+from ticket.clock import Simulation, SIMULATION_EPOCH
+
+def _run(simulation, *targets):
+  threads = [simulation.thread(target) for target in targets]
+  for thread in threads:
+    thread.start()
+  simulation.start()
+  for thread in threads:
+    thread.join(10)
+    assert not thread.is_alive()
+
+def test_threads_interleave_on_virtual_time():
+  simulation = Simulation()
+  log = []
+  def worker(name, period, rounds):
+    def run():
+      for _ in range(rounds):
+        simulation.sleep(period)
+        log.append((simulation.elapsed, name))
+    return run
+  start = time.time()
+  _run(simulation, worker('slow', 1800, 2), worker('fast', 1000, 3))
+  assert time.time() - start < 5
+  assert log == [(1000, 'fast'), (1800, 'slow'), (2000, 'fast'), (3000, 'fast'), (3600, 'slow')]
+  assert simulation.time() == SIMULATION_EPOCH + 3600
+
+def test_callbacks_run_at_their_virtual_time():
+  simulation = Simulation()
+  fired = []
+  def worker():
+    simulation.schedule(30, lambda label: fired.append((simulation.elapsed, label)), 'first')
+    simulation.schedule(10, lambda label: fired.append((simulation.elapsed, label)), 'second')
+    simulation.sleep(60)
+    fired.append((simulation.elapsed, 'woke'))
+  _run(simulation, worker)
+  assert fired == [(10, 'second'), (30, 'first'), (60, 'woke')]
+
+def test_wait_times_out_on_the_virtual_clock():
+  simulation = Simulation()
+  event = threading.Event()
+  results = []
+  def setter():
+    simulation.sleep(5)
+    event.set()
+  def waiter():
+    results.append(simulation.wait(event, 3))
+    results.append(simulation.wait(event, 3))
+  _run(simulation, setter, waiter)
+  assert results == [False, True] and simulation.elapsed == 6
+
+def test_only_simulation_threads_sleep():
+  with pytest.raises(RuntimeError):
+    Simulation().sleep(1)
+
+def _digests(mainTicket):
+  return [realticket.digest.hexdigest() for realticket in mainTicket.realtickets]
+
+def test_simulated_runs_are_reproducible(simulate, config):
+  names = ['Radiant-Dire-Classic-1', 'Radiant-Dire-All']
+  first = simulate(names, 300)
+  second = simulate(names, 300)
+  assert _digests(first) == _digests(second)
+  seed = config['benchmark']['simulation'].get('seed', 0) + 1
+  other = simulate(names, 300, simulation=dict(config['benchmark']['simulation'], seed=seed))
+  assert _digests(other) != _digests(first)
+  assert all(realticket.counters.get('submitted') > 0 for realticket in first.realtickets)
+  completed = sum(len(realticket.completeTickets) for realticket in first.realtickets)
+  assert completed > 0
@@ -0,0 +1,80 @@
+import json
+from types import SimpleNamespace
+import pytest
+from ticket import soak
+from ticket.registry import TicketRegistry
+from ticket.soak import SoakMonitor
+from ticket.stats import ElapsedHistogram
+
+class _Clock():
+  """Stands in for time.time / process_time / current_rss_bytes of the monitor"""
+
+  def __init__(self):
+    self.time = 0.0
+    self.cpu = 0.0
+    self.rss = 100e6
+
+def _monitor(tmp_path, monkeypatch, **config):
+  clock = _Clock()
+  monkeypatch.setattr(soak.time, 'time', lambda: clock.time)
+  monkeypatch.setattr(soak.time, 'process_time', lambda: clock.cpu)
+  monkeypatch.setattr(soak, 'current_rss_bytes', lambda: clock.rss)
+  realticket = SimpleNamespace(submittedTickets=0, matches=0, matchedPlayers=0, tickets=TicketRegistry(),
+                               completeTickets=ElapsedHistogram(), failedTickets=ElapsedHistogram())
+  monitor = SoakMonitor(realticket, dict({'rollupInterval': 3600}, **config), str(tmp_path / 'soak'))
+  return monitor, realticket, clock
+
+def _hour(realticket, clock, tickets, cpuPerTicket, growthMB, elapsed=30.0):
+  for _ in range(tickets):
+    realticket.completeTickets.append(elapsed)
+  realticket.submittedTickets += tickets
+  realticket.matches += tickets // 2
+  realticket.matchedPlayers += tickets
+  clock.time += 3600
+  clock.cpu += tickets * cpuPerTicket
+  clock.rss += growthMB * 1e6
+
+def test_rollups_cover_their_interval_only(tmp_path, monkeypatch):
+  monitor, realticket, clock = _monitor(tmp_path, monkeypatch)
+  monitor.start()
+  _hour(realticket, clock, 100, 0.001, 0, elapsed=10.0)
+  first = monitor.rollup()
+  _hour(realticket, clock, 200, 0.001, 0, elapsed=90.0)
+  second = monitor.rollup()
+  assert first['completed'] == 100 and second['completed'] == 200
+  assert first['completedP50'] == pytest.approx(10.0, rel=0.02) and second['completedP50'] == pytest.approx(90.0, rel=0.02)
+  assert second['playersPerSec'] == pytest.approx(200 / 3600)
+  with open(monitor.partialPath) as partial:
+    assert [json.loads(line)['completed'] for line in partial] == [100, 200]
+  monitor.stop(final=False)
+
+def test_stable_run_passes(tmp_path, monkeypatch):
+  monitor, realticket, clock = _monitor(tmp_path, monkeypatch)
+  monitor.start()
+  for _ in range(10):
+    _hour(realticket, clock, 100, 0.001, 1)
+    monitor.rollup()
+  report = monitor.verdict()
+  assert report['passed'] and report['memoryGrowthMBPerHour'] == pytest.approx(1.0)
+  with open(monitor.reportPath) as output:
+    assert json.load(output)['intervals'] == 10
+  monitor.stop(final=False)
+
+def test_leaks_and_cpu_creep_fail(tmp_path, monkeypatch):
+  monitor, realticket, clock = _monitor(tmp_path, monkeypatch, maxIntervals=9)
+  monitor.start()
+  for hour in range(12):
+    _hour(realticket, clock, 100, 0.001 * (1 + hour / 4), 80)
+    monitor.rollup()
+  report = monitor.verdict()
+  # Only the last maxIntervals are kept
+  assert report['intervals'] == 9
+  assert not report['memoryPassed'] and not report['cpuPassed'] and not report['passed']
+  monitor.stop(final=False)
+
+def test_resumed_monitor_keeps_the_earlier_rollups(tmp_path, monkeypatch):
+  monitor, realticket, clock = _monitor(tmp_path, monkeypatch)
+  monitor.start([{'completed': 1}, {'completed': 2}])
+  assert len(monitor.rollups) == 2
+  monitor.stop(final=False)
+  assert len(monitor.rollups) == 3
@@ -0,0 +1,42 @@
+import subprocess, sys
+from types import SimpleNamespace
+import pytest
+from conftest import REPO
+from services import Services, LazyClient
+
+# Loads main.py as the CLI does, then reports which heavy modules it pulled in
+PROBE = """
+import runpy, sys
+sys.argv = ['Multi-pools/main.py'] + sys.argv[1:]
+sys.path.insert(0, 'Multi-pools')
+try:
+  runpy.run_path('Multi-pools/main.py', run_name='__main__')
+finally:
+  print(sorted(name for name in ('boto3', 'botocore', 'numpy') if name in sys.modules), file=sys.stderr)
+"""
+
+@pytest.mark.parametrize('option', ['-help', '-print'])
+def test_local_commands_skip_boto3_and_numpy(option):
+  result = subprocess.run([sys.executable, '-c', PROBE, option], cwd=REPO, capture_output=True, text=True, timeout=60)
+  assert result.returncode == 0, result.stderr
+  assert result.stderr.strip().splitlines()[-1] == '[]'
+
+def test_player_and_helpers_import_without_numpy():
+  probe = "import sys; sys.path.insert(0, 'Multi-pools'); import ticket.player, ticket.helpers; print('numpy' in sys.modules)"
+  result = subprocess.run([sys.executable, '-c', probe], cwd=REPO, capture_output=True, text=True, timeout=60)
+  assert result.returncode == 0, result.stderr
+  assert result.stdout.strip() == 'False'
+
+def test_clients_are_created_on_first_use(monkeypatch):
+  created = []
+  boto3 = SimpleNamespace(client=lambda name, region_name: created.append(('client', name)) or SimpleNamespace(call=lambda: name),
+                          resource=lambda name, region_name: created.append(('resource', name)) or SimpleNamespace(tables=name))
+  monkeypatch.setitem(sys.modules, 'boto3', boto3)
+  services = Services('us-east-1')
+  gamelift, dynamodb = services.gamelift, services.dynamodb
+  assert isinstance(gamelift, LazyClient) and created == [] and services.created() == []
+  assert gamelift.call() == 'gamelift' and dynamodb.tables == 'dynamodb'
+  # Reused afterwards, by every proxy of the same service
+  assert services.gamelift.call() == 'gamelift'
+  assert created == [('client', 'gamelift'), ('resource', 'dynamodb')]
+  assert services.created() == ['client gamelift', 'resource dynamodb']
@@ -0,0 +1,48 @@
+import pickle, random
+import pytest
+from ticket.stats import ElapsedTimes, ElapsedHistogram, histogram_percentiles
+
+def test_histogram_matches_exact_percentiles():
+  rng = random.Random(11)
+  values = [rng.lognormvariate(3, 1) for _ in range(50000)]
+  exact = ElapsedTimes(values)
+  histogram = ElapsedHistogram()
+  for value in values:
+    histogram.append(value)
+  assert len(histogram) == len(exact)
+  assert histogram.mean() == pytest.approx(exact.mean())
+  for approximate, expected in zip(histogram.percentiles((1, 50, 99, 100)), exact.percentiles((1, 50, 99, 100))):
+    assert approximate == pytest.approx(expected, rel=0.02)
+  assert histogram.min == min(values) and histogram.max == max(values)
+
+def test_histogram_memory_is_constant_and_out_of_range_values_clamp():
+  histogram = ElapsedHistogram()
+  size = histogram.counts.nbytes
+  for value in (0.0, 1e-6, 5.0, 1e9):
+    histogram.append(value)
+  assert histogram.counts.nbytes == size and histogram.counts.sum() == 4
+  # Counted in the first and last bins
+  assert histogram.counts[0] == 2 and histogram.counts[-1] == 1
+  low, high = histogram.percentiles((0, 100))
+  assert low == pytest.approx(0.01, rel=0.02) and high == pytest.approx(1e5, rel=0.02)
+
+def test_interval_histograms_from_snapshots():
+  histogram = ElapsedHistogram()
+  for _ in range(100):
+    histogram.append(1.0)
+  before = histogram.snapshot()
+  for _ in range(100):
+    histogram.append(50.0)
+  p50, = histogram_percentiles(histogram.snapshot() - before, (50,))
+  assert p50 == pytest.approx(50.0, rel=0.02)
+
+def test_empty_containers():
+  assert ElapsedTimes().percentiles() == [0.0, 0.0] and ElapsedTimes().mean() == 0
+  assert ElapsedHistogram().percentiles() == [0.0, 0.0] and ElapsedHistogram().mean() == 0
+
+def test_histogram_pickles_without_its_lock():
+  histogram = ElapsedHistogram()
+  histogram.append(2.0)
+  restored = pickle.loads(pickle.dumps(histogram))
+  restored.append(4.0)
+  assert len(restored) == 2 and len(histogram) == 1 and restored.max == 4.0